@@ -0,0 +1,1438 @@
+"""
+Programmatic interface to KevinbotLib Deploy Tool.
+
+Nothing here prints or depends on click: results are returned as pydantic models,
+progress is reported through callbacks, and failures raise `DeployToolError`. The
+`Async*` classes run the same blocking SSH work in a thread pool, so one event loop
+can drive many robots at once.
+
+```python
+robot = Robot.from_directory("path/to/robot")
+result = Deployer(robot, "path/to/robot", on_event=print).deploy()
+print(ServiceManager(robot).status())
+```
+"""
+
+import asyncio
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any
+
+import paramiko
+import pygit2
+import toml
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool import __about__
+from kevinbotlib_deploytool.bytecode import (
+    compile_modules_locally,
+    compile_tree_locally,
+    remote_compile_command,
+    remote_import_time_command,
+    remote_package_dir_command,
+    resolve_bytecode_mode,
+)
+from kevinbotlib_deploytool.deployfile import DeployTarget, read_deployfile
+from kevinbotlib_deploytool.importprof import (
+    ImportProfile,
+    fastest_run,
+    flatten_imports,
+    importtime_command,
+    parse_importtime,
+)
+from kevinbotlib_deploytool.manifest import (
+    build_fingerprint,
+    describe_head,
+    diff_files,
+    file_sha256,
+    forget_remote_venv,
+    read_remote_manifest,
+    write_remote_manifest,
+)
+from kevinbotlib_deploytool.packaging import build_archive, hash_members, index_members
+from kevinbotlib_deploytool.profiling import (
+    RUNNER_PATH,
+    ProfileReport,
+    profile_override_path,
+    remote_profile_dir,
+    render_profile_override,
+)
+from kevinbotlib_deploytool.remote_facts import RemoteFactsCache, run_probe, validate_interpreter
+from kevinbotlib_deploytool.remote_gc import (
+    ARCHIVE_MARKER,
+    ARCHIVES_DIR,
+    RemoteEntry,
+    archive_release_command,
+    inventory_command,
+    parse_inventory,
+    plan_eviction,
+    release_tag,
+    retire_command,
+)
+from kevinbotlib_deploytool.service import (
+    UPTIME_COMMAND,
+    ReadinessTracker,
+    ServiceStatus,
+    find_ready_line,
+    journal_command,
+    parse_uptime,
+    render_service_file,
+    systemctl_show_command,
+)
+from kevinbotlib_deploytool.sizes import format_size
+from kevinbotlib_deploytool.sourcemode import (
+    dependency_fingerprint,
+    install_source_command,
+    record_source_deploy,
+    remove_source_command,
+    resolve_deploy_mode,
+)
+from kevinbotlib_deploytool.sshkeys import SSHKeyManager
+from kevinbotlib_deploytool.sshlink import resolve_link_settings
+from kevinbotlib_deploytool.upload import (
+    DEFAULT_STREAMS,
+    KEEPALIVE_INTERVAL,
+    UploadStats,
+    UploadVerificationError,
+    resumable_upload,
+    sftp_makedirs,
+)
+
+
+class DeployToolError(Exception):
+    """Base class of every error raised by the API."""
+
+
+class RemoteCommandError(DeployToolError):
+    """A command on the robot exited with a non-zero status."""
+
+    def __init__(self, command: str, stderr: str, message: str | None = None):
+        super().__init__(message or f"Command failed: {command}")
+        self.command = command
+        self.stderr = stderr
+
+
+class RobotConnectionError(DeployToolError):
+    """The robot could not be reached over SSH or SFTP."""
+
+
+class ServiceFailedError(DeployToolError):
+    """The robot service did not come up after being started."""
+
+    def __init__(self, message: str, status: ServiceStatus):
+        super().__init__(message)
+        self.status = status
+
+
+class DeployEvent(BaseModel):
+    """Progress report passed to callbacks.
+
+    A stage reports "start" and then "done" (or "skipped"), with any number of
+    "progress", "info", "warning" and "output" (remote command output) events between.
+    """
+
+    stage: str
+    kind: str = "info"
+    message: str = ""
+    completed: int | None = None
+    total: int | None = None
+
+
+EventCallback = Callable[[DeployEvent], None]
+
+
+def load_private_key(df: DeployTarget, key_manager: SSHKeyManager | None = None) -> paramiko.RSAKey:
+    key_info = (key_manager or SSHKeyManager("KevinbotLibDeployTool")).list_keys()
+    if df.name not in key_info:
+        msg = f"No SSH key for '{df.name}'. Run 'kevinbotlib ssh init' first."
+        raise DeployToolError(msg)
+    try:
+        return paramiko.RSAKey.from_private_key_file(key_info[df.name][0])
+    except Exception as e:
+        msg = f"Failed to load private key: {e}"
+        raise DeployToolError(msg) from e
+
+
+class Robot:
+    """SSH access to one deploy target.
+
+    Host keys are checked against the user's known_hosts unless another
+    host_key_policy is given; the CLI confirms them interactively instead.
+
+    Args:
+        df (DeployTarget): Deployfile of the robot
+        pkey (paramiko.PKey | None): Private key, loaded from the key manager when first needed by default
+        host_key_policy (paramiko.MissingHostKeyPolicy | None): Policy for host keys missing from known_hosts
+        ssh (paramiko.SSHClient | None): Already open connection to use
+        facts (RemoteFactsCache | None): Cache for remote facts, probed every time by default
+    """
+
+    def __init__(
+        self,
+        df: DeployTarget,
+        pkey: paramiko.PKey | None = None,
+        *,
+        host_key_policy: paramiko.MissingHostKeyPolicy | None = None,
+        ssh: paramiko.SSHClient | None = None,
+        facts: RemoteFactsCache | None = None,
+    ):
+        self.df = df
+        self.pkey = pkey
+        self.host_key_policy = host_key_policy
+        self.facts = facts
+        self._ssh = ssh
+
+    @classmethod
+    def from_directory(cls, directory: str | os.PathLike, **kwargs) -> "Robot":
+        return cls(read_deployfile(Path(directory) / "Deployfile.toml"), **kwargs)
+
+    @property
+    def python(self) -> str:
+        return f"$HOME/{self.df.name}/env/bin/python3"
+
+    @property
+    def package(self) -> str:
+        return self.df.name.replace("-", "_")
+
+    def connect(self) -> paramiko.SSHClient:
+        """Open a new connection to the robot.
+
+        Raises:
+            RobotConnectionError: The robot is unreachable or refused the key
+        """
+        if self.pkey is None:
+            self.pkey = load_private_key(self.df)
+        client = paramiko.SSHClient()
+        if self.host_key_policy is None:
+            client.load_system_host_keys()
+            client.set_missing_host_key_policy(paramiko.RejectPolicy())
+        else:
+            client.set_missing_host_key_policy(self.host_key_policy)
+        try:
+            client.connect(
+                hostname=self.df.host,
+                port=self.df.port,
+                username=self.df.user,
+                pkey=self.pkey,
+                timeout=10,
+                **resolve_link_settings(self.df).connect_kwargs(),
+            )
+        except (paramiko.SSHException, OSError) as e:
+            client.close()
+            msg = f"Failed to connect to {self.df.user}@{self.df.host}:{self.df.port}: {e}"
+            raise RobotConnectionError(msg) from e
+        client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+        return client
+
+    @property
+    def ssh(self) -> paramiko.SSHClient:
+        """Shared connection, reopened if it dropped."""
+        transport = self._ssh.get_transport() if self._ssh else None
+        if transport is None or not transport.is_active():
+            self._ssh = self.connect()
+        return self._ssh
+
+    @ssh.setter
+    def ssh(self, client: paramiko.SSHClient):
+        if self._ssh is not None and self._ssh is not client:
+            self._ssh.close()
+        self._ssh = client
+
+    @property
+    def connection(self) -> paramiko.SSHClient | None:
+        """Current connection, without reconnecting."""
+        return self._ssh
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        """Open an SFTP session over the shared connection.
+
+        Raises:
+            RobotConnectionError: The session could not be opened
+        """
+        try:
+            return self.ssh.open_sftp()
+        except (paramiko.SSHException, OSError) as e:
+            msg = f"Failed to open an SFTP session on {self.df.host}: {e}"
+            raise RobotConnectionError(msg) from e
+
+    def exec_streams(self, command: str) -> tuple[paramiko.ChannelFile, paramiko.ChannelFile]:
+        """Start a command on the robot and return its stdout and stderr as they arrive.
+
+        Raises:
+            RobotConnectionError: The command could not be started
+        """
+        try:
+            _, stdout, stderr = self.ssh.exec_command(command)
+        except paramiko.SSHException as e:
+            msg = f"Failed to run a command on {self.df.host}: {e}"
+            raise RobotConnectionError(msg) from e
+        return stdout, stderr
+
+    def exec(self, command: str) -> tuple[str, str, int]:
+        """Run a command on the robot without checking its exit status.
+
+        Returns:
+            tuple[str, str, int]: Output, error output and exit status
+
+        Raises:
+            RobotConnectionError: The command could not be started
+        """
+        stdout, stderr = self.exec_streams(command)
+        output = stdout.read().decode(errors="replace")
+        error = stderr.read().decode(errors="replace")
+        return output, error, stdout.channel.recv_exit_status()
+
+    def run(self, command: str) -> str:
+        """Run a command on the robot and return its output.
+
+        Raises:
+            RemoteCommandError: The command exited with a non-zero status
+            RobotConnectionError: The command could not be started
+        """
+        output, error, status = self.exec(command)
+        if status != 0:
+            raise RemoteCommandError(command, error.strip())
+        return output
+
+    def fact(self, name: str, probe: Callable[[], Any]) -> Any:
+        """Value of a remote fact, from the facts cache when there is one."""
+        if self.facts is None:
+            return probe()
+        return self.facts.fact(self.ssh, self.df, name, probe)
+
+    def invalidate_facts(self):
+        """Forget the facts that deploys and venv operations change."""
+        if self.facts is not None:
+            self.facts.invalidate(self.ssh, self.df)
+
+    def close(self):
+        if self._ssh is not None:
+            self._ssh.close()
+            self._ssh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReadyReport(BaseModel):
+    status: ServiceStatus
+    startup_seconds: float | None = Field(
+        default=None, description="Seconds from process start until the service had stayed up for the grace period"
+    )
+    activation_seconds: float | None = Field(
+        default=None, description="Systemd activation delta, close to zero for Type=simple units"
+    )
+    ready_after: float | None = Field(default=None, description="Seconds from process start to the ready log line")
+
+
+def describe_ready(report: ReadyReport) -> str:
+    parts = []
+    if report.startup_seconds is not None:
+        parts.append(f"started in {report.startup_seconds:.3f} s")
+    if report.ready_after is not None:
+        parts.append(f"robot ready after {report.ready_after:.3f} s")
+    return f"Service is up ({', '.join(parts)})" if parts else "Service is up"
+
+
+def _check_ready_pattern(pattern: str):
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        msg = f"Invalid ready pattern {pattern!r}: {e}"
+        raise DeployToolError(msg) from e
+
+
+class ServiceManager:
+    """The robot's systemd user service."""
+
+    def __init__(self, robot: Robot):
+        self.robot = robot
+        self.name = f"{robot.df.name}.service"
+
+    @property
+    def unit_path(self) -> str:
+        return f"/home/{self.robot.df.user}/.config/systemd/user/{self.name}"
+
+    def installed(self) -> bool:
+        return self.robot.run(f"test -f {self.unit_path} && echo exists || echo missing").strip() == "exists"
+
+    def status(self) -> ServiceStatus:
+        # One round trip: a missing unit reports LoadState=not-found, a missing systemd fails the command
+        cmd = systemctl_show_command(self.robot.df.name)
+        output, error, exit_status = self.robot.exec(cmd)
+        if exit_status != 0 or not output.strip():
+            error = error.strip() or "Systemd is not available on the remote system."
+            raise RemoteCommandError(cmd, error, f"Failed to query service status: {error}")
+        return ServiceStatus.from_show_output(output)
+
+    def start(self):
+        self.robot.run(f"systemctl --user start {self.name}")
+
+    def stop(self):
+        self.robot.run(f"systemctl --user stop {self.name}")
+
+    def restart(self):
+        self.robot.run(f"systemctl --user restart {self.name}")
+
+    def estop(self):
+        """Emergency stop the robot code with SIGUSR2."""
+        self.robot.run(f"systemctl --user kill --signal=SIGUSR2 {self.name}")
+
+    def install(self, *, start: bool = True):
+        with self.robot.open_sftp() as sftp:
+            sftp_makedirs(sftp, Path(self.unit_path).parent)
+            with sftp.open(self.unit_path, "w") as unit_file:
+                unit_file.write(render_service_file(self.robot.df))
+        self.robot.run(f"chmod 644 {self.unit_path} && systemctl --user daemon-reload")
+        self.robot.run(f"systemctl --user enable {self.name}")
+        if start:
+            self.start()
+
+    def uninstall(self) -> bool:
+        """Stop, disable and remove the service.
+
+        Returns:
+            bool: Whether there was a service to remove
+        """
+        if not self.installed():
+            return False
+        self.robot.run(
+            f"systemctl --user stop {self.name}; systemctl --user disable {self.name}; "
+            f"rm -f {self.unit_path} && systemctl --user daemon-reload"
+        )
+        return True
+
+    def wait_ready(
+        self, timeout: float = 30.0, grace: float = 2.0, ready_pattern: str | None = None, poll_interval: float = 0.2
+    ) -> ReadyReport:
+        """Wait for a just-started service to come up.
+
+        Raises:
+            DeployToolError: ready_pattern is not a valid regular expression
+            ServiceFailedError: The service failed or did not stay active within the timeout
+        """
+        if ready_pattern:
+            _check_ready_pattern(ready_pattern)
+        tracker = ReadinessTracker(grace)
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.status()
+            state = tracker.update(status, time.monotonic())
+            if state == "ready":
+                break
+            if state == "failed" or time.monotonic() > deadline:
+                reason = "failed" if state == "failed" else f"did not stay active within {timeout:.0f} s"
+                msg = (
+                    f"{self.name} {reason} ({status.active_state}/{status.sub_state}, {status.n_restarts} restarts)\n"
+                    f"Check `journalctl --user -u {self.name}` on the robot."
+                )
+                raise ServiceFailedError(msg, status)
+            time.sleep(poll_interval)
+        # startup is measured on the robot's clock, against the main process start
+        up_at = parse_uptime(self.robot.run(UPTIME_COMMAND))
+        start_at = status.exec_main_start_timestamp_monotonic
+
+        ready_at = None
+        while ready_pattern and time.monotonic() <= deadline:
+            output, _, _ = self.robot.exec(journal_command(self.robot.df.name))
+            ready_at = find_ready_line(output, ready_pattern, start_at)
+            if ready_at is not None:
+                break
+            time.sleep(poll_interval)
+
+        return ReadyReport(
+            status=status,
+            startup_seconds=(up_at - start_at) / 1e6 if up_at is not None and start_at else None,
+            activation_seconds=status.activation_seconds,
+            ready_after=(ready_at - start_at) / 1e6 if ready_at is not None else None,
+        )
+
+
+class VenvManager:
+    """The robot's virtual environment."""
+
+    def __init__(self, robot: Robot):
+        self.robot = robot
+        self.path = f"$HOME/{robot.df.name}/env"
+
+    def exists(self) -> bool:
+        return self.robot.fact(
+            "venv_exists",
+            lambda: self.robot.run(f"test -d {self.path} && echo exists || echo missing").strip() == "exists",
+        )
+
+    def python_version(self, python_location: str) -> str:
+        """Version of a remote interpreter, e.g. "3.10"."""
+        output = self.robot.run(f"{python_location} --version").strip()
+        return ".".join(output.split()[1].split(".")[:2])
+
+    def create(self, python_location: str = "/usr/bin/python3") -> str:
+        """Create the venv with the given interpreter.
+
+        Returns:
+            str: Python version of the new venv
+        """
+        # one round trip checks the interpreter, its venv module and the venv path
+        result = run_probe(self.robot.ssh, self.robot.df, (python_location,))
+        for check in validate_interpreter(self.robot.df, result, python_location):
+            if check.level == "error":
+                raise DeployToolError(check.message)
+        version = ".".join(result.facts.interpreters[python_location].split()[1].split(".")[:2])
+        self.robot.run(f"{python_location} -m venv {self.path}")
+        self.robot.run(f"{self.path}/bin/python -c 'print(\"Hello world!\")'")
+        self.forget_deploy()
+        return version
+
+    def delete(self) -> bool:
+        """Delete the venv.
+
+        Returns:
+            bool: Whether there was a venv to delete
+        """
+        if not self.exists():
+            return False
+        self.robot.run(f"rm -rf {self.path}")
+        self.forget_deploy()
+        return True
+
+    def forget_deploy(self):
+        """Make the next deploy install everything into the replaced venv."""
+        with self.robot.open_sftp() as sftp:
+            forget_remote_venv(sftp, self.robot.df)
+        self.robot.invalidate_facts()
+
+
+class ServiceProfiler:
+    """Runs the robot service under the profile runner through a systemd drop-in.
+
+    ```python
+    profiler = ServiceProfiler(robot)
+    try:
+        profiler.start(duration=10)
+        report = profiler.wait()
+    finally:
+        profiler.restore()
+    ```
+    """
+
+    def __init__(self, robot: Robot):
+        self.robot = robot
+        self.service = ServiceManager(robot)
+        self.directory = remote_profile_dir(robot.df)
+        self.report_path = f"{self.directory}/report.json"
+        self.override_path = profile_override_path(robot.df)
+        self.duration = 0.0
+        self.overridden = False
+
+    def start(self, duration: float, interval: float = 0.01, *, cprofile: bool = False):
+        """Restart the service under the profiler.
+
+        Raises:
+            DeployToolError: The service is not installed
+        """
+        if not self.service.installed():
+            msg = f"{self.service.name} is not installed, deploy the robot code first"
+            raise DeployToolError(msg)
+        self.duration = duration
+        with self.robot.open_sftp() as sftp:
+            sftp_makedirs(sftp, self.directory)
+            sftp.put(str(RUNNER_PATH), f"{self.directory}/runner.py")
+            with contextlib.suppress(FileNotFoundError):
+                sftp.remove(self.report_path)
+            sftp_makedirs(sftp, Path(self.override_path).parent)
+            self.overridden = True
+            with sftp.open(self.override_path, "w") as override:
+                override.write(render_profile_override(self.robot.df, duration, interval, cprofile=cprofile))
+        self.robot.run(f"systemctl --user daemon-reload && systemctl --user restart {self.service.name}")
+
+    def read_report(self) -> ProfileReport | None:
+        with self.robot.open_sftp() as sftp:
+            try:
+                with sftp.open(self.report_path, "r") as f:
+                    return ProfileReport.model_validate_json(f.read())
+            except FileNotFoundError:
+                return None
+
+    def wait(self, timeout: float = 30.0, poll_interval: float = 0.5) -> ProfileReport:
+        """Wait for the profile duration plus up to timeout seconds for the report.
+
+        Raises:
+            ServiceFailedError: The service stopped before writing a report
+            DeployToolError: No report appeared in time
+        """
+        deadline = time.monotonic() + self.duration + timeout
+        while time.monotonic() <= deadline:
+            report = self.read_report()
+            if report is not None:
+                return report
+            status = self.service.status()
+            if status.active_state in ("failed", "inactive"):
+                # the runner writes its report while the code exits
+                report = self.read_report()
+                if report is not None:
+                    return report
+                msg = (
+                    f"{self.service.name} stopped before the profile was written "
+                    f"({status.active_state}/{status.sub_state})\n"
+                    f"Check `journalctl --user -u {self.service.name}` on the robot."
+                )
+                raise ServiceFailedError(msg, status)
+            time.sleep(poll_interval)
+        msg = f"No profile from the robot after {self.duration + timeout:.0f} s"
+        raise DeployToolError(msg)
+
+    def restore(self, *, restart: bool = True):
+        """Remove the drop-in and restart the service normally, if `start` got as far as writing it."""
+        if not self.overridden:
+            return
+        command = f"rm -f {self.override_path} && systemctl --user daemon-reload"
+        if restart:
+            command += f" && systemctl --user restart {self.service.name}"
+        self.robot.run(command)
+        self.overridden = False
+
+
+class GCReport(BaseModel):
+    entries: list[RemoteEntry]
+    evicted: list[RemoteEntry]
+    budget: int
+    dry_run: bool = False
+
+    @property
+    def total(self) -> int:
+        return sum(entry.size for entry in self.entries)
+
+    @property
+    def freed(self) -> int:
+        return sum(entry.size for entry in self.evicted)
+
+
+def collect_garbage(robot: Robot, budget: int | None = None, *, dry_run: bool = False) -> GCReport:
+    """Enforce the disk budget on the robot. Deletion runs in the background."""
+    df = robot.df
+    budget = df.gc.budget_bytes if budget is None else budget
+    entries = parse_inventory(robot.run(inventory_command(df)), df)
+    evicted = plan_eviction(entries, budget, df.gc.keep_releases)
+    if evicted and not dry_run:
+        robot.run(retire_command(df, [entry.path for entry in evicted], release_tag()))
+    return GCReport(entries=entries, evicted=evicted, budget=budget, dry_run=dry_run)
+
+
+def read_deployed_manifest(robot: Robot) -> dict | None:
+    """Manifest of the code deployed on the robot, read over SFTP without running any command."""
+    with robot.open_sftp() as sftp:
+        return read_remote_manifest(sftp, robot.df)
+
+
+def profile_imports(robot: Robot, package: str | None = None, runs: int = 3) -> ImportProfile:
+    """Profile importing package in the deployed environment with `python -X importtime`.
+
+    The fastest of runs imports is kept. The profile is tagged with the fingerprint
+    and commit of the deployed code so later profiles can be compared against it.
+
+    Raises:
+        RemoteCommandError: The import failed on the robot
+    """
+    package = package or robot.package
+    command = importtime_command(robot.python, package)
+    trees = []
+    for _ in range(max(runs, 1)):
+        output, _, exit_status = robot.exec(command)
+        if exit_status != 0:
+            raise RemoteCommandError(command, output.strip(), f"Importing {package} failed on the robot")
+        trees.append(parse_importtime(output))
+    roots = fastest_run(trees)
+    manifest = read_deployed_manifest(robot) or {}
+    return ImportProfile(
+        package=package,
+        fingerprint=manifest.get("fingerprint"),
+        commit=manifest.get("git", {}).get("commit"),
+        timestamp=time.time(),
+        modules=flatten_imports(roots),
+        roots=roots,
+    )
+
+
+class DeployOptions(BaseModel):
+    custom_wheels: list[Path] = Field(default_factory=list, description="Extra wheels installed before the robot code")
+    start_service: bool = True
+    upload_streams: int = DEFAULT_STREAMS
+    mode: str = Field(default="auto", description="auto, source or wheel")
+    force: bool = Field(default=False, description="Deploy even if the robot already runs this exact build")
+    gc: bool = Field(default=True, description="Enforce the remote disk budget after deploying")
+    bytecode: str = Field(default="auto", description="auto, local, remote or off")
+    bytecode_optimize: int = 0
+    startup_report: bool = Field(default=False, description="Time the package import before and after compiling")
+    ready_timeout: float = Field(default=30.0, description="Seconds to wait for the service to come up (0 to skip)")
+    ready_grace: float = 2.0
+    ready_pattern: str | None = None
+    verbose: int = 0
+
+
+class DeployResult(BaseModel):
+    robot: str
+    manifest: dict
+    up_to_date: bool = Field(default=False, description="The robot already ran this build, nothing was deployed")
+    mode: str | None = None
+    remote_code_dir: str = ""
+    code_unchanged: bool = Field(default=False, description="The robot code was already extracted from this archive")
+    archive_cached: bool = Field(default=False, description="The archive was already on the robot")
+    upload: UploadStats | None = None
+    import_seconds: tuple[float | None, float | None] | None = Field(
+        default=None, description="Package import time without and with bytecode"
+    )
+    ready: ReadyReport | None = None
+    gc: GCReport | None = None
+
+
+class DeployPlan(BaseModel):
+    """What a deploy would do, computed without changing anything on the robot."""
+
+    robot: str
+    up_to_date: bool
+    mode: str
+    deps_changed: bool
+    files_known: bool = Field(description="The deployed manifest lists its files, so the file diff is exact")
+    added: list[str] = Field(default_factory=list)
+    changed: list[str] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+    upload_bytes: int = Field(default=0, description="Compressed bytes sent to the robot")
+    upload_estimated: bool = Field(default=False, description="upload_bytes includes an estimate of the robot wheel")
+    wheels: list[str] = Field(default_factory=list, description="Wheels pip would install")
+    restart: bool = Field(default=False, description="The robot service is stopped and started again")
+    steps: list[str] = Field(default_factory=list)
+
+
+class Deployer:
+    """Packages robot code and deploys it.
+
+    Args:
+        robot (Robot): Robot to deploy to
+        directory (str | os.PathLike): Robot project containing the Deployfile
+        options (DeployOptions | None): Deploy options
+        on_event (EventCallback | None): Called with progress events, from the deploying thread
+    """
+
+    def __init__(
+        self,
+        robot: Robot,
+        directory: str | os.PathLike,
+        options: DeployOptions | None = None,
+        on_event: EventCallback | None = None,
+    ):
+        self.robot = robot
+        self.df = robot.df
+        self.directory = Path(directory)
+        self.options = options or DeployOptions()
+        self.on_event = on_event
+        self.timings: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+
+    def _emit(self, stage: str, kind: str = "info", message: str = "", **kwargs):
+        # stage durations are recorded in the manifest
+        if kind == "start":
+            self._started[stage] = time.perf_counter()
+        elif kind == "done" and stage in self._started:
+            elapsed = time.perf_counter() - self._started.pop(stage)
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + elapsed, 3)
+        if self.on_event:
+            self.on_event(DeployEvent(stage=stage, kind=kind, message=message, **kwargs))
+
+    def validate(self):
+        """Check that the project can be deployed, before connecting to anything."""
+        for wheel in self.options.custom_wheels:
+            if not Path(wheel).exists():
+                msg = f"Custom wheel not found: {Path(wheel).resolve()}"
+                raise DeployToolError(msg)
+
+        if self.options.ready_pattern:
+            _check_ready_pattern(self.options.ready_pattern)
+
+        # check for src/name/__main__.py
+        src_path = self.directory / "src" / self.robot.package
+        if not (src_path / "__main__.py").exists():
+            msg = f"Robot code is invalid: must contain {src_path / '__main__.py'}"
+            raise DeployToolError(msg)
+
+        if not (self.directory / "pyproject.toml").exists():
+            msg = f"Robot code is invalid: pyproject.toml not found in {self.directory}"
+            raise DeployToolError(msg)
+
+    def build_manifest(
+        self, bytecode_mode: str, bytecode_optimize: int | None = None, custom_wheel_hashes: list[str] | None = None
+    ) -> dict:
+        """Deploy manifest of the local robot code.
+
+        The build options default to this deployer's options.
+
+        Raises:
+            DeployToolError: The robot code is not in a git repository with a commit
+        """
+        if bytecode_optimize is None:
+            bytecode_optimize = self.options.bytecode_optimize
+        if custom_wheel_hashes is None:
+            custom_wheel_hashes = [file_sha256(wheel) for wheel in self.options.custom_wheels]
+        try:
+            return self._build_manifest(bytecode_mode, bytecode_optimize, custom_wheel_hashes)
+        except pygit2.GitError as e:
+            msg = f"Failed to read the git repository of {self.directory.resolve()}: {e}"
+            raise DeployToolError(msg) from e
+
+    def build_manifest_like(self, deployed: dict) -> dict:
+        """Local deploy manifest built with the options the deployed manifest records.
+
+        Manifests written before build options were recorded fall back to this deployer's options.
+        """
+        build = deployed.get("build")
+        if not isinstance(build, dict) or "bytecode" not in build:
+            return self.build_manifest(resolve_bytecode_mode(self.options.bytecode, self.df.python_version))
+        return self.build_manifest(build["bytecode"], build.get("bytecode_optimize", 0), build.get("custom_wheels", []))
+
+    def _build_manifest(self, bytecode_mode: str, bytecode_optimize: int, custom_wheel_hashes: list[str]) -> dict:
+        repo = pygit2.Repository(os.path.join(self.directory, ".git"))
+        files = self.file_hashes()
+        options = {"bytecode": bytecode_mode, "bytecode_optimize": bytecode_optimize}
+        index = self.df.package.source == "index"
+        if index:
+            # the packaged files stand in for the dirty state: included files are usually ignored
+            # by git, and untracked files that are not packaged must not force a redeploy
+            options["files"] = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        return {
+            "deploytool": __about__.__version__,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).timestamp(),
+            "git": describe_head(repo, untracked_files="no" if index else "all"),
+            "robot": self.df.name,
+            "build": {
+                "bytecode": bytecode_mode,
+                "bytecode_optimize": bytecode_optimize,
+                "custom_wheels": custom_wheel_hashes,
+            },
+            "deps": dependency_fingerprint(
+                toml.load(self.directory / "pyproject.toml"), custom_wheel_hashes, self.df.python_version
+            ),
+            "fingerprint": build_fingerprint(
+                repo,
+                self.directory / "Deployfile.toml",
+                custom_wheel_hashes,
+                options,
+                dirty=not index,
+            ),
+            "files": files,
+        }
+
+    def deploy(self) -> DeployResult:
+        """Deploy the robot code. The connection stays open on the robot afterwards.
+
+        Raises:
+            DeployToolError: The deploy failed
+        """
+        started = time.perf_counter()
+        self.timings, self._started = {}, {}
+        self.validate()
+        if self.options.custom_wheels:
+            self._emit("validate", message=f"Will install custom wheels: {list(map(str, self.options.custom_wheels))}")
+        bytecode_mode = resolve_bytecode_mode(self.options.bytecode, self.df.python_version)
+        if bytecode_mode != "off":
+            self._emit(
+                "validate",
+                message=f"Bytecode will be compiled {'locally' if bytecode_mode == 'local' else 'on the robot'}",
+            )
+        manifest = self.build_manifest(bytecode_mode)
+
+        manifest["timings"] = self.timings
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = self._deploy(Path(tmpdir), manifest, bytecode_mode, started)
+        if not result.up_to_date:
+            self.robot.invalidate_facts()
+        return result
+
+    def plan(self) -> DeployPlan:
+        """Work out what `deploy` would do, reading the robot over a single SFTP session.
+
+        Local files are hashed and archived to measure the upload; the robot wheel is
+        not built, so its size is estimated from the compressed package sources.
+        """
+        self.validate()
+        df, options = self.df, self.options
+        bytecode_mode = resolve_bytecode_mode(options.bytecode, df.python_version)
+        manifest = self.build_manifest(bytecode_mode)
+
+        with self.robot.open_sftp() as sftp:
+            deployed = read_remote_manifest(sftp, df) or {}
+            try:
+                sftp.stat(ServiceManager(self.robot).unit_path)
+            except OSError:
+                has_service = False
+            else:
+                has_service = True
+
+        mode = resolve_deploy_mode(options.mode, deployed or None, manifest["deps"])
+        plan = DeployPlan(
+            robot=df.name,
+            up_to_date=not options.force and deployed.get("fingerprint") == manifest["fingerprint"],
+            mode=mode,
+            deps_changed=deployed.get("deps") != manifest["deps"],
+            files_known="files" in deployed,
+        )
+        plan.added, plan.changed, plan.removed = diff_files(deployed.get("files", {}), manifest["files"])
+        if plan.up_to_date:
+            plan.steps = ["Nothing to deploy, the robot already runs this build"]
+            return plan
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            archive_sha256 = build_archive(
+                tmp_path / "plan.tar.gz", self.archive_sources(tmp_path, bytecode_mode, None)
+            )
+            archive_cached = mode == "source" and deployed.get("archive") == archive_sha256
+            if not archive_cached:
+                plan.upload_bytes = (tmp_path / "plan.tar.gz").stat().st_size
+            if mode == "wheel":
+                package_dir = self.directory / "src" / self.robot.package
+                build_archive(tmp_path / "wheel.tar.gz", [(package_dir, self.robot.package)])
+                plan.upload_bytes += (tmp_path / "wheel.tar.gz").stat().st_size
+                plan.upload_bytes += sum(Path(wheel).stat().st_size for wheel in options.custom_wheels)
+                plan.upload_estimated = True
+
+        if mode == "wheel":
+            project = toml.load(self.directory / "pyproject.toml").get("project", {})
+            plan.wheels = [
+                *(Path(wheel).name for wheel in options.custom_wheels),
+                f"{project.get('name', df.name)} {project.get('version', '')}".strip(),
+            ]
+        plan.restart = options.start_service and has_service
+
+        steps = ["Build the robot wheel"] if mode == "wheel" else []
+        steps.append("Build the code archive")
+        if has_service:
+            steps.append(f"Stop {df.name}.service")
+        else:
+            steps.append(f"Warn that no {df.name}.service is installed, so the robot code is not stopped or started")
+        if archive_cached:
+            steps.append("Reuse the code archive already on the robot")
+        else:
+            approx = "~" if plan.upload_estimated else ""
+            steps += [f"Upload {approx}{format_size(plan.upload_bytes)}", "Extract the code"]
+        if mode == "wheel":
+            steps.append(f"pip install {', '.join(plan.wheels)}")
+        else:
+            steps.append("Link the robot sources into the venv")
+        if bytecode_mode != "off":
+            steps.append(f"Compile bytecode {'locally' if bytecode_mode == 'local' else 'on the robot'}")
+        steps.append("Write the deploy manifest")
+        if plan.restart:
+            steps.append(f"Start {df.name}.service" + (" and wait until it is ready" if options.ready_timeout else ""))
+        if options.gc:
+            steps.append("Enforce the remote disk budget")
+        plan.steps = steps
+        return plan
+
+    def _deploy(self, tmp_path: Path, manifest: dict, bytecode_mode: str, started: float) -> DeployResult:
+        df, options = self.df, self.options
+
+        self._emit("connect", "start", "Connecting via SFTP")
+        sftp = self.robot.open_sftp()
+        self._emit("connect", "done", "SFTP connection established")
+
+        deployed = read_remote_manifest(sftp, df)
+        if not options.force and deployed and deployed.get("fingerprint") == manifest["fingerprint"]:
+            sftp.close()
+            return DeployResult(robot=df.name, manifest=manifest, up_to_date=True, mode=deployed.get("mode"))
+
+        deploy_mode = resolve_deploy_mode(options.mode, deployed, manifest["deps"])
+        if deploy_mode == "source" and record_source_deploy(manifest, deployed):
+            self._emit(
+                "build",
+                "warning",
+                "Dependencies changed since the last wheel deploy; source mode will not install them, use --mode wheel",
+            )
+        manifest["mode"] = deploy_mode
+
+        wheel_path = None
+        if deploy_mode == "wheel":
+            wheel_path = self.build_wheel()
+            manifest["wheels"] = {
+                path.name: file_sha256(path) for path in (*map(Path, options.custom_wheels), wheel_path)
+            }
+        else:
+            self._emit("build", "skipped", "Dependencies unchanged, deploying sources without building a wheel")
+            # the venv keeps the wheels of the last wheel deploy
+            if deployed and "wheels" in deployed:
+                manifest["wheels"] = deployed["wheels"]
+
+        tarball_path = tmp_path / "robot_code.tar.gz"
+        archive_sha256 = self.build_archive(tarball_path, tmp_path, bytecode_mode, wheel_path)
+        manifest["archive"] = archive_sha256
+
+        remote_code_dir = f"$HOME/{df.name}/robot"
+        remote_project_dir = f"/home/{df.user}/{df.name}"
+        remote_tarball_path = f"{remote_project_dir}/{ARCHIVES_DIR}/{archive_sha256}.tar.gz"
+        result = DeployResult(robot=df.name, manifest=manifest, mode=deploy_mode, remote_code_dir=remote_code_dir)
+
+        sftp_makedirs(sftp, f"{remote_project_dir}/{ARCHIVES_DIR}")
+
+        service = ServiceManager(self.robot)
+        has_service = service.installed()
+        if has_service:
+            self._emit("stop", "start", "Stopping robot code")
+            self.robot.exec(f"systemctl stop --user {df.name}.service")
+            self._emit("stop", "done", "Robot code stopped")
+        else:
+            self._emit(
+                "stop",
+                "warning",
+                f"No service file found for {df.name} — run `kevinbotlib-deploytool robot service install` to add it.",
+            )
+
+        deployed_sha256, result.archive_cached = self.remote_archive_state(remote_project_dir, remote_tarball_path)
+        if deployed_sha256 == archive_sha256:
+            result.code_unchanged = True
+            self._emit("upload", "skipped", f"Robot already has code archive {archive_sha256[:12]}, skipping upload")
+        else:
+            # Move old code out of the way; deleting it is left to the garbage collector
+            self._emit("release", "start", "Archiving old code on remote")
+            try:
+                self.robot.run(archive_release_command(df, release_tag()))
+            except RemoteCommandError as e:
+                msg = f"Failed to archive old code: {e.stderr}"
+                raise DeployToolError(msg) from e
+            self._emit("release", "done", "Old code moved to releases")
+
+            if result.archive_cached:
+                self._emit("upload", "skipped", f"Code archive {archive_sha256[:12]} is cached on the robot")
+            else:
+                result.upload = self.upload(tarball_path, archive_sha256, remote_tarball_path)
+                sftp.close()
+                sftp = self.robot.open_sftp()
+
+            self._emit("extract", "start", "Extracting code on remote")
+            self.robot.run(
+                f"mkdir -p {remote_code_dir} && tar -xzf {remote_tarball_path} -C {remote_code_dir} "
+                f"&& echo {archive_sha256} > {remote_code_dir}/{ARCHIVE_MARKER} && touch {remote_tarball_path}"
+            )
+            self._emit("extract", "done", "Code extracted")
+
+        if deploy_mode == "wheel":
+            self.install_wheels(remote_code_dir, wheel_path, bytecode_mode)
+        else:
+            self._emit("install", "start", "Linking robot sources into the venv")
+            self.robot.run(
+                install_source_command(self.robot.python, self.robot.package, f"{remote_project_dir}/robot/src")
+            )
+            self._emit("install", "done", "Robot sources linked")
+
+        if bytecode_mode != "off":
+            result.import_seconds = self.compile_remote_bytecode(remote_code_dir, compile_src=bytecode_mode == "remote")
+
+        # Written last, so an interrupted deploy is never mistaken for an up to date one
+        self.timings["total"] = round(time.perf_counter() - started, 3)
+        write_remote_manifest(sftp, df, manifest)
+        sftp.close()
+
+        if options.start_service:
+            if has_service:
+                self._emit("start", "start", "Starting robot code")
+                self.robot.run(f"systemctl start --user {df.name}.service")
+                self._emit("start", "done", "Robot code started")
+                if options.ready_timeout:
+                    self._emit("ready", "start", f"Waiting for {df.name}.service to become ready")
+                    result.ready = service.wait_ready(options.ready_timeout, options.ready_grace, options.ready_pattern)
+                    if options.ready_pattern and result.ready.ready_after is None:
+                        self._emit(
+                            "ready",
+                            "warning",
+                            f"No log line matching {options.ready_pattern!r} within {options.ready_timeout:.0f} s",
+                        )
+                    self._emit("ready", "done", describe_ready(result.ready))
+            else:
+                self._emit(
+                    "start",
+                    "warning",
+                    f"No service file found for {df.name} — run `kevinbotlib-deploytool robot service install` to add it.",
+                )
+
+        if options.gc:
+            result.gc = self.collect_garbage()
+        return result
+
+    def build_wheel(self) -> Path:
+        self._emit("build", "start", "Building wheel")
+        try:
+            result = subprocess.run(
+                [sys.executable, "-m", "hatch", "build", "-t", "wheel"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            msg = f"Failed to build wheel: {e!r}\n{e.stdout}{e.stderr}"
+            raise DeployToolError(msg) from e
+        wheel_file = result.stderr.splitlines()[-1] if result.stderr.strip() else ""
+        wheel_path = self.directory / wheel_file
+        if not wheel_file or not wheel_path.is_file():
+            msg = "No wheel found in build output!"
+            raise DeployToolError(msg)
+        self._emit("build", "done", f"Built {wheel_path.name}")
+        return wheel_path
+
+    def project_sources(self) -> list[tuple[Path, str]]:
+        """Project files and directories that go into the code archive, as (path, arcname)."""
+        project_root = self.directory
+        sources = [
+            (project_root / name, name) for name in ("src", "assets", "deploy") if (project_root / name).exists()
+        ]
+        pyproject_path = project_root / "pyproject.toml"
+        sources.append((pyproject_path, "pyproject.toml"))
+        # this is to be compatible with hatchling
+        pyproject = toml.load(pyproject_path)
+        if "project" in pyproject and "readme" in pyproject["project"]:
+            readme_path = project_root / pyproject["project"]["readme"]
+            if readme_path.exists():
+                sources.append((readme_path, readme_path.name))
+        return sources
+
+    def indexed_files(self) -> dict[str, tuple[Path, dict]]:
+        """Project files from the git index and the [package] include list, with their blob OIDs."""
+        repo = pygit2.Repository(os.path.join(self.directory, ".git"))
+        try:
+            return index_members(repo, self.directory, self.project_sources(), self.df.package.include)
+        except ValueError as e:
+            raise DeployToolError(str(e)) from e
+
+    def package_members(self) -> list[tuple[Path, str]]:
+        """Project files and directories to archive, as selected by the Deployfile [package] source."""
+        if self.df.package.source == "index":
+            return [(path, arcname) for arcname, (path, _) in self.indexed_files().items()]
+        return self.project_sources()
+
+    def file_hashes(self) -> dict[str, dict]:
+        """Content hash and size of every packaged project file, for the manifest."""
+        if self.df.package.source == "index":
+            return {arcname: entry for arcname, (_, entry) in self.indexed_files().items()}
+        return hash_members(self.project_sources())
+
+    def archive_sources(self, tmp_path: Path, bytecode_mode: str, wheel_path: Path | None) -> list[tuple[Path, str]]:
+        sources = self.package_members()
+        remote_src = f"/home/{self.df.user}/{self.df.name}/robot/src"
+        if bytecode_mode == "local" and self.df.package.source == "index":
+            # only the packaged modules, not untracked scratch files below src/
+            modules = [
+                (path, arcname.removeprefix("src/"))
+                for path, arcname in sources
+                if arcname.startswith("src/") and arcname.endswith(".py")
+            ]
+            sources += compile_modules_locally(
+                modules, tmp_path / "bytecode", "src", remote_src, self.options.bytecode_optimize
+            )
+        elif bytecode_mode == "local" and (self.directory / "src").exists():
+            sources += compile_tree_locally(
+                self.directory / "src", tmp_path / "bytecode", "src", remote_src, self.options.bytecode_optimize
+            )
+
+        if wheel_path is not None:
+            sources.append((wheel_path, wheel_path.name))
+            if self.options.custom_wheels:
+                # add wheels to cwheels directory in the tarball
+                sources.append((wheel_path, f"cwheels/{wheel_path.name}"))
+            for wheel in self.options.custom_wheels:
+                cwheel_path = Path(wheel).resolve()
+                sources.append((cwheel_path, f"cwheels/{cwheel_path.name}"))
+        return sources
+
+    def build_archive(self, tarball_path: Path, tmp_path: Path, bytecode_mode: str, wheel_path: Path | None) -> str:
+        """Build the code archive.
+
+        Returns:
+            str: SHA-256 of the archive
+        """
+        self._emit("archive", "start", "Creating code tarball")
+        # The manifest is uploaded separately so identical code gives an identical archive
+        archive_sha256 = build_archive(tarball_path, self.archive_sources(tmp_path, bytecode_mode, wheel_path))
+        self._emit(
+            "archive", "done", f"Code archive {archive_sha256[:12]} ({format_size(tarball_path.stat().st_size)})"
+        )
+        return archive_sha256
+
+    def remote_archive_state(self, remote_project_dir: str, remote_tarball_path: str) -> tuple[str | None, bool]:
+        """Hash of the archive the robot code was extracted from, and whether the new archive is already uploaded."""
+        cmd = (
+            f"cat {remote_project_dir}/robot/{ARCHIVE_MARKER} 2>/dev/null; echo; "
+            f"test -f {remote_tarball_path} && echo present || echo missing"
+        )
+        lines = self.robot.exec(cmd)[0].splitlines()
+        deployed = lines[0].strip() if lines and lines[0].strip() else None
+        return deployed, bool(lines) and lines[-1].strip() == "present"
+
+    def upload(self, tarball_path: Path, archive_sha256: str, remote_tarball_path: str) -> UploadStats:
+        """Upload the code archive, resuming after dropped connections."""
+        df = self.df
+        partial_path = f"{remote_tarball_path}.part"
+        total = tarball_path.stat().st_size
+        self._emit("upload", "start", "Uploading code tarball", completed=0, total=total)
+
+        def on_retry(attempt: int, delay: float, error: Exception):
+            self._emit(
+                "upload",
+                "warning",
+                f"Upload interrupted ({error!r}), reconnecting in {delay:.0f} s (attempt {attempt})",
+            )
+
+        try:
+            ssh, stats = resumable_upload(
+                self.robot.connect,
+                tarball_path,
+                partial_path,
+                ssh=self.robot.ssh,
+                checkpoint_key=f"{df.host}-{df.port}-{Path(remote_tarball_path).name}",
+                python=self.robot.python,
+                sha256=archive_sha256,
+                streams=self.options.upload_streams,
+                progress=lambda completed: self._emit("upload", "progress", completed=completed, total=total),
+                on_retry=on_retry,
+            )
+        except FileNotFoundError as e:
+            msg = f"Remote path not found: {remote_tarball_path}"
+            raise DeployToolError(msg) from e
+        except UploadVerificationError as e:
+            msg = f"Uploaded code archive is corrupted: {e}"
+            raise DeployToolError(msg) from e
+        except (EOFError, OSError, paramiko.SSHException) as e:
+            msg = f"Upload failed, run deploy again to resume it: {e!r}"
+            raise DeployToolError(msg) from e
+        # the link may have dropped during the upload, carry on over the new connection
+        self.robot.ssh = ssh
+
+        # only complete archives ever appear under their final name
+        with self.robot.open_sftp() as sftp:
+            sftp.posix_rename(partial_path, remote_tarball_path)
+        resumed = f", resumed after {format_size(stats.resumed)}" if stats.resumed else ""
+        self._emit(
+            "upload",
+            "done",
+            f"Uploaded {format_size(stats.size)} in {stats.seconds:.2f} s "
+            f"({stats.rate / 1e6:.1f} MB/s over {stats.streams} stream{'s' if stats.streams > 1 else ''}{resumed}), "
+            "SHA-256 verified",
+        )
+        if stats.repaired:
+            self._emit("upload", "warning", f"Re-sent {format_size(stats.repaired)} that arrived damaged")
+        return stats
+
+    def _run_streaming(self, stage: str, cmd: str):
+        """Run a command, passing its output on as it arrives."""
+        stdout, stderr = self.robot.exec_streams(cmd)
+        while not stdout.channel.exit_status_ready():
+            line = stdout.readline()
+            if line:
+                self._emit(stage, "output", line.strip())
+        for line in stdout.read().decode(errors="replace").splitlines():
+            self._emit(stage, "output", line)
+        if stdout.channel.recv_exit_status() != 0:
+            raise RemoteCommandError(cmd, stderr.read().decode())
+
+    def install_wheels(self, remote_code_dir: str, wheel_path: Path, bytecode_mode: str):
+        python = f"~/{self.df.name}/env/bin/python3"
+        verbosity = "-" + "v" * self.options.verbose if self.options.verbose else ""
+
+        # Install custom wheels with pip
+        for wheel in self.options.custom_wheels:
+            wheel_name = Path(wheel).name
+            self._emit("install", "start", f"Installing custom wheel {wheel_name}")
+            remote_wheel = f"{remote_code_dir}/cwheels/{wheel_name}"
+            self._run_streaming(
+                "install",
+                f"{python} -m pip install {remote_wheel} {verbosity} && "
+                f"{python} -m pip install {remote_wheel} {verbosity} --force-reinstall --no-deps",
+            )
+            self._emit("install", "done", f"Installed custom wheel {wheel_name}")
+
+        # Install code via pip
+        # bytecode for the reinstalled package is compiled afterwards in parallel instead of serially by pip
+        no_compile = "--no-compile" if bytecode_mode != "off" else ""
+        remote_wheel = f"{remote_code_dir}/{wheel_path.name}"
+        self._emit("install", "start", "Installing code")
+        self._run_streaming(
+            "install",
+            f"{python} -m pip install {remote_wheel} {verbosity} && "
+            f"{python} -m pip install {remote_wheel} {verbosity} --force-reinstall --no-deps {no_compile}",
+        )
+
+        # the robot sources no longer shadow the installed package
+        self.robot.exec(remove_source_command(self.robot.python, self.robot.package))
+        self._emit("install", "done", "Code installed")
+
+    def compile_remote_bytecode(
+        self, remote_code_dir: str, *, compile_src: bool
+    ) -> tuple[float | None, float | None] | None:
+        """Compile the installed package, and the extracted sources if compile_src, on the robot.
+
+        Returns:
+            tuple[float | None, float | None] | None: Package import seconds without and with bytecode if a startup report was requested
+        """
+        python, package = self.robot.python, self.robot.package
+        report = self.options.startup_report
+
+        before = self.remote_import_time(write_bytecode=False) if report else None
+
+        self._emit("bytecode", "start", "Compiling bytecode on remote")
+        output, error, exit_status = self.robot.exec(remote_package_dir_command(python, package))
+        paths = output.split()
+        if exit_status != 0 or not paths:
+            self._emit("bytecode", "warning", f"Could not locate installed package {package}: {error.strip()}")
+        if compile_src:
+            paths.append(f"{remote_code_dir}/src")
+        if paths:
+            self.robot.run(remote_compile_command(python, paths, self.options.bytecode_optimize))
+        self._emit("bytecode", "done", "Bytecode compiled")
+
+        if not report:
+            return None
+        after = self.remote_import_time(write_bytecode=True)
+        if before is not None and after is not None:
+            self._emit(
+                "bytecode",
+                message=f"Robot package import time: {before:.3f} s without bytecode, {after:.3f} s with bytecode",
+            )
+        return before, after
+
+    def remote_import_time(self, *, write_bytecode: bool) -> float | None:
+        package = self.robot.package
+        cmd = remote_import_time_command(self.robot.python, package, write_bytecode=write_bytecode)
+        try:
+            output = self.robot.run(cmd).strip()
+        except RemoteCommandError as e:
+            self._emit("bytecode", "warning", f"Failed to time import of {package}: {e.stderr}")
+            return None
+        return float(output.splitlines()[-1])
+
+    def collect_garbage(self) -> GCReport | None:
+        self._emit("gc", "start", "Measuring remote disk usage")
+        try:
+            report = collect_garbage(self.robot)
+        except RemoteCommandError as e:
+            self._emit("gc", "warning", f"Failed to enforce the remote disk budget: {e.stderr}")
+            return None
+        if report.evicted:
+            self._emit(
+                "gc",
+                "done",
+                f"Freeing {format_size(report.freed)} on remote in the background ({len(report.evicted)} entries)",
+            )
+        else:
+            self._emit(
+                "gc",
+                "done",
+                f"Remote usage {format_size(report.total)} is within the {format_size(report.budget)} budget",
+            )
+        return report
+
+
+def _threadsafe(callback: EventCallback | None) -> EventCallback | None:
+    """Deliver events from worker threads on the running event loop."""
+    if callback is None:
+        return None
+    loop = asyncio.get_running_loop()
+    return lambda event: loop.call_soon_threadsafe(callback, event)
+
+
+class AsyncDeployer:
+    """`Deployer` for asyncio. on_event is called on the event loop.
+
+    Args:
+        robot (Robot): Robot to deploy to
+        directory (str | os.PathLike): Robot project containing the Deployfile
+        options (DeployOptions | None): Deploy options
+        on_event (EventCallback | None): Called with progress events
+        executor (Executor | None): Runs the blocking work, the loop's default executor by default
+    """
+
+    def __init__(
+        self,
+        robot: Robot,
+        directory: str | os.PathLike,
+        options: DeployOptions | None = None,
+        on_event: EventCallback | None = None,
+        executor: Executor | None = None,
+    ):
+        self.robot = robot
+        self.directory = directory
+        self.options = options
+        self.on_event = on_event
+        self.executor = executor
+
+    async def deploy(self) -> DeployResult:
+        deployer = Deployer(self.robot, self.directory, self.options, _threadsafe(self.on_event))
+        return await asyncio.get_running_loop().run_in_executor(self.executor, deployer.deploy)
+
+    async def plan(self) -> DeployPlan:
+        deployer = Deployer(self.robot, self.directory, self.options)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, deployer.plan)
+
+
+class AsyncServiceManager:
+    """`ServiceManager` for asyncio."""
+
+    def __init__(self, robot: Robot, executor: Executor | None = None):
+        self.sync = ServiceManager(robot)
+        self.executor = executor
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def installed(self) -> bool:
+        return await self._run(self.sync.installed)
+
+    async def status(self) -> ServiceStatus:
+        return await self._run(self.sync.status)
+
+    async def start(self):
+        await self._run(self.sync.start)
+
+    async def stop(self):
+        await self._run(self.sync.stop)
+
+    async def restart(self):
+        await self._run(self.sync.restart)
+
+    async def estop(self):
+        await self._run(self.sync.estop)
+
+    async def wait_ready(
+        self, timeout: float = 30.0, grace: float = 2.0, ready_pattern: str | None = None
+    ) -> ReadyReport:
+        return await self._run(self.sync.wait_ready, timeout, grace, ready_pattern)
+
+
+class AsyncVenvManager:
+    """`VenvManager` for asyncio."""
+
+    def __init__(self, robot: Robot, executor: Executor | None = None):
+        self.sync = VenvManager(robot)
+        self.executor = executor
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def exists(self) -> bool:
+        return await self._run(self.sync.exists)
+
+    async def create(self, python_location: str = "/usr/bin/python3") -> str:
+        return await self._run(self.sync.create, python_location)
+
+    async def delete(self) -> bool:
+        return await self._run(self.sync.delete)
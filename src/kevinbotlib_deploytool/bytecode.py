@@ -0,0 +1,82 @@
+import importlib.util
+import py_compile
+import shlex
+import sys
+from pathlib import Path, PurePosixPath
+
+BYTECODE_MODES = ("auto", "remote", "local", "off")
+
+
+def local_interpreter_matches(python_version: str) -> bool:
+    """Whether bytecode compiled by this interpreter can be loaded by the target's Python."""
+    if sys.implementation.name != "cpython":
+        return False
+    return ".".join(python_version.split(".")[:2]) == f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def resolve_bytecode_mode(mode: str, python_version: str) -> str:
+    if mode != "auto":
+        return mode
+    return "local" if local_interpreter_matches(python_version) else "remote"
+
+
+def compile_tree_locally(
+    source_root: Path, output_root: Path, arc_prefix: str, remote_prefix: str, optimize: int = 0
+) -> list[tuple[Path, str]]:
+    """Compile every module below source_root into output_root.
+
+    Returns:
+        list[tuple[Path, str]]: Compiled file and the archive name it belongs at
+    """
+    modules = [
+        (source, source.relative_to(source_root).as_posix())
+        for source in sorted(source_root.rglob("*.py"))
+        if "__pycache__" not in source.parts
+    ]
+    return compile_modules_locally(modules, output_root, arc_prefix, remote_prefix, optimize)
+
+
+def compile_modules_locally(
+    modules: list[tuple[Path, str]], output_root: Path, arc_prefix: str, remote_prefix: str, optimize: int = 0
+) -> list[tuple[Path, str]]:
+    """Compile modules, given as source file and POSIX path below arc_prefix, into output_root.
+
+    Uses checked-hash pycs so they stay valid no matter what mtimes the files get
+    when the tarball is extracted on the robot.
+
+    Returns:
+        list[tuple[Path, str]]: Compiled file and the archive name it belongs at
+    """
+    compiled = []
+    for source, name in modules:
+        relative = PurePosixPath(name)
+        cache_name = importlib.util.cache_from_source(str(relative), optimization=optimize or "")
+        output = output_root / cache_name
+        output.parent.mkdir(parents=True, exist_ok=True)
+        py_compile.compile(
+            str(source),
+            cfile=str(output),
+            dfile=f"{remote_prefix}/{relative}",
+            doraise=True,
+            optimize=optimize,
+            invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+        )
+        compiled.append((output, f"{arc_prefix}/{cache_name}"))
+    return compiled
+
+
+def remote_package_dir_command(python: str, package: str) -> str:
+    # find_spec locates the installed package without executing its __init__
+    script = f"import importlib.util as u; s = u.find_spec({package!r}); print(*(s.submodule_search_locations or [s.origin]))"
+    return f"{python} -c {shlex.quote(script)}"
+
+
+def remote_compile_command(python: str, paths: list[str], optimize: int = 0) -> str:
+    """Byte-compile the given remote trees with one worker per CPU."""
+    return f"{python} -m compileall -q -j0 -o {optimize} {' '.join(paths)}"
+
+
+def remote_import_time_command(python: str, package: str, *, write_bytecode: bool = True) -> str:
+    """Time `import <package>` on the robot; prints the elapsed seconds."""
+    script = f"import time; t = time.perf_counter(); import {package}; print(time.perf_counter() - t)"
+    return f"{python} {'' if write_bytecode else '-B '}-c {shlex.quote(script)}"
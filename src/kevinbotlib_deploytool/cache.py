@@ -0,0 +1,189 @@
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from platformdirs import user_cache_dir
+
+from kevinbotlib_deploytool.sizes import parse_size
+
+# Per-namespace size budgets; namespaces not listed here use DEFAULT_BUDGET
+NAMESPACE_BUDGETS = {
+    "wheels": parse_size("512M"),
+    "tarballs": parse_size("256M"),
+    "manifests": parse_size("16M"),
+}
+DEFAULT_BUDGET = parse_size("64M")
+
+_SAFE_KEY = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+_TEMP_PREFIX = ".tmp-"
+
+
+class ArtifactCache:
+    """Size-bounded local cache for build artifacts and remote data.
+
+    Entries are plain files under `<root>/<namespace>/`. The modification time of an
+    entry records its last access, and each namespace is trimmed least recently used
+    first when it goes over budget. Inserts go through a temporary file and an atomic
+    rename, so concurrent deploys never see partially written entries.
+    """
+
+    def __init__(self, app_name="KevinbotLibDeployTool", root: str | None = None, budgets: dict | None = None):
+        self.root = root or user_cache_dir(app_name, "meowmeowahr")
+        self.budgets = {**NAMESPACE_BUDGETS, **(budgets or {})}
+        os.makedirs(self.root, exist_ok=True)
+
+    def budget(self, namespace: str) -> int:
+        return self.budgets.get(namespace, DEFAULT_BUDGET)
+
+    def path(self, namespace: str, key: str) -> str:
+        """Location of an entry, whether or not it exists."""
+        if not _SAFE_KEY.match(key):
+            key = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory(namespace), key)
+
+    def directory(self, namespace: str) -> str:
+        """Directory of a namespace.
+
+        Raises:
+            ValueError: The namespace is not a plain directory name, e.g. `..`
+        """
+        if not _SAFE_KEY.match(namespace) or namespace.strip(".") == "":
+            msg = f"Invalid cache namespace: {namespace!r}"
+            raise ValueError(msg)
+        return os.path.join(self.root, namespace)
+
+    def get(self, namespace: str, key: str) -> str | None:
+        """Look up an entry and mark it as recently used.
+
+        Returns:
+            str | None: Path of the cached file, or None on a miss
+        """
+        path = self.path(namespace, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def read_bytes(self, namespace: str, key: str) -> bytes | None:
+        path = self.get(namespace, key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, namespace: str, key: str, data: bytes) -> str:
+        """Store data under key, replacing any previous entry."""
+        with self._atomic_writer(namespace, key) as f:
+            f.write(data)
+        return self._finish_put(namespace, key)
+
+    def put_file(self, namespace: str, key: str, source: str | os.PathLike) -> str:
+        """Copy a file into the cache under key, replacing any previous entry."""
+        with self._atomic_writer(namespace, key) as f, open(source, "rb") as src:
+            shutil.copyfileobj(src, f)
+        return self._finish_put(namespace, key)
+
+    def remove(self, namespace: str, key: str) -> bool:
+        try:
+            os.remove(self.path(namespace, key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def namespaces(self) -> list[str]:
+        return sorted(
+            entry.name
+            for entry in os.scandir(self.root)
+            if entry.is_dir() and not entry.name.startswith(".") and _SAFE_KEY.match(entry.name)
+        )
+
+    def stats(self) -> dict[str, dict]:
+        """Entry count, total size and budget for every namespace."""
+        stats = {}
+        for namespace in self.namespaces():
+            entries = self._entries(namespace)
+            stats[namespace] = {
+                "entries": len(entries),
+                "size": sum(size for _, size, _ in entries),
+                "budget": self.budget(namespace),
+            }
+        return stats
+
+    def prune(self, namespace: str | None = None, budget: int | None = None) -> list[str]:
+        """Evict least recently used entries until each namespace fits its budget.
+
+        Args:
+            namespace (str | None): Only prune this namespace
+            budget (int | None): Override the configured budget (0 clears the namespace)
+
+        Returns:
+            list[str]: Paths that were removed
+        """
+        removed = []
+        for name in [namespace] if namespace else self.namespaces():
+            removed += self._prune_namespace(name, self.budget(name) if budget is None else budget)
+        return removed
+
+    @contextlib.contextmanager
+    def _atomic_writer(self, namespace: str, key: str):
+        directory = self.directory(namespace)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=_TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(temp_path, self.path(namespace, key))
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+    def _finish_put(self, namespace: str, key: str) -> str:
+        path = self.path(namespace, key)
+        self._prune_namespace(namespace, self.budget(namespace), keep=path)
+        return path
+
+    def _prune_namespace(self, namespace: str, limit: int, keep: str | None = None) -> list[str]:
+        removed = []
+        entries = sorted(self._entries(namespace), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+                removed.append(path)
+            total -= size
+        return removed
+
+    def _entries(self, namespace: str) -> list[tuple[str, int, float]]:
+        directory = self.directory(namespace)
+        if not os.path.isdir(directory):
+            return []
+        entries = []
+        stale_before = time.time() - 3600
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.startswith(_TEMP_PREFIX):
+                # leftovers from an interrupted insert
+                if stat.st_mtime < stale_before:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(entry.path)
+                continue
+            entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
@@ -8,6 +8,8 @@ Internal command-line interface for KevinbotLib Deploy Tool
 
 import click
 
+from kevinbotlib_deploytool.cli.cache import cache_group
+from kevinbotlib_deploytool.cli.daemon import daemon_group
 from kevinbotlib_deploytool.cli.deploy_code import deploy_code_command
 from kevinbotlib_deploytool.cli.init import init
 from kevinbotlib_deploytool.cli.robot import robot_group
@@ -28,3 +30,5 @@ cli.add_command(robot_group)
 cli.add_command(venv_group)
 cli.add_command(deploy_code_command)
 cli.add_command(deployfile_test_command)
+cli.add_command(cache_group)
+cli.add_command(daemon_group)
@@ -0,0 +1,61 @@
+import click
+import rich
+import rich.table
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.sizes import format_size, parse_size
+
+
+@click.group("cache")
+def cache_group():
+    """Local artifact cache management"""
+
+
+@click.command("stats")
+def stats_command():
+    """Show local cache usage per namespace"""
+    cache = ArtifactCache("KevinbotLibDeployTool")
+    stats = cache.stats()
+
+    if not stats:
+        click.echo(f"Cache at {cache.root} is empty.")
+        return
+
+    table = rich.table.Table(title=cache.root)
+    table.add_column("Namespace", style="cyan")
+    table.add_column("Entries", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Budget", justify="right")
+    for namespace, info in stats.items():
+        over = info["size"] > info["budget"]
+        size = format_size(info["size"])
+        table.add_row(
+            namespace,
+            str(info["entries"]),
+            f"[red]{size}[/red]" if over else size,
+            format_size(info["budget"]),
+        )
+    rich.print(table)
+
+
+@click.command("prune")
+@click.option("-n", "--namespace", help="Only prune this namespace")
+@click.option("-b", "--budget", help="Prune down to this size instead of the configured budget (e.g., 100M)")
+@click.option("--all", "clear", is_flag=True, help="Remove every entry")
+def prune_command(namespace: str | None, budget: str | None, *, clear: bool):
+    """Evict least recently used cache entries"""
+    cache = ArtifactCache("KevinbotLibDeployTool")
+    try:
+        limit = 0 if clear else parse_size(budget) if budget else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--budget") from e
+
+    try:
+        removed = cache.prune(namespace, limit)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--namespace") from e
+    click.echo(f"Removed {len(removed)} cache entries.")
+
+
+cache_group.add_command(stats_command)
+cache_group.add_command(prune_command)
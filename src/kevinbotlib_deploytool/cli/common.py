@@ -1,11 +1,17 @@
+import re
+
 import click
 import paramiko
 import rich
 import rich.panel
 
 from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.api import RemoteCommandError, Robot, ServiceFailedError, ServiceManager
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.remote_facts import FactCheck
+from kevinbotlib_deploytool.service import ServiceStatus
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
+from kevinbotlib_deploytool.sshlink import resolve_link_settings
 
 
 def confirm_host_key_df(console: rich.console.Console, df: deployfile.DeployTarget, pkey: paramiko.RSAKey):
@@ -62,14 +68,78 @@ def get_private_key(console: rich.console.Console, df):
     return private_key_path, pkey
 
 
+def ssh_link_options(df: deployfile.DeployTarget) -> dict:
+    """Transport settings for `SSHClient.connect`, from the Deployfile and the stored bench-link profile."""
+    return resolve_link_settings(df).connect_kwargs()
+
+
 def check_service_file(df, ssh):
-    # Check for user service file in ~/.config/systemd/user/
-    check_cmd = f"test -f ~/.config/systemd/user/{df.name}.service && echo exists || echo missing"
-    _, stdout, _ = ssh.exec_command(check_cmd)
-    result = stdout.read().decode().strip()
-    if result == "exists":
-        return True
-    return False
+    return ServiceManager(Robot(df, ssh=ssh)).installed()
+
+
+def get_service_status(console: rich.console.Console, df, ssh) -> ServiceStatus:
+    try:
+        return ServiceManager(Robot(df, ssh=ssh)).status()
+    except RemoteCommandError as e:
+        console.print(f"[red]{e}[/red]")
+        raise click.Abort from e
+
+
+def wait_for_service_ready(
+    console: rich.console.Console,
+    df,
+    ssh,
+    timeout: float,
+    grace: float,
+    ready_pattern: str | None = None,
+    poll_interval: float = 0.2,
+):
+    """Wait for a just-started service to come up and report how long it took.
+
+    Returns:
+        ServiceStatus: Last status seen
+    """
+    with rich_spinner(console, f"Waiting for {df.name}.service to become ready"):
+        try:
+            report = ServiceManager(Robot(df, ssh=ssh)).wait_ready(timeout, grace, ready_pattern, poll_interval)
+        except ServiceFailedError as e:
+            console.print(rich.panel.Panel(f"[red]{e}", title="Service Error"))
+            raise click.Abort from e
+        except RemoteCommandError as e:
+            console.print(f"[red]{e}[/red]")
+            raise click.Abort from e
+
+    if report.startup_seconds is not None:
+        console.print(f"[bold magenta]Service started in:[/bold magenta] {report.startup_seconds:.3f} s")
+    if report.activation_seconds is not None:
+        console.print(f"[dim]Systemd activation: {report.activation_seconds:.3f} s[/dim]")
+    if report.ready_after is not None:
+        console.print(f"[bold magenta]Robot ready after:[/bold magenta] {report.ready_after:.3f} s")
+    elif ready_pattern:
+        console.print(f"[yellow]No log line matching {ready_pattern!r} within {timeout:.0f} s[/yellow]")
+    return report.status
+
+
+def print_fact_checks(console: rich.console.Console, checks: list[FactCheck]):
+    """Print validated remote facts, aborting after them if any check failed."""
+    for check in checks:
+        if check.level == "error":
+            console.print(f"[bold red]{check.message}[/bold red]")
+            continue
+        console.print(f"[bold magenta]Remote {check.label}:[/bold magenta] {check.actual}")
+        if check.expected is None:
+            continue
+        if check.level == "ok":
+            console.print(
+                f"[bold green]✔ Remote {check.label} matches Deployfile:[/bold green] {check.actual}=={check.expected}"
+            )
+        else:
+            console.print(
+                f"[bold yellow]Remote {check.label} does not match Deployfile:[/bold yellow] "
+                f"{check.actual}!={check.expected}"
+            )
+    if any(check.level == "error" for check in checks):
+        raise click.Abort
 
 
 def verbosity_option():
@@ -77,3 +147,14 @@ def verbosity_option():
         return click.option("-v", "--verbose", count=True, help="Increase verbosity level (-v, -vv, -vvv)")(f)
 
     return decorator
+
+
+def check_regex(_ctx, _param, value: str | None) -> str | None:
+    """Click callback rejecting options that are not valid regular expressions."""
+    if value is not None:
+        try:
+            re.compile(value)
+        except re.error as e:
+            msg = f"Invalid regular expression: {e}"
+            raise click.BadParameter(msg) from e
+    return value
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+import time
+
+import click
+from rich.console import Console
+
+from kevinbotlib_deploytool.daemon import DAEMON_SUPPORTED, DaemonClient, DeployDaemon, default_socket_path
+
+console = Console()
+
+
+def require_support():
+    if not DAEMON_SUPPORTED:
+        console.print("[red]The deploy daemon needs Unix domain sockets, which this platform does not support[/red]")
+        raise click.Abort
+
+
+@click.group("daemon")
+def daemon_group():
+    """Local deploy daemon that keeps robot connections warm"""
+
+
+@click.command("run")
+def run_command():
+    """Run the daemon in the foreground"""
+    require_support()
+    daemon = DeployDaemon()
+    console.print(f"[bold]Deploy daemon listening on {daemon.socket_path}[/bold]")
+    try:
+        daemon.serve_forever()
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        raise click.Abort from e
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command("start")
+@click.option("-t", "--timeout", default=5.0, show_default=True, help="Seconds to wait for the daemon to come up")
+def start_command(timeout: float):
+    """Start the daemon in the background"""
+    require_support()
+    client = DaemonClient.connect()
+    if client is not None:
+        client.close()
+        console.print(f"[yellow]Deploy daemon is already running at {default_socket_path()}[/yellow]")
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-c", "from kevinbotlib_deploytool.cli import cli; cli(['daemon', 'run'])"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        client = DaemonClient.connect()
+        if client is not None:
+            with client:
+                pid = client.call("ping")["pid"]
+            console.print(f"[bold green]✔ Deploy daemon started (pid {pid})[/bold green]")
+            return
+        time.sleep(0.05)
+    console.print("[red]Deploy daemon did not start in time. Run `kevinbotlib-deploytool daemon run` to see why.[/red]")
+    raise click.Abort
+
+
+@click.command("stop")
+def stop_command():
+    """Stop a running daemon"""
+    client = DaemonClient.connect()
+    if client is None:
+        console.print("[yellow]Deploy daemon is not running[/yellow]")
+        return
+    with client:
+        client.call("shutdown")
+    console.print("[bold green]✔ Deploy daemon stopped[/bold green]")
+
+
+@click.command("status")
+def status_command():
+    """Show whether the daemon is running and what it has connected"""
+    client = DaemonClient.connect()
+    if client is None:
+        console.print("[yellow]Deploy daemon is not running[/yellow]")
+        return
+    with client:
+        info = client.call("ping")
+    console.print(f"[bold]Deploy daemon[/bold] pid {info['pid']}, up {int(info['uptime'])}s")
+    console.print(f"Socket: {default_socket_path()}")
+    if info["connections"]:
+        for host in info["connections"]:
+            console.print(f"  [green]●[/green] {host}")
+    else:
+        console.print("  No open robot connections")
+
+
+daemon_group.add_command(run_command)
+daemon_group.add_command(start_command)
+daemon_group.add_command(stop_command)
+daemon_group.add_command(status_command)
@@ -0,0 +1,92 @@
+import contextlib
+import datetime
+import posixpath
+import shlex
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+from kevinbotlib_deploytool.bytecode import remote_package_dir_command
+from kevinbotlib_deploytool.manifest import read_remote_manifest, write_remote_manifest
+from kevinbotlib_deploytool.remote_gc import ARCHIVE_MARKER
+from kevinbotlib_deploytool.upload import sftp_makedirs
+from kevinbotlib_deploytool.watch import WATCHED_DIRS, ChangeWatcher, remote_destinations
+
+
+def watch_and_push(console: Console, df, ssh, directory: Path):
+    """Push changed project files to the robot and restart the service on every change.
+
+    Files go straight into the extracted code and the installed package, over the
+    existing connection, without building a wheel or running pip. Runs until Ctrl+C.
+    """
+    remote_code_dir = f"/home/{df.user}/{df.name}/robot"
+    package = df.name.replace("-", "_")
+
+    _, stdout, stderr = ssh.exec_command(remote_package_dir_command(f"$HOME/{df.name}/env/bin/python3", package))
+    package_dirs = stdout.read().decode().split()
+    if stdout.channel.recv_exit_status() != 0 or not package_dirs:
+        console.print(
+            f"[yellow]Could not locate installed package {package}, only the extracted code will be updated: "
+            f"{stderr.read().decode().strip()}[/yellow]"
+        )
+    package_dir = package_dirs[0] if package_dirs else None
+
+    sftp = ssh.open_sftp()
+    watcher = ChangeWatcher(directory)
+    known_dirs = set()
+    marked = False
+    console.print(
+        f"[bold]Watching {', '.join(f'{name}/' for name in WATCHED_DIRS)} for changes, press Ctrl+C to stop[/bold]"
+    )
+    try:
+        while True:
+            changed, deleted = watcher.wait()
+            start = time.perf_counter()
+            if not marked:
+                mark_hot_pushed(sftp, df, remote_code_dir)
+                marked = True
+
+            for path in changed:
+                for destination in remote_destinations(path, remote_code_dir, package, package_dir):
+                    parent = posixpath.dirname(destination)
+                    if parent not in known_dirs:
+                        sftp_makedirs(sftp, parent)
+                        known_dirs.add(parent)
+                    try:
+                        sftp.put(str(directory / path), destination, confirm=False)
+                    except FileNotFoundError:
+                        # deleted again before it could be pushed
+                        continue
+
+            removed = [
+                destination
+                for path in deleted
+                for destination in remote_destinations(path, remote_code_dir, package, package_dir)
+            ]
+            cmd = f"systemctl --user restart {df.name}.service"
+            if removed:
+                cmd = f"rm -f {' '.join(shlex.quote(path) for path in removed)} && {cmd}"
+            _, stdout, stderr = ssh.exec_command(cmd)
+            if stdout.channel.recv_exit_status() != 0:
+                console.print(f"[red]Failed to restart robot code: {stderr.read().decode().strip()}[/red]")
+                continue
+
+            console.print(
+                f"[green]✔ Pushed {len(changed)} changed and {len(deleted)} deleted file(s), "
+                f"restarted in {time.perf_counter() - start:.2f} s[/green]"
+            )
+    except KeyboardInterrupt:
+        console.print("Stopped watching")
+    finally:
+        sftp.close()
+
+
+def mark_hot_pushed(sftp, df, remote_code_dir: str):
+    """Make sure the next full deploy does not treat the hot-pushed robot code as up to date."""
+    manifest = read_remote_manifest(sftp, df) or {}
+    manifest["fingerprint"] = None
+    manifest["hot_push"] = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    write_remote_manifest(sftp, df, manifest)
+    with contextlib.suppress(OSError):
+        sftp.remove(f"{remote_code_dir}/{ARCHIVE_MARKER}")
@@ -2,7 +2,12 @@ import click
 
 from kevinbotlib_deploytool.cli.deploy_code import deploy_code_command
 from kevinbotlib_deploytool.cli.robot_delete import delete_robot_command
+from kevinbotlib_deploytool.cli.robot_gc import gc_command
+from kevinbotlib_deploytool.cli.robot_info import info_command
+from kevinbotlib_deploytool.cli.robot_profile import profile_command
+from kevinbotlib_deploytool.cli.robot_profile_imports import profile_imports_command
 from kevinbotlib_deploytool.cli.robot_service import service_group
+from kevinbotlib_deploytool.cli.robot_top import top_command
 
 
 @click.group("robot")
@@ -13,3 +18,8 @@ def robot_group():
 robot_group.add_command(delete_robot_command)
 robot_group.add_command(deploy_code_command)
 robot_group.add_command(service_group)
+robot_group.add_command(top_command)
+robot_group.add_command(gc_command)
+robot_group.add_command(info_command)
+robot_group.add_command(profile_imports_command)
+robot_group.add_command(profile_command)
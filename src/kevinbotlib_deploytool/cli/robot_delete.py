@@ -5,7 +5,7 @@ import paramiko
 from rich.console import Console
 
 from kevinbotlib_deploytool import deployfile
-from kevinbotlib_deploytool.cli.common import confirm_host_key_df
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, ssh_link_options
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
 
@@ -47,7 +47,7 @@ def delete_robot_command(df_directory: str):
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
             check_cmd = f"test -d $HOME/{df.name}/robot && echo exists || echo missing"
             _, stdout, _ = ssh.exec_command(check_cmd)
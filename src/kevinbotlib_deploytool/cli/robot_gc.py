@@ -0,0 +1,96 @@
+import datetime
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console
+from rich.table import Table
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.api import RemoteCommandError, Robot, collect_garbage
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key, ssh_link_options
+from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.sizes import format_size, parse_size
+
+console = Console()
+
+
+@click.command("gc")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option("-b", "--budget", help="Override the Deployfile [gc] budget (e.g., 512M)")
+@click.option("-n", "--dry-run", is_flag=True, help="Only show what would be deleted")
+def gc_command(df_directory: str, budget: str | None, *, dry_run: bool):
+    """Free disk space on the robot by evicting old releases and caches"""
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+
+    try:
+        budget_bytes = parse_size(budget) if budget else df.gc.budget_bytes
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--budget") from e
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    with rich_spinner(console, "Connecting over SSH"):
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
+
+    try:
+        run_remote_gc(console, df, ssh, budget_bytes, dry_run=dry_run, show_table=True)
+    finally:
+        ssh.close()
+
+
+def run_remote_gc(
+    console: Console, df, ssh, budget: int | None = None, *, dry_run: bool = False, show_table: bool = False
+):
+    """Enforce the disk budget on the robot. Deletion runs in the background."""
+    with rich_spinner(console, "Measuring remote disk usage"):
+        try:
+            report = collect_garbage(Robot(df, ssh=ssh), budget, dry_run=dry_run)
+        except RemoteCommandError as e:
+            console.print(f"[yellow]Failed to enforce the remote disk budget: {e.stderr}[/yellow]")
+            return []
+
+    if show_table:
+        evicted_paths = {entry.path for entry in report.evicted}
+        table = Table(title=f"Remote usage: {format_size(report.total)} of {format_size(report.budget)} budget")
+        table.add_column("Path", style="cyan")
+        table.add_column("Kind")
+        table.add_column("Size", justify="right")
+        table.add_column("Last used")
+        table.add_column("Action")
+        for entry in sorted(report.entries, key=lambda e: e.last_used):
+            table.add_row(
+                entry.path,
+                entry.kind,
+                format_size(entry.size),
+                datetime.datetime.fromtimestamp(entry.last_used, tz=datetime.timezone.utc)
+                .astimezone()
+                .strftime("%Y-%m-%d %H:%M"),
+                "[red]evict[/red]" if entry.path in evicted_paths else "[green]keep[/green]",
+            )
+        console.print(table)
+
+    if not report.evicted:
+        console.print(
+            f"[green]✔ Remote usage {format_size(report.total)} is within the {format_size(report.budget)} budget[/green]"
+        )
+    elif dry_run:
+        console.print(
+            f"[yellow]Would free {format_size(report.freed)} by evicting {len(report.evicted)} entries[/yellow]"
+        )
+    else:
+        console.print(
+            f"[bold green]✔ Freeing {format_size(report.freed)} on remote in the background "
+            f"({len(report.evicted)} entries)[/bold green]"
+        )
+    return report.evicted
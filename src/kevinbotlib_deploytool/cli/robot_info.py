@@ -0,0 +1,147 @@
+import datetime
+import json
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.api import Deployer, DeployToolError, Robot, read_deployed_manifest
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key
+from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.manifest import diff_files
+from kevinbotlib_deploytool.sizes import format_size
+
+console = Console()
+
+
+@click.command("info")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile and robot code",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the raw deploy manifest")
+@click.option("--diff", "show_diff", is_flag=True, help="Compare the deployed code with the local project")
+@click.option("--files", "show_files", is_flag=True, help="List every deployed file")
+def info_command(
+    df_directory: str,
+    *,
+    as_json: bool,
+    show_diff: bool,
+    show_files: bool,
+):
+    """Show what is deployed on the robot, from its deploy manifest"""
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    # the host key was confirmed above
+    robot = Robot(df, pkey, host_key_policy=paramiko.AutoAddPolicy())
+    with rich_spinner(console, "Reading deploy manifest over SFTP"), robot:
+        manifest = read_deployed_manifest(robot)
+
+    if manifest is None:
+        console.print(f"[yellow]No deploy manifest on {df.host}, deploy the robot code first.[/yellow]")
+        raise click.Abort
+    if as_json:
+        click.echo(json.dumps(manifest, indent=2))
+        return
+
+    console.print(render_manifest(manifest))
+    if show_files:
+        console.print(render_files(manifest.get("files", {})))
+    if show_diff:
+        try:
+            print_diff(manifest, Deployer(robot, df_directory))
+        except DeployToolError as e:
+            console.print(f"[red]{escape(str(e))}[/red]")
+            raise click.Abort from e
+
+
+def render_manifest(manifest: dict) -> Table:
+    git = manifest.get("git", {})
+    files = manifest.get("files", {})
+    table = Table(title=f"Deployed: {manifest.get('robot', '?')}", show_header=False)
+    table.add_column("Property", style="bold magenta")
+    table.add_column("Value")
+    if "timestamp" in manifest:
+        deployed_at = datetime.datetime.fromtimestamp(manifest["timestamp"], tz=datetime.timezone.utc).astimezone()
+        table.add_row("Deployed at", deployed_at.strftime("%Y-%m-%d %H:%M:%S"))
+    table.add_row("Deploytool", manifest.get("deploytool", "-"))
+    table.add_row("Branch", git.get("branch") or "-")
+    table.add_row("Tag", git.get("tag") or "-")
+    table.add_row("Commit", git.get("commit") or "-")
+    table.add_row("Mode", manifest.get("mode") or "-")
+    table.add_row("Dependencies", (manifest.get("deps") or "-")[:12])
+    table.add_row("Archive", (manifest.get("archive") or "-")[:12])
+    if files:
+        # older manifests only recorded hashes
+        total = sum(entry.get("size", 0) for entry in files.values() if isinstance(entry, dict))
+        table.add_row("Files", f"{len(files)} ({format_size(total)})")
+    for name, sha256 in manifest.get("wheels", {}).items():
+        table.add_row("Wheel", f"{name} [dim]{sha256[:12]}[/dim]")
+    timings = manifest.get("timings", {})
+    if timings:
+        table.add_row("Timings", ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in timings.items()))
+    if manifest.get("hot_push"):
+        hot_push = datetime.datetime.fromtimestamp(manifest["hot_push"], tz=datetime.timezone.utc).astimezone()
+        table.add_row("Hot pushed", f"[yellow]{hot_push.strftime('%Y-%m-%d %H:%M:%S')}[/yellow]")
+    return table
+
+
+def render_files(files: dict) -> Table:
+    table = Table(title="Deployed files")
+    table.add_column("Path", style="cyan")
+    table.add_column("Size", justify="right")
+    table.add_column("Hash")
+    for path, entry in sorted(files.items()):
+        if isinstance(entry, str):
+            table.add_row(path, "-", entry[:12])
+        else:
+            content_hash = entry.get("sha256") or entry.get("oid", "")
+            table.add_row(path, format_size(entry.get("size", 0)), content_hash[:12])
+    return table
+
+
+def print_diff(manifest: dict, deployer: Deployer):
+    deployer.validate()
+    # build with the options the robot was deployed with, so only code changes show up
+    local = deployer.build_manifest_like(manifest)
+    if "build" not in manifest:
+        console.print("[dim]The deployed code predates recorded build options, comparing with the defaults[/dim]")
+    if manifest.get("fingerprint") == local["fingerprint"]:
+        console.print("[bold green]✔ The robot runs exactly the local build[/bold green]")
+        return
+
+    # the fingerprint also covers deploy options, so compare what the robot actually runs
+    commit = manifest.get("git", {}).get("commit")
+    if commit != local["git"]["commit"]:
+        console.print(f"Commit: {commit or '-'} on the robot, {local['git']['commit']} locally")
+    deps_same = manifest.get("deps") == local["deps"]
+    if deps_same:
+        console.print("Dependencies: [green]unchanged[/green]")
+    else:
+        console.print("Dependencies: [yellow]changed[/yellow] (the next deploy installs a wheel)")
+
+    if "files" not in manifest:
+        console.print("[yellow]The deployed code predates file tracking, redeploy to compare files[/yellow]")
+        return
+    added, changed, removed = diff_files(manifest["files"], local["files"])
+    if not (added or changed or removed):
+        console.print("Files: [green]identical[/green]")
+        if commit == local["git"]["commit"] and deps_same:
+            console.print(
+                "[dim]Same code and dependencies, deployed by another deploytool version "
+                "or with other uncommitted files outside the package[/dim]"
+            )
+    for mark, style, paths in (("+", "green", added), ("~", "yellow", changed), ("-", "red", removed)):
+        for path in paths:
+            console.print(f"  [{style}]{mark} {escape(path)}[/{style}]")
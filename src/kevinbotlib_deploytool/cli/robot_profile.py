@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.api import DeployToolError, Robot, ServiceProfiler
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key
+from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.profiling import ProfileReport, collapsed_stacks, hot_functions
+
+console = Console()
+
+
+@click.command("profile")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option("-t", "--duration", default=10.0, show_default=True, help="Seconds to profile the running code for")
+@click.option("-i", "--interval", default=10.0, show_default=True, help="Milliseconds between stack samples")
+@click.option(
+    "--cprofile", is_flag=True, help="Also trace every call of the main thread with cProfile (exact, but slower)"
+)
+@click.option("-n", "--top", "count", default=25, show_default=True, help="Number of functions to show")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Collapsed stacks file for flame graphs  [default: profile-<robot>.collapsed]",
+)
+@click.option("--timeout", default=30.0, show_default=True, help="Extra seconds to wait for the code to start")
+def profile_command(
+    df_directory: str,
+    duration: float,
+    interval: float,
+    count: int,
+    output: str | None,
+    timeout: float,
+    *,
+    cprofile: bool,
+):
+    """Profile the running robot code on the robot
+
+    The service is restarted under a profiler for the given duration, then restarted
+    normally once the profile has been pulled back.
+    """
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    # the host key was confirmed above
+    with Robot(df, pkey, host_key_policy=paramiko.AutoAddPolicy()) as robot:
+        profiler = ServiceProfiler(robot)
+        try:
+            try:
+                with rich_spinner(console, "Restarting the service under the profiler"):
+                    profiler.start(duration, interval / 1000, cprofile=cprofile)
+                with rich_spinner(console, f"Profiling for {duration:g} s"):
+                    report = profiler.wait(timeout)
+            finally:
+                # also after a failed restart, which leaves the drop-in with Restart=no in place
+                with rich_spinner(console, "Restoring the service"):
+                    profiler.restore()
+        except DeployToolError as e:
+            console.print(f"[red]{escape(str(e))}[/red]")
+            raise click.Abort from e
+
+    if report.exited:
+        console.print("[yellow]The robot code exited before the profile duration was over[/yellow]")
+    console.print(render_hot_functions(report, count))
+    console.print(
+        f"{report.samples} samples over {report.duration:.1f} s every {report.interval * 1000:g} ms "
+        f"(Python {report.python} on the robot)"
+    )
+
+    output_path = Path(output or f"profile-{df.name}.collapsed")
+    output_path.write_text(collapsed_stacks(report))
+    console.print(
+        f"[bold green]✔ Flame graph stacks written to {output_path}[/bold green] "
+        "(open with speedscope or flamegraph.pl)"
+    )
+
+
+def render_hot_functions(report: ProfileReport, count: int) -> Table:
+    traced = report.mode == "cprofile"
+    table = Table(title=f"Hot functions ({'cProfile, main thread' if traced else 'sampled, all threads'})")
+    table.add_column("Function", style="cyan")
+    if traced:
+        table.add_column("Calls", justify="right")
+    table.add_column("Self", justify="right")
+    table.add_column("Total", justify="right")
+    for function in hot_functions(report, count):
+        row = [escape(function.name)]
+        if traced:
+            row.append(str(function.calls))
+        row += [f"{function.self_seconds:.3f} s", f"{function.total_seconds:.3f} s"]
+        table.add_row(*row)
+    return table
@@ -0,0 +1,164 @@
+import json
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+from rich.tree import Tree
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.api import RemoteCommandError, Robot, profile_imports
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key
+from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.importprof import (
+    ImportNode,
+    ImportProfile,
+    ImportProfileStore,
+    ImportRegression,
+    compare_profiles,
+    top_imports,
+)
+
+console = Console()
+
+# Lines of a failed import shown to the user
+ERROR_TAIL = 15
+
+
+def format_us(microseconds: int) -> str:
+    return f"{microseconds / 1000:.1f} ms"
+
+
+@click.command("profile-imports")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option("-p", "--package", help="Module to import  [default: the robot package]")
+@click.option("-n", "--top", "count", default=20, show_default=True, help="Number of modules to show")
+@click.option(
+    "--sort",
+    type=click.Choice(["cumulative", "self"]),
+    default="cumulative",
+    show_default=True,
+    help="Rank modules by time including or excluding their own imports",
+)
+@click.option("-r", "--runs", default=3, show_default=True, help="Imports to run, the fastest is kept")
+@click.option("--tree", "show_tree", is_flag=True, help="Show the import tree instead of a table")
+@click.option("--compare/--no-compare", default=True, help="Flag regressions against the previous deploy's profile")
+@click.option(
+    "--threshold", default=20.0, show_default=True, help="Percent a module has to slow down to count as a regression"
+)
+@click.option("--min-ms", default=5.0, show_default=True, help="Smallest slowdown in ms that counts as a regression")
+@click.option("--json", "as_json", is_flag=True, help="Print the profile as JSON")
+@click.option("--no-save", is_flag=True, help="Do not keep this profile for later comparisons")
+def profile_imports_command(
+    df_directory: str,
+    package: str | None,
+    count: int,
+    sort: str,
+    runs: int,
+    threshold: float,
+    min_ms: float,
+    *,
+    show_tree: bool,
+    compare: bool,
+    as_json: bool,
+    no_save: bool,
+):
+    """Profile the import time of the robot code in the deployed environment"""
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    # the host key was confirmed above
+    robot = Robot(df, pkey, host_key_policy=paramiko.AutoAddPolicy())
+    package = package or robot.package
+    try:
+        with rich_spinner(console, f"Importing {package} on the robot ({runs} runs)"), robot:
+            profile = profile_imports(robot, package, runs)
+    except RemoteCommandError as e:
+        console.print(f"[red]{escape(str(e))}[/red]")
+        tail = e.stderr.splitlines()[-ERROR_TAIL:]
+        if tail:
+            console.print(escape("\n".join(tail)), style="dim")
+        raise click.Abort from e
+
+    store = ImportProfileStore()
+    previous = store.previous(df.host, df.port, package, profile.fingerprint) if compare else None
+    if not no_save:
+        store.record(df.host, df.port, profile)
+
+    if as_json:
+        click.echo(json.dumps(profile.model_dump(), indent=2))
+        return
+
+    if show_tree:
+        console.print(render_tree(profile.roots, count))
+    else:
+        console.print(render_table(profile, count, previous, by_self=sort == "self"))
+    console.print(f"[bold]Total import time:[/bold] {format_us(profile.total_us)} for {len(profile.modules)} modules")
+
+    if previous is not None:
+        regressions = compare_profiles(
+            previous.modules, profile.modules, threshold=threshold / 100, min_delta_us=int(min_ms * 1000)
+        )
+        print_regressions(previous, regressions)
+
+
+def render_table(profile: ImportProfile, count: int, previous: ImportProfile | None, *, by_self: bool) -> Table:
+    table = Table(title=f"Slowest imports of {profile.package}")
+    table.add_column("Module", style="cyan")
+    table.add_column("Self", justify="right")
+    table.add_column("Cumulative", justify="right")
+    if previous is not None:
+        table.add_column("Δ", justify="right")
+    for name in top_imports(profile.modules, count, by_self=by_self):
+        self_us, cumulative_us = profile.modules[name]
+        row = [escape(name), format_us(self_us), format_us(cumulative_us)]
+        if previous is not None:
+            if name in previous.modules:
+                delta = cumulative_us - previous.modules[name][1]
+                style = "red" if delta > 0 else "green"
+                row.append(f"[{style}]{delta / 1000:+.1f} ms[/{style}]")
+            else:
+                row.append("[yellow]new[/yellow]")
+        table.add_row(*row)
+    return table
+
+
+def render_tree(roots: list[ImportNode], count: int) -> Tree:
+    """Import tree, showing only the count slowest children at each level."""
+    tree = Tree("[bold]Imports[/bold]")
+
+    def add(parent: Tree, nodes: list[ImportNode]):
+        for node in sorted(nodes, key=lambda node: node.cumulative_us, reverse=True)[:count]:
+            branch = parent.add(
+                f"[cyan]{escape(node.name)}[/cyan] {format_us(node.cumulative_us)} "
+                f"[dim](self {format_us(node.self_us)})[/dim]"
+            )
+            add(branch, node.children)
+
+    add(tree, roots)
+    return tree
+
+
+def print_regressions(previous: ImportProfile, regressions: list[ImportRegression]):
+    against = (previous.commit or previous.fingerprint or "previous profile")[:12]
+    if not regressions:
+        console.print(f"[bold green]✔ No import regressions since {against}[/bold green]")
+        return
+    console.print(f"[bold red]Import regressions since {against}:[/bold red]")
+    for regression in regressions:
+        before = format_us(regression.before_us) if regression.before_us else "new"
+        console.print(
+            f"  [red]▲[/red] {escape(regression.name)}: {before} → {format_us(regression.after_us)} "
+            f"([red]+{format_us(regression.delta_us)}[/red])"
+        )
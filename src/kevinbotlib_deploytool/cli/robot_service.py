@@ -1,14 +1,24 @@
+import time
 from pathlib import Path
 
 import click
-import jinja2
 import paramiko
 from rich.console import Console
+from rich.live import Live
+from rich.table import Table
 
 from kevinbotlib_deploytool import deployfile
-from kevinbotlib_deploytool.cli.common import check_service_file, confirm_host_key_df, get_private_key
+from kevinbotlib_deploytool.cli.common import (
+    check_service_file,
+    confirm_host_key_df,
+    get_private_key,
+    get_service_status,
+    ssh_link_options,
+)
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
-from kevinbotlib_deploytool.service import ROBOT_SYSTEMD_USER_SERVICE_TEMPLATE
+from kevinbotlib_deploytool.daemon import DaemonClient, DaemonError
+from kevinbotlib_deploytool.remote_facts import RemoteFactsCache
+from kevinbotlib_deploytool.service import ServiceStatus, render_service_file
 
 console = Console()
 
@@ -37,10 +47,10 @@ def install_service(df_directory):
     with rich_spinner(console, "Installing service over SSH") as spinner:
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
         # Check if systemd is available
-        check_systemd_ver(ssh)
+        check_systemd_ver(ssh, df)
 
         if check_service_file(df, ssh):
             console.print(
@@ -50,11 +60,7 @@ def install_service(df_directory):
         # Create the service file
         # Use Jinja2 to render the service file
         spinner.status = "Creating service file"
-        template = jinja2.Template(ROBOT_SYSTEMD_USER_SERVICE_TEMPLATE)
-        service_file_content = template.render(
-            working_directory=f"/home/{df.user}/{df.name}/robot",
-            exec=f"/home/{df.user}/{df.name}/env/bin/python3 /home/{df.user}/{df.name}/robot/src/{df.name.replace('-', '_')}/__main__.py",
-        )
+        service_file_content = render_service_file(df)
         service_file_path = f"/home/{df.user}/.config/systemd/user/{df.name}.service"
         # Write the service file to the remote system
         spinner.status = "Writing service file over SFTP"
@@ -102,9 +108,9 @@ def uninstall_service(df_directory: str):
     with rich_spinner(console, "Uninstalling service over SSH"):
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-        check_systemd_ver(ssh)
+        check_systemd_ver(ssh, df)
         if check_service_file(df, ssh):
             console.print(
                 f"[yellow]User service file exists at ~/.config/systemd/user/{df.name}.service. Uninstalling...",
@@ -142,45 +148,134 @@ def uninstall_service(df_directory: str):
     help="Directory of the Deployfile",
     type=click.Path(file_okay=False, dir_okay=True, writable=True),
 )
-def status_service(df_directory: str):
+@click.option("--json", "as_json", is_flag=True, help="Print the status as JSON (one object per poll with --watch)")
+@click.option("-w", "--watch", is_flag=True, help="Keep polling the status over the same connection")
+@click.option(
+    "-i",
+    "--interval",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0.1),
+    help="Polling interval in seconds for --watch",
+)
+@click.option("--no-daemon", is_flag=True, help="Connect directly even if the deploy daemon is running")
+def status_service(df_directory: str, interval: float, *, as_json: bool, watch: bool, no_daemon: bool):
     """Check the status of the robot systemd service"""
     df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
 
-    _, pkey = get_private_key(console, df)
+    status = None if watch or no_daemon else status_from_daemon(df, df_directory)
+    if status is None:
+        _, pkey = get_private_key(console, df)
 
-    confirm_host_key_df(console, df, pkey)
+        confirm_host_key_df(console, df, pkey)
 
-    with rich_spinner(console, "Checking service status over SSH"):
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        with rich_spinner(console, "Connecting over SSH"):
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
+            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-        check_systemd_ver(ssh)
-        if check_service_file(df, ssh):
-            console.print(
-                f"[yellow]User service file exists at ~/.config/systemd/user/{df.name}.service. Checking status...",
-            )
-        else:
-            console.print(
-                f"[yellow]User service file does not exist at ~/.config/systemd/user/{df.name}.service. Nothing to check.[/yellow]"
-            )
-            return
-
-        console.print("[bold magenta]Checking service status...[/bold magenta]")
-        _, stdout, _ = ssh.exec_command(f"systemctl --user status {df.name}.service")
-        result = stdout.read().decode().strip()
-        if "running" in result:
-            console.print("[bold green]✔ Service is running[/bold green]")
-        elif "inactive" in result:
-            console.print("[bold yellow]⚠️ Service is inactive[/bold yellow]")
-        elif "failed" in result:
-            console.print("[bold red]❌ Service has failed[/bold red]")
-        elif "exited" in result:
-            console.print("[bold yellow]⚠️ Service has exited[/bold yellow]")
-        else:
-            console.print("[bold red]❌ Service status unknown[/bold red]")
-        console.print(result, highlight=False)
-        ssh.close()
+        try:
+            if watch:
+                watch_status(df, ssh, interval, as_json=as_json)
+                return
+            status = get_service_status(console, df, ssh)
+        finally:
+            ssh.close()
+
+    if as_json:
+        click.echo(status.model_dump_json())
+        return
+    if not status.installed:
+        console.print(
+            f"[yellow]User service file does not exist at ~/.config/systemd/user/{df.name}.service. Nothing to check.[/yellow]"
+        )
+        return
+    print_status_summary(status)
+    console.print(render_status_table(df, status))
+
+
+def status_from_daemon(df, df_directory: str) -> ServiceStatus | None:
+    """Ask a running deploy daemon for the service status over its warm connection.
+
+    Returns:
+        ServiceStatus | None: Status, or None if no daemon is running or it could not answer
+    """
+    client = DaemonClient.connect()
+    if client is None:
+        return None
+    directory = str(Path(df_directory).resolve())
+    with client:
+        try:
+            if not client.call("connected", directory=directory):
+                # the daemon never prompts, so the host key is confirmed here before its first connection
+                _, pkey = get_private_key(console, df)
+                confirm_host_key_df(console, df, pkey)
+            return ServiceStatus.model_validate(client.call("service.status", directory=directory))
+        except (DaemonError, ConnectionError, OSError) as e:
+            console.print(f"[yellow]Deploy daemon could not answer ({e}), connecting directly[/yellow]")
+            return None
+
+
+def watch_status(df, ssh: paramiko.SSHClient, interval: float, *, as_json: bool):
+    try:
+        if as_json:
+            while True:
+                click.echo(get_service_status(console, df, ssh).model_dump_json())
+                time.sleep(interval)
+
+        previous = None
+        previous_time = 0.0
+        with Live(console=console, auto_refresh=False) as live:
+            while True:
+                status = get_service_status(console, df, ssh)
+                now = time.monotonic()
+                cpu_percent = None
+                if (
+                    previous is not None
+                    and status.main_pid == previous.main_pid
+                    and status.cpu_usage_nsec is not None
+                    and previous.cpu_usage_nsec is not None
+                ):
+                    cpu_percent = (status.cpu_usage_nsec - previous.cpu_usage_nsec) / ((now - previous_time) * 1e7)
+                live.update(render_status_table(df, status, cpu_percent), refresh=True)
+                previous, previous_time = status, now
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def print_status_summary(status: ServiceStatus):
+    if status.active_state == "active" and status.sub_state == "running":
+        console.print("[bold green]✔ Service is running[/bold green]")
+    elif status.active_state == "failed":
+        console.print("[bold red]❌ Service has failed[/bold red]")
+    elif status.sub_state == "exited":
+        console.print("[bold yellow]⚠️ Service has exited[/bold yellow]")
+    elif status.active_state == "inactive":
+        console.print("[bold yellow]⚠️ Service is inactive[/bold yellow]")
+    else:
+        console.print(f"[bold yellow]⚠️ Service is {status.active_state} ({status.sub_state})[/bold yellow]")
+
+
+def render_status_table(df, status: ServiceStatus, cpu_percent: float | None = None) -> Table:
+    state_color = {"active": "green", "failed": "red", "activating": "yellow", "deactivating": "yellow"}.get(
+        status.active_state, "yellow"
+    )
+
+    table = Table(title=f"{df.name}.service", show_header=False)
+    table.add_column("Property", style="bold magenta")
+    table.add_column("Value")
+    table.add_row("State", f"[{state_color}]{status.active_state}[/{state_color}] ({status.sub_state})")
+    table.add_row("Main PID", str(status.main_pid) if status.main_pid else "-")
+    table.add_row("Started", status.exec_main_start_timestamp or "-")
+    table.add_row("Restarts", str(status.n_restarts))
+    table.add_row(
+        "Memory", f"{status.memory_current / (1024 * 1024):.1f} MiB" if status.memory_current is not None else "-"
+    )
+    table.add_row("CPU time", f"{status.cpu_usage_nsec / 1e9:.2f} s" if status.cpu_usage_nsec is not None else "-")
+    if cpu_percent is not None:
+        table.add_row("CPU", f"{cpu_percent:.1f} %")
+    return table
 
 
 @click.command("stop")
@@ -202,9 +297,9 @@ def stop_service(df_directory: str):
     with rich_spinner(console, "Stopping service over SSH"):
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-        check_systemd_ver(ssh)
+        check_systemd_ver(ssh, df)
         if check_service_file(df, ssh):
             console.print(
                 f"[yellow]User service file exists at ~/.config/systemd/user/{df.name}.service. Stopping service...",
@@ -240,9 +335,9 @@ def estop_service(df_directory: str):
     with rich_spinner(console, "Stopping service over SSH"):
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-        check_systemd_ver(ssh)
+        check_systemd_ver(ssh, df)
         if check_service_file(df, ssh):
             console.print(
                 f"[yellow]User service file exists at ~/.config/systemd/user/{df.name}.service. Stopping service...",
@@ -278,9 +373,9 @@ def start_service(df_directory: str):
     with rich_spinner(console, "Stopping service over SSH"):
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-        check_systemd_ver(ssh)
+        check_systemd_ver(ssh, df)
         if check_service_file(df, ssh):
             console.print(
                 f"[yellow]User service file exists at ~/.config/systemd/user/{df.name}.service. Stopping service...",
@@ -305,9 +400,14 @@ service_group.add_command(estop_service)
 service_group.add_command(start_service)
 
 
-def check_systemd_ver(ssh: paramiko.SSHClient):
-    stdin, stdout, stderr = ssh.exec_command("systemctl --version")
-    systemd_version = stdout.read().decode("utf-8").strip().splitlines()[0].split(" ")[-2]
+def probe_systemd_version(ssh: paramiko.SSHClient) -> str | None:
+    _, stdout, _ = ssh.exec_command("systemctl --version")
+    lines = stdout.read().decode("utf-8").strip().splitlines()
+    return lines[0].split(" ")[-2] if lines else None
+
+
+def check_systemd_ver(ssh: paramiko.SSHClient, df: deployfile.DeployTarget):
+    systemd_version = RemoteFactsCache().fact(ssh, df, "systemd_version", lambda: probe_systemd_version(ssh))
     if not systemd_version:
         console.print("[red]Systemd is not available on the remote system.[/red]")
         raise click.Abort
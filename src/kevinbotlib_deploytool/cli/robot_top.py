@@ -0,0 +1,155 @@
+import shlex
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console, Group
+from rich.live import Live
+from rich.table import Table
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key, get_service_status, ssh_link_options
+from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.monitor import (
+    REMOTE_SAMPLER_SCRIPT,
+    History,
+    ProcessSample,
+    SampleRates,
+    SamplerMeta,
+    compute_rates,
+    decode_throttled,
+    parse_sampler_line,
+)
+
+console = Console()
+
+
+@click.command("top")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option(
+    "-i",
+    "--interval",
+    default=0.5,
+    show_default=True,
+    type=click.FloatRange(min=0.05),
+    help="Sampling interval in seconds",
+)
+@click.option(
+    "--history", default=60, show_default=True, type=click.IntRange(min=2), help="Samples kept for sparklines"
+)
+@click.option("--threads", "max_threads", default=8, show_default=True, help="Number of busiest threads to show")
+@click.option("--pid", type=int, help="Sample this PID instead of the service's MainPID")
+@click.option(
+    "-r",
+    "--record",
+    type=click.Path(file_okay=True, dir_okay=False, writable=True),
+    help="Append raw samples to this file as JSON lines",
+)
+def top_command(
+    df_directory: str, interval: float, history: int, max_threads: int, pid: int | None, record: str | None
+):
+    """Live resource monitor for the robot service process"""
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    with rich_spinner(console, "Connecting over SSH"):
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
+        ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
+
+    try:
+        if pid is None:
+            status = get_service_status(console, df, ssh)
+            if not status.main_pid:
+                console.print(f"[yellow]{df.name}.service is not running ({status.active_state}).[/yellow]")
+                return
+            pid = status.main_pid
+
+        cmd = f"$HOME/{df.name}/env/bin/python3 -u -c {shlex.quote(REMOTE_SAMPLER_SCRIPT)} {pid} {interval}"
+        _, stdout, _ = ssh.exec_command(cmd)
+        run_monitor(df, stdout, history, max_threads, Path(record) if record else None)
+    finally:
+        ssh.close()
+
+
+def run_monitor(df, stream, history_length: int, max_threads: int, record_path: Path | None):
+    meta = None
+    previous = None
+    history = History(history_length)
+    record_file = record_path.open("a") if record_path else None
+    try:
+        with Live(console=console, auto_refresh=False) as live:
+            for line in stream:
+                if record_file:
+                    record_file.write(line if line.endswith("\n") else line + "\n")
+                sample = parse_sampler_line(line)
+                if sample is None:
+                    console.print(f"[yellow]Process {meta.pid if meta else ''} exited.[/yellow]")
+                    return
+                if isinstance(sample, SamplerMeta):
+                    meta = sample
+                    continue
+                if previous is not None:
+                    rates = compute_rates(meta, previous, sample)
+                    history.add("cpu", rates.cpu_percent)
+                    history.add("rss", rates.rss_kib)
+                    history.add("ctx", rates.ctx_switches_per_sec)
+                    history.add("temp", sample.temp)
+                    live.update(render_top(df, meta, sample, rates, history, max_threads), refresh=True)
+                previous = sample
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if record_file:
+            record_file.close()
+
+
+def render_top(
+    df, meta: SamplerMeta, sample: ProcessSample, rates: SampleRates, history: History, max_threads: int
+) -> Group:
+    process = Table(title=f"{df.name} (pid {meta.pid})", show_header=False)
+    process.add_column("Metric", style="bold magenta")
+    process.add_column("Value", justify="right")
+    process.add_column("History", style="cyan")
+    process.add_row("CPU", f"{rates.cpu_percent:.1f} %", history.spark("cpu"))
+    process.add_row("RSS", f"{rates.rss_kib / 1024:.1f} MiB", history.spark("rss"))
+    process.add_row("Threads", str(rates.threads), "")
+    process.add_row("Ctx switches", f"{rates.ctx_switches_per_sec:.0f} /s", history.spark("ctx"))
+    if rates.read_bytes_per_sec is not None and rates.write_bytes_per_sec is not None:
+        process.add_row(
+            "Disk I/O",
+            f"r {rates.read_bytes_per_sec / 1024:.0f} / w {rates.write_bytes_per_sec / 1024:.0f} KiB/s",
+            "",
+        )
+
+    system = Table(title="System", show_header=False)
+    system.add_column("Metric", style="bold magenta")
+    system.add_column("Value", justify="right")
+    system.add_column("History", style="cyan")
+    system.add_row("Load", " ".join(f"{load:.2f}" for load in sample.load) + f" ({meta.ncpu} CPUs)", "")
+    if sample.temp is not None:
+        system.add_row("Temperature", f"{sample.temp:.1f} °C", history.spark("temp"))
+    if sample.freq is not None:
+        system.add_row("CPU frequency", f"{sample.freq} MHz", "")
+    if sample.throttled is not None:
+        flags = decode_throttled(sample.throttled)
+        system.add_row("Throttling", f"[red]{', '.join(flags)}[/red]" if flags else "[green]none[/green]", "")
+
+    threads = Table(title="Threads")
+    threads.add_column("TID", justify="right")
+    threads.add_column("Name")
+    threads.add_column("CPU", justify="right")
+    busiest = sorted(rates.thread_cpu_percent.items(), key=lambda item: item[1][1], reverse=True)
+    for tid, (name, cpu) in busiest[:max_threads]:
+        threads.add_row(tid, name, f"{cpu:.1f} %")
+
+    return Group(process, system, threads)
@@ -5,6 +5,7 @@ import rich.tree
 
 from kevinbotlib_deploytool.cli.init import attempt_read_project_name
 from kevinbotlib_deploytool.cli.ssh_apply_key import apply_key_command
+from kevinbotlib_deploytool.cli.ssh_bench_link import bench_link_command
 from kevinbotlib_deploytool.cli.test import ssh_test_command
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
 
@@ -84,3 +85,4 @@ ssh_group.add_command(remove)
 ssh_group.add_command(list_keys)
 ssh_group.add_command(apply_key_command)
 ssh_group.add_command(ssh_test_command)
+ssh_group.add_command(bench_link_command)
@@ -0,0 +1,78 @@
+import os
+import time
+from pathlib import Path
+
+import click
+import paramiko
+from rich.console import Console
+from rich.table import Table
+
+from kevinbotlib_deploytool import deployfile
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, get_private_key
+from kevinbotlib_deploytool.sizes import format_size, parse_size
+from kevinbotlib_deploytool.sshlink import LinkProfile, LinkProfileStore, LinkSettings, benchmark_link
+
+console = Console()
+
+
+@click.command("bench-link")
+@click.option(
+    "-d",
+    "--df-directory",
+    default=".",
+    help="Directory of the Deployfile",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option("-s", "--size", default="8M", show_default=True, help="Data uploaded for each trial")
+@click.option("--reset", is_flag=True, help="Forget the stored link profile for this robot")
+def bench_link_command(df_directory: str, size: str, *, reset: bool):
+    """Find the fastest SSH ciphers, MACs, compression and window sizes for the robot"""
+    df = deployfile.read_deployfile(Path(df_directory) / "Deployfile.toml")
+    store = LinkProfileStore()
+
+    if reset:
+        if store.remove(df.host, df.port):
+            console.print(f"[green]Removed link profile for {df.host}:{df.port}[/green]")
+        else:
+            console.print(f"[yellow]No link profile stored for {df.host}:{df.port}[/yellow]")
+        return
+
+    try:
+        size_bytes = parse_size(size)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--size") from e
+
+    _, pkey = get_private_key(console, df)
+
+    confirm_host_key_df(console, df, pkey)
+
+    # random data does not compress, just like the gzipped code archives
+    payload = os.urandom(size_bytes)
+
+    def connect(settings: LinkSettings) -> paramiko.SSHClient:
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
+        ssh.connect(
+            hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **settings.connect_kwargs()
+        )
+        return ssh
+
+    table = Table(title=f"Upload throughput to {df.host} ({format_size(size_bytes)} per trial)")
+    table.add_column("Settings", style="cyan")
+    table.add_column("Throughput", justify="right")
+
+    def on_result(settings: LinkSettings, rate: float | None):
+        table.add_row(settings.describe(), f"{format_size(int(rate))}/s" if rate else "[dim]unsupported[/dim]")
+
+    with console.status("[bold green]Benchmarking SSH link...[/bold green]"):
+        best, rate = benchmark_link(connect, payload, on_result)
+
+    console.print(table)
+    if rate is None:
+        console.print("[red]No link settings could be measured[/red]")
+        raise click.Abort
+
+    store.set(df.host, df.port, LinkProfile(settings=best, throughput=rate, measured_at=time.time()))
+    console.print(f"[bold green]✔ Using {best.describe()} ({format_size(int(rate))}/s) for {df.host}[/bold green]")
+    if df.ssh.model_dump(exclude_defaults=True):
+        console.print("[yellow]The Deployfile \\[ssh] section still overrides the stored profile[/yellow]")
@@ -5,8 +5,16 @@ import paramiko
 from rich.console import Console
 
 from kevinbotlib_deploytool import deployfile
-from kevinbotlib_deploytool.cli.common import confirm_host_key, confirm_host_key_df
+from kevinbotlib_deploytool.cli.common import (
+    confirm_host_key,
+    confirm_host_key_df,
+    get_private_key,
+    print_fact_checks,
+    ssh_link_options,
+)
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.daemon import DaemonClient, DaemonError
+from kevinbotlib_deploytool.remote_facts import ProbeResult, RemoteFactsCache, validate_target
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
 
 console = Console()
@@ -60,12 +68,24 @@ def ssh_test_command(host, port, user, key_name):
     help="Directory of the Deployfile",
     type=click.Path(file_okay=False, dir_okay=True, writable=True),
 )
-def deployfile_test_command(directory: str):
+@click.option("--refresh", is_flag=True, help="Probe the robot again instead of using cached facts")
+@click.option("--no-daemon", is_flag=True, help="Connect directly even if the deploy daemon is running")
+def deployfile_test_command(directory: str, *, refresh: bool, no_daemon: bool):
     """Test the SSH connection"""
 
     # Load Deployfile
     df = deployfile.read_deployfile(Path(directory) / "Deployfile.toml")
 
+    result = None if no_daemon else facts_from_daemon(df, directory, refresh=refresh)
+    if result is None:
+        result = probe_directly(df, refresh=refresh)
+
+    if result.cached:
+        console.print("[dim]Using cached remote facts, pass --refresh to probe the robot again[/dim]")
+    print_fact_checks(console, validate_target(df, result.facts))
+
+
+def probe_directly(df: deployfile.DeployTarget, *, refresh: bool) -> ProbeResult:
     key_manager = SSHKeyManager("KevinbotLibDeployTool")
     key_info = key_manager.list_keys()
     if df.name not in key_info:
@@ -89,73 +109,35 @@ def deployfile_test_command(directory: str):
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
-
-            # cpu arch
-            check_cpu_arch(df, ssh)
-
-            # glibc version
-            check_glibc_ver(df, ssh)
-
-            # python
-            # check if the venv exists
-            check_env(df, ssh)
+            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-            # check if the python version matches
-            check_py_ver(df, ssh)
+            result = RemoteFactsCache().probe(ssh, df, refresh=refresh)
 
             ssh.close()
         except Exception as e:
-            if isinstance(e, click.Abort):
-                raise click.Abort from e
             console.print(f"[red]SSH connection failed: {e!r}[/red]")
             raise click.Abort from e
+    return result
 
 
-def check_py_ver(df, ssh):
-    _, stdout, _ = ssh.exec_command(f"$HOME/{df.name}/env/bin/python --version")
-    python_version = stdout.read().decode().strip().split(" ")[-1]
-    console.print(f"[bold magenta]Remote Python version:[/bold magenta] {python_version}")
-    if ".".join(python_version.split(".")[:2]) == ".".join(df.python_version.split(".")[:2]):
-        console.print(
-            f"[bold green]Remote robot environment Python version matches Deployfile:[/bold green] {'.'.join(python_version.split('.')[:2])}=={'.'.join(df.python_version.split('.')[:2])}"
-        )
-    else:
-        console.print(
-            f"[bold yellow]Remote robot environment Python version does not match Deployfile:[/bold yellow] {'.'.join(python_version.split('.')[:2])}!={'.'.join(df.python_version.split('.')[:2])}"
-        )
-
-
-def check_glibc_ver(df, ssh):
-    _, stdout, _ = ssh.exec_command("ldd --version")
-    glibc_version = stdout.read().decode().strip().splitlines()[0].split(" ")[-1]
-    console.print(f"[bold magenta]Remote glibc version:[/bold magenta] {glibc_version}")
+def facts_from_daemon(df: deployfile.DeployTarget, directory: str, *, refresh: bool) -> ProbeResult | None:
+    """Remote facts probed by a running deploy daemon over its warm connection.
 
-    if glibc_version == df.glibc_version:
-        console.print(
-            f"[bold green]Remote glibc version matches Deployfile:[/bold green] {glibc_version}=={df.glibc_version}"
-        )
-    else:
-        console.print(
-            f"[bold yellow]Remote glibc version does not match Deployfile:[/bold yellow] {glibc_version}!={df.glibc_version}"
-        )
-
-
-def check_cpu_arch(df, ssh):
-    _, stdout, _ = ssh.exec_command("uname -m")
-    cpu_arch = stdout.read().decode().strip()
-    console.print(f"[bold magenta]Remote CPU architecture:[/bold magenta] {cpu_arch}")
-    if cpu_arch == df.arch:
-        console.print(f"[bold green]Remote CPU architecture matches Deployfile:[/bold green] {cpu_arch}=={df.arch}")
-    else:
-        console.print(
-            f"[bold yellow]Remote CPU architecture does not match Deployfile:[/bold yellow] {cpu_arch}!={df.arch}"
-        )
-
-
-def check_env(df, ssh):
-    _, stdout, _ = ssh.exec_command(f"ls $HOME/{df.name}/env")
-    venv_exists = stdout.read().decode().strip()
-    if not venv_exists:
-        console.print("[bold red]Remote robot virtual environment does not exist[/bold red]")
-        raise click.Abort
+    Returns:
+        ProbeResult | None: Facts, or None if no daemon is running or it could not answer
+    """
+    client = DaemonClient.connect()
+    if client is None:
+        return None
+    directory = str(Path(directory).resolve())
+    with client:
+        try:
+            if not client.call("connected", directory=directory):
+                # the daemon never prompts, so the host key is confirmed here before its first connection
+                _, pkey = get_private_key(console, df)
+                confirm_host_key_df(console, df, pkey)
+            with rich_spinner(console, "Fetching data through the deploy daemon"):
+                return client.probe_facts(directory, refresh=refresh)
+        except (DaemonError, ConnectionError, OSError) as e:
+            console.print(f"[yellow]Deploy daemon could not answer ({e}), connecting directly[/yellow]")
+            return None
@@ -5,34 +5,15 @@ import paramiko
 from rich.console import Console
 
 from kevinbotlib_deploytool import deployfile
-from kevinbotlib_deploytool.cli.common import confirm_host_key_df
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, print_fact_checks, ssh_link_options
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.manifest import forget_remote_venv
+from kevinbotlib_deploytool.remote_facts import RemoteFactsCache, validate_interpreter
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
 
 console = Console()
 
 
-def check_py_location(ssh: paramiko.SSHClient, python_location: str):
-    _, _, stderr = ssh.exec_command(f"{python_location} --version")
-    error = stderr.read().decode().strip()
-    if error:
-        console.print(f"[red]Error location remote Python executable: {error}[/red]")
-        raise click.Abort
-    console.print(f"[green]✔ Remote Python executable is valid: {python_location}[/green]")
-    return error
-
-
-def check_venv(ssh: paramiko.SSHClient, python_location: str):
-    _, stdout, stderr = ssh.exec_command(f"{python_location} -m venv --help")
-    output = stdout.read().decode().strip()
-    error = stderr.read().decode().strip()
-    if error:
-        console.print(f"[red]Error checking venv module: {error}[/red]")
-        raise click.Abort
-    console.print("[bold green]✔ Venv module is available in remote Python installation[/bold green]")
-    return output
-
-
 def run_py_test(spinner, ssh):
     spinner.status = "Running test command"
     _, stdout, stderr = ssh.exec_command("python -c 'print(\"Hello world!\")'")
@@ -49,43 +30,6 @@ def run_py_test(spinner, ssh):
     console.print("[bold green]✔ Test command ran successfully[/bold green]")
 
 
-def check_venv_exists(ssh, df):
-    _, stdout, stderr = ssh.exec_command(f"ls $HOME/{df.name}/env")
-    output = stdout.read().decode().strip()
-    error = stderr.read().decode().strip()
-    if output:
-        console.print(f"[red]Virtual environment already exists at $HOME/{df.name}/env[/red]")
-        raise click.Abort
-    console.print(f"Virtual environment does not exist at $HOME/{df.name}/env, creating it...")
-    return error
-
-
-def compare_py_version_df(df, version):
-    if df.python_version:
-        # We only need to get the major and minor version
-        remote_version = version.split()[1].split(".")[:2]
-        remote_version = ".".join(remote_version)
-        if remote_version == df.python_version:
-            console.print(
-                f"[bold green]✔ Remote Python version matches Deployfile:[/bold green] {remote_version}=={df.python_version}"
-            )
-        else:
-            console.print(
-                f"[bold yellow]WARN: Remote Python version does not match Deployfile:[/bold yellow] {remote_version}!={df.python_version}"
-            )
-
-
-def check_py_version(python_location, ssh):
-    _, stdout, stderr = ssh.exec_command(f"{python_location} --version")
-    output = stdout.read().decode().strip()
-    error = stderr.read().decode().strip()
-    if error:
-        console.print(f"[red]Error getting remote Python version: {error}[/red]")
-        raise click.Abort
-    console.print(f"[green]Remote Python version: {output}[/green]")
-    return output
-
-
 @click.command("create")
 @click.option(
     "-d",
@@ -130,16 +74,13 @@ def create_venv_command(df_directory: str, python_location):
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
-
-            check_py_location(ssh, python_location)
+            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
-            output = check_py_version(python_location, ssh)
-            compare_py_version_df(df, output)
-
-            check_venv_exists(ssh, df)
-
-            check_venv(ssh, python_location)
+            # the venv must not exist yet, so nothing is taken from the cache
+            facts = RemoteFactsCache()
+            result = facts.probe(ssh, df, (python_location,), refresh=True)
+            print_fact_checks(console, validate_interpreter(df, result, python_location))
+            console.print(f"Virtual environment does not exist at $HOME/{df.name}/env, creating it...")
 
             create_remote_env(python_location, df, spinner, ssh)
 
@@ -147,6 +88,10 @@ def create_venv_command(df_directory: str, python_location):
 
             run_py_test(spinner, ssh)
 
+            with ssh.open_sftp() as sftp:
+                forget_remote_venv(sftp, df)
+            facts.invalidate(ssh, df)
+
             ssh.close()
         except Exception as e:
             if not isinstance(e, click.Abort):
@@ -5,8 +5,10 @@ import paramiko
 from rich.console import Console
 
 from kevinbotlib_deploytool import deployfile
-from kevinbotlib_deploytool.cli.common import confirm_host_key_df
+from kevinbotlib_deploytool.cli.common import confirm_host_key_df, ssh_link_options
 from kevinbotlib_deploytool.cli.spinner import rich_spinner
+from kevinbotlib_deploytool.manifest import forget_remote_venv
+from kevinbotlib_deploytool.remote_facts import RemoteFactsCache
 from kevinbotlib_deploytool.sshkeys import SSHKeyManager
 
 console = Console()
@@ -47,7 +49,7 @@ def delete_venv_command(df_directory: str):
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * this is ok, because the user is asked beforehand
-            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10)
+            ssh.connect(hostname=df.host, port=df.port, username=df.user, pkey=pkey, timeout=10, **ssh_link_options(df))
 
             # Check if venv exists
             check_cmd = f"test -d $HOME/{df.name}/env && echo exists || echo missing"
@@ -62,7 +64,11 @@ def delete_venv_command(df_directory: str):
 
             # Delete the venv
             console.print(f"[bold red]Deleting virtual environment at $HOME/{df.name}/env...[/bold red]")
-            ssh.exec_command(f"rm -rf $HOME/{df.name}/env")
+            _, stdout, _ = ssh.exec_command(f"rm -rf $HOME/{df.name}/env")
+            stdout.channel.recv_exit_status()
+            with ssh.open_sftp() as sftp:
+                forget_remote_venv(sftp, df)
+            RemoteFactsCache().invalidate(ssh, df)
             console.print("[bold green]✔ Virtual environment deleted successfully[/bold green]")
 
             ssh.close()
@@ -0,0 +1,385 @@
+"""
+Optional long-lived local daemon that keeps robot connections warm.
+
+The daemon caches parsed Deployfiles, loaded keys and open SSH connections, and
+serves requests from the CLI over a Unix socket. Each request and response is one
+line of JSON: `{"id": 1, "method": "ping", "params": {}}` is answered with
+`{"id": 1, "result": ...}` or `{"id": 1, "error": {"type": ..., "message": ...}}`.
+Long running methods such as `deploy` first send any number of
+`{"id": 1, "event": {...}}` lines with their progress.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+import paramiko
+from platformdirs import user_runtime_dir
+
+from kevinbotlib_deploytool.api import (
+    Deployer,
+    DeployEvent,
+    DeployOptions,
+    DeployPlan,
+    DeployResult,
+    DeployToolError,
+    RemoteCommandError,
+    Robot,
+    ServiceManager,
+)
+from kevinbotlib_deploytool.deployfile import DeployTarget, read_deployfile
+from kevinbotlib_deploytool.remote_facts import ProbeResult, RemoteFactsCache
+from kevinbotlib_deploytool.sshkeys import SSHKeyManager
+from kevinbotlib_deploytool.sshlink import resolve_link_settings
+
+# Unix sockets are missing on some Windows Python builds
+DAEMON_SUPPORTED = hasattr(socket, "AF_UNIX")
+KEEPALIVE_INTERVAL = 15
+
+
+def default_socket_path(app_name="KevinbotLibDeployTool") -> str:
+    return os.path.join(user_runtime_dir(app_name, "meowmeowahr"), "daemon.sock")
+
+
+class DaemonError(Exception):
+    """Error reported by the daemon for a request."""
+
+    def __init__(self, kind: str, message: str, details: dict | None = None):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+        self.message = message
+        self.details = details or {}
+
+
+class ConnectionPool:
+    """Open SSH connections and loaded private keys, reused across requests."""
+
+    def __init__(self, key_manager: SSHKeyManager | None = None):
+        self.key_manager = key_manager or SSHKeyManager("KevinbotLibDeployTool")
+        self._clients: dict[tuple[str, int, str], paramiko.SSHClient] = {}
+        self._keys: dict[str, tuple[float, paramiko.RSAKey]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(df: DeployTarget) -> tuple[str, int, str]:
+        return df.host, df.port, df.user
+
+    def private_key(self, name: str) -> paramiko.RSAKey:
+        keys = self.key_manager.list_keys()
+        if name not in keys:
+            msg = f"No SSH key for '{name}'"
+            raise KeyError(msg)
+        path = keys[name][0]
+        mtime = os.path.getmtime(path)
+        cached = self._keys.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, paramiko.RSAKey.from_private_key_file(path))
+            self._keys[path] = cached
+        return cached[1]
+
+    @staticmethod
+    def _alive(client: paramiko.SSHClient | None) -> bool:
+        transport = client.get_transport() if client else None
+        return bool(transport and transport.is_active())
+
+    def connected(self, df: DeployTarget) -> bool:
+        return self._alive(self._clients.get(self._key(df)))
+
+    def get(self, df: DeployTarget) -> paramiko.SSHClient:
+        """Warm connection to the robot, opening a new one if there is none or it died."""
+        with self._lock:
+            if self.connected(df):
+                return self._clients[self._key(df)]
+            stale = self._clients.pop(self._key(df), None)
+            if stale:
+                stale.close()
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())  # noqa: S507 # * host keys are confirmed by the CLI before the first connection
+            client.connect(
+                hostname=df.host,
+                port=df.port,
+                username=df.user,
+                pkey=self.private_key(df.name),
+                timeout=10,
+                **resolve_link_settings(df).connect_kwargs(),
+            )
+            client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+            self._clients[self._key(df)] = client
+            return client
+
+    def adopt(self, df: DeployTarget, client: paramiko.SSHClient | None):
+        """Keep the connection a request ended up with, e.g. after an upload reconnected."""
+        if client is None:
+            return
+        with self._lock:
+            previous = self._clients.get(self._key(df))
+            if previous is not None and previous is not client:
+                previous.close()
+            self._clients[self._key(df)] = client
+
+    def hosts(self) -> list[str]:
+        return [f"{user}@{host}:{port}" for (host, port, user), client in self._clients.items() if self._alive(client)]
+
+    def close_all(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+class DeployDaemon:
+    def __init__(self, socket_path: str | None = None, pool: ConnectionPool | None = None):
+        self.socket_path = socket_path or default_socket_path()
+        self.pool = pool or ConnectionPool()
+        self.started = time.time()
+        self._deployfiles: dict[str, tuple[float, DeployTarget]] = {}
+        self._server: socketserver.BaseServer | None = None
+        self.methods = {
+            "ping": self.ping,
+            "connected": self.connected,
+            "service.status": self.service_status,
+            "facts.probe": self.probe_facts,
+            "deploy": self.deploy,
+            "deploy.plan": self.plan,
+            "shutdown": self.shutdown,
+        }
+        # methods that report progress get an `emit` callback
+        self.streaming = {"deploy", "deploy.plan"}
+
+    def deployfile(self, directory: str) -> DeployTarget:
+        """Parsed Deployfile, re-read only when it changes on disk."""
+        path = str(Path(directory).resolve() / "Deployfile.toml")
+        mtime = os.path.getmtime(path)
+        cached = self._deployfiles.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_deployfile(Path(path)))
+            self._deployfiles[path] = cached
+        return cached[1]
+
+    def ping(self) -> dict:
+        return {"pid": os.getpid(), "uptime": time.time() - self.started, "connections": self.pool.hosts()}
+
+    def connected(self, directory: str) -> bool:
+        return self.pool.connected(self.deployfile(directory))
+
+    def service_status(self, directory: str) -> dict:
+        df = self.deployfile(directory)
+        return ServiceManager(Robot(df, ssh=self.pool.get(df))).status().model_dump()
+
+    def robot(self, df: DeployTarget) -> Robot:
+        # host keys are confirmed by the CLI, like for the pooled connection
+        return Robot(
+            df,
+            self.pool.private_key(df.name),
+            host_key_policy=paramiko.AutoAddPolicy(),
+            ssh=self.pool.get(df),
+            facts=RemoteFactsCache(),
+        )
+
+    def probe_facts(self, directory: str, interpreters: list[str] | None = None, *, refresh: bool = False) -> dict:
+        df = self.deployfile(directory)
+        result = RemoteFactsCache().probe(self.pool.get(df), df, tuple(interpreters or ()), refresh=refresh)
+        return result.model_dump(mode="json")
+
+    def _deployer(self, directory: str, options: dict, emit) -> tuple[Robot, Deployer]:
+        df = self.deployfile(directory)
+        robot = self.robot(df)
+
+        def on_event(event: DeployEvent):
+            emit(event.model_dump(mode="json"))
+
+        return robot, Deployer(robot, directory, DeployOptions.model_validate(options), on_event=on_event)
+
+    def deploy(self, directory: str, options: dict, emit) -> dict:
+        robot, deployer = self._deployer(directory, options, emit)
+        try:
+            return deployer.deploy().model_dump(mode="json")
+        finally:
+            self.pool.adopt(robot.df, robot.connection)
+
+    def plan(self, directory: str, options: dict, emit) -> dict:
+        robot, deployer = self._deployer(directory, options, emit)
+        try:
+            return deployer.plan().model_dump(mode="json")
+        finally:
+            self.pool.adopt(robot.df, robot.connection)
+
+    def shutdown(self) -> bool:
+        if self._server is not None:
+            # serve_forever has to be stopped from another thread
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+        return True
+
+    def dispatch(self, request: dict, emit=None) -> dict:
+        """Run a request.
+
+        Args:
+            request (dict): Decoded request line
+            emit (Callable[[dict], None] | None): Sends a progress event of the request to the client
+        """
+        response = {"id": request.get("id")}
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            response["error"] = {"type": "UnknownMethod", "message": f"Unknown method {request.get('method')!r}"}
+            return response
+        params = dict(request.get("params", {}))
+        if request.get("method") in self.streaming:
+            params["emit"] = emit or (lambda _event: None)
+        try:
+            response["result"] = method(**params)
+        except Exception as e:  # noqa: BLE001 # * errors are reported to the client instead of killing the daemon
+            response["error"] = {"type": type(e).__name__, "message": str(e)}
+            if isinstance(e, RemoteCommandError):
+                response["error"].update(command=e.command, stderr=e.stderr)
+        return response
+
+    def serve_forever(self):
+        if not DAEMON_SUPPORTED:
+            msg = "The deploy daemon needs Unix domain sockets, which this platform does not support"
+            raise RuntimeError(msg)
+        if os.path.exists(self.socket_path):
+            probe = DaemonClient.connect(self.socket_path)
+            if probe is not None:
+                probe.close()
+                msg = f"A daemon is already listening on {self.socket_path}"
+                raise RuntimeError(msg)
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def send(self, message: dict):
+                self.wfile.write(json.dumps(message).encode() + b"\n")
+                self.wfile.flush()
+
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                    except json.JSONDecodeError:
+                        response = {"id": None, "error": {"type": "InvalidRequest", "message": "Malformed JSON"}}
+                    else:
+                        request_id = request.get("id")
+                        response = daemon.dispatch(
+                            request,
+                            emit=lambda event, request_id=request_id: self.send({"id": request_id, "event": event}),
+                        )
+                    self.send(response)
+
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(previous_umask)
+        self._server.daemon_threads = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+            self.pool.close_all()
+
+
+class DaemonClient:
+    """Connection from the CLI to a running daemon."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+        self._next_id = 0
+
+    @classmethod
+    def connect(cls, socket_path: str | None = None, timeout: float | None = 60) -> "DaemonClient | None":
+        """Connect to the daemon, or return None if it is not running.
+
+        Args:
+            socket_path (str | None): Socket of the daemon
+            timeout (float | None): Seconds to wait for each response line, forever if None
+        """
+        if not DAEMON_SUPPORTED:
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path or default_socket_path())
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock)
+
+    def call(self, method: str, on_event=None, **params):
+        """Call a daemon method.
+
+        Args:
+            method (str): Method name
+            on_event (Callable[[dict], None] | None): Called with the progress events of the request
+            **params: Method parameters
+        """
+        self._next_id += 1
+        self._file.write(json.dumps({"id": self._next_id, "method": method, "params": params}).encode() + b"\n")
+        self._file.flush()
+        while True:
+            line = self._file.readline()
+            if not line:
+                msg = "Daemon closed the connection"
+                raise ConnectionError(msg)
+            response = json.loads(line)
+            if "event" not in response:
+                break
+            if on_event is not None:
+                on_event(response["event"])
+        if "error" in response:
+            error = dict(response["error"])
+            raise DaemonError(error.pop("type"), error.pop("message"), error)
+        return response["result"]
+
+    def probe_facts(self, directory: str, interpreters: tuple[str, ...] = (), *, refresh: bool = False) -> ProbeResult:
+        """Remote facts of the robot, through the daemon's connection and facts cache."""
+        result = self.call("facts.probe", directory=directory, interpreters=list(interpreters), refresh=refresh)
+        return ProbeResult.model_validate(result)
+
+    def deploy(self, directory: str, options: DeployOptions, on_event=None) -> DeployResult:
+        """Deploy through the daemon, over its warm connection.
+
+        Raises:
+            DeployToolError: The deploy failed, or the daemon went away during it
+        """
+        result = self._deployer_call("deploy", directory, options, on_event)
+        return DeployResult.model_validate(result)
+
+    def plan(self, directory: str, options: DeployOptions) -> DeployPlan:
+        """Work out what a deploy through the daemon would do."""
+        return DeployPlan.model_validate(self._deployer_call("deploy.plan", directory, options, None))
+
+    def _deployer_call(self, method: str, directory: str, options: DeployOptions, on_event):
+        try:
+            return self.call(
+                method,
+                directory=directory,
+                options=options.model_dump(mode="json"),
+                on_event=on_event and (lambda event: on_event(DeployEvent.model_validate(event))),
+            )
+        except DaemonError as e:
+            if e.kind == "RemoteCommandError":
+                raise RemoteCommandError(e.details.get("command", ""), e.details.get("stderr", ""), e.message) from e
+            raise DeployToolError(e.message) from e
+        except (ConnectionError, OSError) as e:
+            msg = f"Lost the deploy daemon: {e}"
+            raise DeployToolError(msg) from e
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
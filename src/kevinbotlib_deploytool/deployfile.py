@@ -1,10 +1,100 @@
-from pathlib import Path
+from pathlib import Path, PureWindowsPath
+from typing import Literal
 
 import toml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from kevinbotlib_deploytool.sizes import parse_size
 
 DEPLOYFILE_PATH = Path("Deployfile.toml")
 
+# Optional top-level tables next to [target]
+DEPLOYFILE_SECTIONS = ("service", "gc", "ssh", "package")
+
+
+class ServiceConfig(BaseModel):
+    """Scheduling and resource controls rendered into the robot's systemd unit."""
+
+    nice: int | None = Field(default=None, ge=-20, le=19)
+    cpu_scheduling_policy: Literal["other", "batch", "idle", "fifo", "rr"] | None = None
+    cpu_scheduling_priority: int | None = Field(default=None, ge=1, le=99)
+    cpu_affinity: list[int] | str | None = None
+    io_scheduling_class: Literal["realtime", "best-effort", "idle"] | None = None
+    io_scheduling_priority: int | None = Field(default=None, ge=0, le=7)
+    memory_max: str | None = Field(default=None, pattern=r"^(\d+[KMGT]?|\d+%|infinity)$")
+    oom_score_adjust: int | None = Field(default=None, ge=-1000, le=1000)
+    # Enables Type=notify; the robot must send READY=1 and then WATCHDOG=1 more often than this
+    watchdog_sec: float | None = Field(default=None, gt=0)
+    restart_sec: float = Field(default=5, ge=0)
+    start_limit_interval_sec: float | None = Field(default=None, ge=0)
+    start_limit_burst: int | None = Field(default=None, ge=1)
+
+    @model_validator(mode="after")
+    def check_priorities(self):
+        if self.cpu_scheduling_priority is not None and self.cpu_scheduling_policy not in ("fifo", "rr"):
+            msg = "cpu_scheduling_priority requires cpu_scheduling_policy 'fifo' or 'rr'"
+            raise ValueError(msg)
+        if self.io_scheduling_priority is not None and self.io_scheduling_class is None:
+            msg = "io_scheduling_priority requires io_scheduling_class"
+            raise ValueError(msg)
+        return self
+
+
+class GCConfig(BaseModel):
+    """Disk budget for old releases and caches on the robot."""
+
+    budget: str = Field(default="256M")
+    keep_releases: int = Field(default=1, ge=0)
+    pip_cache: bool = Field(default=True)
+
+    @field_validator("budget")
+    @classmethod
+    def check_budget(cls, value: str) -> str:
+        parse_size(value)
+        return value
+
+    @property
+    def budget_bytes(self) -> int:
+        return parse_size(self.budget)
+
+
+class SSHConfig(BaseModel):
+    """SSH transport tuning. Unset values fall back to the profile stored by `ssh bench-link`."""
+
+    ciphers: list[str] | None = None
+    macs: list[str] | None = None
+    compression: bool | None = None
+    window_size: str | None = None
+    max_packet_size: str | None = None
+    use_link_profile: bool = Field(default=True)
+
+    @field_validator("window_size", "max_packet_size")
+    @classmethod
+    def check_size(cls, value: str | None) -> str | None:
+        if value is not None:
+            parse_size(value)
+        return value
+
+
+class PackageConfig(BaseModel):
+    """How the project files that go into the code archive are found."""
+
+    # "tree" walks src/, assets/ and deploy/; "index" takes the files tracked by git
+    source: Literal["tree", "index"] = Field(default="tree")
+    # Untracked files packaged in index mode, as globs relative to the project, e.g. "assets/generated/**"
+    include: list[str] = Field(default_factory=list)
+
+    @field_validator("include")
+    @classmethod
+    def check_include(cls, value: list[str]) -> list[str]:
+        for pattern in value:
+            # parses both / and \ separators and drive letters
+            path = PureWindowsPath(pattern)
+            if path.anchor or ".." in path.parts:
+                msg = f"package include pattern {pattern!r} must stay inside the project directory"
+                raise ValueError(msg)
+        return value
+
 
 class DeployTarget(BaseModel):
     name: str
@@ -14,13 +104,23 @@ class DeployTarget(BaseModel):
     user: str
     host: str
     port: int = Field(default=22)
+    service: ServiceConfig = Field(default_factory=ServiceConfig)
+    gc: GCConfig = Field(default_factory=GCConfig)
+    ssh: SSHConfig = Field(default_factory=SSHConfig)
+    package: PackageConfig = Field(default_factory=PackageConfig)
 
     @classmethod
     def from_dict(cls, data: dict) -> "DeployTarget":
-        return cls(**data.get("target", {}))
+        sections = {name: data[name] for name in DEPLOYFILE_SECTIONS if name in data}
+        return cls(**data.get("target", {}), **sections)
 
     def to_dict(self) -> dict:
-        return {"target": self.model_dump()}
+        data = {"target": self.model_dump(exclude=set(DEPLOYFILE_SECTIONS))}
+        for name in DEPLOYFILE_SECTIONS:
+            section = getattr(self, name).model_dump(exclude_none=True, exclude_defaults=True)
+            if section:
+                data[name] = section
+        return data
 
 
 def read_deployfile(path: Path = DEPLOYFILE_PATH) -> DeployTarget:
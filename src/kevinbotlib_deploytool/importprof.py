@@ -0,0 +1,158 @@
+import json
+import re
+import shlex
+
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+
+# Cache namespace holding import profiles of past deploys
+PROFILE_NAMESPACE = "import-profiles"
+# Profiles kept per robot and package
+PROFILE_HISTORY = 10
+
+# "import time:       412 |       1580 |     numpy.core._multiarray_umath"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S.*?)\s*$")
+
+
+class ImportNode(BaseModel):
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list["ImportNode"] = Field(default_factory=list)
+
+
+class ImportProfile(BaseModel):
+    package: str
+    fingerprint: str | None = Field(default=None, description="Build fingerprint of the deploy that was profiled")
+    commit: str | None = None
+    timestamp: float
+    modules: dict[str, tuple[int, int]] = Field(description="Self and cumulative microseconds per module")
+    roots: list[ImportNode] = Field(default_factory=list)
+
+    @property
+    def total_us(self) -> int:
+        return sum(node.cumulative_us for node in self.roots)
+
+
+class ImportRegression(BaseModel):
+    name: str
+    before_us: int
+    after_us: int
+
+    @property
+    def delta_us(self) -> int:
+        return self.after_us - self.before_us
+
+
+def importtime_command(python: str, package: str) -> str:
+    """Import package with `-X importtime`; the report goes to stdout, the module's own output is dropped."""
+    return f"{python} -X importtime -c {shlex.quote(f'import {package}')} 2>&1 >/dev/null"
+
+
+def parse_importtime(output: str) -> list[ImportNode]:
+    """Build the import tree from `-X importtime` output.
+
+    Python reports a module after everything it imported, indented two spaces deeper
+    per level, so children are collected until their parent's line arrives.
+
+    Returns:
+        list[ImportNode]: Top-level imports in import order
+    """
+    pending: dict[int, list[ImportNode]] = {}
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        node = ImportNode(
+            name=match.group(4),
+            self_us=int(match.group(1)),
+            cumulative_us=int(match.group(2)),
+            children=pending.pop(depth + 1, []),
+        )
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def flatten_imports(roots: list[ImportNode]) -> dict[str, tuple[int, int]]:
+    modules = {}
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        modules[node.name] = (node.self_us, node.cumulative_us)
+        stack.extend(node.children)
+    return modules
+
+
+def fastest_run(runs: list[list[ImportNode]]) -> list[ImportNode]:
+    """Tree of the run with the lowest total, which has the least scheduling noise and no bytecode writes."""
+    return min(runs, key=lambda roots: sum(node.cumulative_us for node in roots))
+
+
+def top_imports(modules: dict[str, tuple[int, int]], count: int, *, by_self: bool = False) -> list[str]:
+    """Names of the slowest modules, by cumulative or self time."""
+    index = 0 if by_self else 1
+    return sorted(modules, key=lambda name: modules[name][index], reverse=True)[:count]
+
+
+def compare_profiles(
+    before: dict[str, tuple[int, int]],
+    after: dict[str, tuple[int, int]],
+    threshold: float = 0.2,
+    min_delta_us: int = 5000,
+) -> list[ImportRegression]:
+    """Modules whose cumulative import time grew by more than threshold and min_delta_us.
+
+    Modules that are new since before count as regressions when they alone cost
+    more than min_delta_us.
+
+    Returns:
+        list[ImportRegression]: Regressions, largest first
+    """
+    regressions = []
+    for name, (_, cumulative) in after.items():
+        previous = before.get(name, (0, 0))[1]
+        if cumulative - previous >= min_delta_us and cumulative > previous * (1 + threshold):
+            regressions.append(ImportRegression(name=name, before_us=previous, after_us=cumulative))
+    return sorted(regressions, key=lambda regression: regression.delta_us, reverse=True)
+
+
+class ImportProfileStore:
+    """Recent import profiles of each robot and package, kept in the local cache."""
+
+    def __init__(self, cache: ArtifactCache | None = None):
+        self.cache = cache or ArtifactCache()
+
+    @staticmethod
+    def _key(host: str, port: int, package: str) -> str:
+        return f"{host}-{port}-{package}"
+
+    def history(self, host: str, port: int, package: str) -> list[ImportProfile]:
+        """Stored profiles, oldest first."""
+        data = self.cache.read_bytes(PROFILE_NAMESPACE, self._key(host, port, package))
+        if data is None:
+            return []
+        try:
+            return [ImportProfile.model_validate(entry) for entry in json.loads(data)]
+        except (ValueError, TypeError):
+            return []
+
+    def previous(self, host: str, port: int, package: str, fingerprint: str | None) -> ImportProfile | None:
+        """Latest profile of a different deploy than fingerprint."""
+        for profile in reversed(self.history(host, port, package)):
+            if fingerprint is None or profile.fingerprint != fingerprint:
+                return profile
+        return None
+
+    def record(self, host: str, port: int, profile: ImportProfile):
+        """Store a profile, replacing an earlier one of the same deploy."""
+        history = [
+            entry
+            for entry in self.history(host, port, profile.package)
+            if profile.fingerprint is None or entry.fingerprint != profile.fingerprint
+        ]
+        history = [*history, profile][-PROFILE_HISTORY:]
+        # trees are only needed for rendering the live profile
+        data = json.dumps([entry.model_dump(exclude={"roots"}) for entry in history])
+        self.cache.put_bytes(PROFILE_NAMESPACE, self._key(host, port, profile.package), data.encode())
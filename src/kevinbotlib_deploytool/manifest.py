@@ -0,0 +1,156 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pygit2
+
+from kevinbotlib_deploytool import __about__
+from kevinbotlib_deploytool.deployfile import DeployTarget
+
+
+def remote_manifest_path(df: DeployTarget) -> str:
+    return f"/home/{df.user}/{df.name}/robot/deploy/manifest.json"
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dirty_state_hash(repo: pygit2.Repository) -> str | None:
+    """Hash of every uncommitted change in the working tree, or None if it is clean.
+
+    Covers the current contents of modified and untracked files, so two deploys of
+    the same dirty tree get the same hash.
+    """
+    status = repo.status()
+    if not status:
+        return None
+    workdir = Path(repo.workdir)
+    digest = hashlib.sha256()
+    for path in sorted(status):
+        digest.update(path.encode() + b"\0")
+        file_path = workdir / path
+        digest.update(file_sha256(file_path).encode() if file_path.is_file() else b"deleted")
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def describe_head(repo: pygit2.Repository, untracked_files: str = "all") -> dict:
+    """Branch, tag and commit of the checked out code, as recorded in the deploy manifest.
+
+    Args:
+        repo (pygit2.Repository): Repository of the robot code
+        untracked_files (str): Whether untracked files make the commit dirty, "all" or "no"
+    """
+    head_name = repo.head.name  # e.g., 'refs/heads/main' or 'HEAD' (if detached)
+    latest_commit = repo[repo.head.target]
+    is_dirty = bool(repo.status(untracked_files=untracked_files))
+
+    current_tag = None
+    if not is_dirty:
+        for ref in repo.references:
+            if ref.startswith("refs/tags/"):
+                tag_obj = repo[repo.references[ref].target]
+                tag_target = tag_obj.target if isinstance(tag_obj, pygit2.Tag) else tag_obj.id
+                if tag_target == latest_commit.id:
+                    current_tag = ref.split("/")[-1]
+                    break
+
+    return {
+        "branch": head_name.split("/")[-1] if head_name.startswith("refs/heads/") else "DETACHED-HEAD",
+        "tag": current_tag,
+        "commit": str(latest_commit.id) + ("-dirty" if is_dirty else ""),
+    }
+
+
+def build_fingerprint(
+    repo: pygit2.Repository,
+    deployfile_path: Path,
+    custom_wheel_hashes: list[str],
+    options: dict | None = None,
+    *,
+    dirty: bool = True,
+) -> str:
+    """Fingerprint of everything that goes into a deploy.
+
+    Args:
+        repo (pygit2.Repository): Repository of the robot code
+        deployfile_path (Path): Deployfile of the robot
+        custom_wheel_hashes (list[str]): SHA-256 of the extra wheels installed on the robot, in install order
+        options (dict | None): Deploy options that change what ends up on the robot
+        dirty (bool): Hash uncommitted changes; pass False when options already cover the packaged files
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    components = {
+        "deploytool": __about__.__version__,
+        "commit": str(repo.head.target),
+        "dirty": dirty_state_hash(repo) if dirty else None,
+        "deployfile": file_sha256(deployfile_path),
+        "custom_wheels": custom_wheel_hashes,
+        "options": options or {},
+    }
+    return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+
+def _content_hash(entry: dict | str) -> str:
+    # manifests written by older versions map paths straight to the hash
+    if isinstance(entry, str):
+        return entry
+    # index packaging records git blob OIDs instead, which never equal a SHA-256
+    return entry.get("sha256") or entry.get("oid", "")
+
+
+def diff_files(old: dict, new: dict) -> tuple[list[str], list[str], list[str]]:
+    """Files added, changed and removed between two `files` maps of deploy manifests."""
+    added = sorted(path for path in new if path not in old)
+    changed = sorted(path for path in new if path in old and _content_hash(old[path]) != _content_hash(new[path]))
+    removed = sorted(path for path in old if path not in new)
+    return added, changed, removed
+
+
+def write_remote_manifest(sftp, df: DeployTarget, manifest: dict):
+    directory = remote_manifest_path(df).rsplit("/", 1)[0]
+    try:
+        sftp.stat(directory)
+    except OSError:
+        sftp.mkdir(directory)
+    with sftp.open(remote_manifest_path(df), "w") as f:
+        f.write(json.dumps(manifest))
+
+
+def read_remote_manifest(sftp, df: DeployTarget) -> dict | None:
+    """Manifest of the code currently deployed on the robot, or None if there is none."""
+    try:
+        with sftp.open(remote_manifest_path(df), "r") as f:
+            manifest = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+# What a deploy installed into the venv; meaningless once the venv is replaced
+VENV_MANIFEST_KEYS = ("fingerprint", "deps", "wheels")
+
+
+def forget_remote_venv(sftp, df: DeployTarget) -> bool:
+    """Drop what the deploy manifest says about the venv, after it was deleted or recreated.
+
+    The next deploy is then never skipped as up to date and installs the dependencies
+    again, while the file list is kept for the diff of the robot code.
+
+    Returns:
+        bool: Whether there was a manifest to update
+    """
+    manifest = read_remote_manifest(sftp, df)
+    if manifest is None:
+        return False
+    for key in VENV_MANIFEST_KEYS:
+        manifest.pop(key, None)
+    write_remote_manifest(sftp, df, manifest)
+    return True
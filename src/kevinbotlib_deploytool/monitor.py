@@ -0,0 +1,177 @@
+import json
+from collections import deque
+
+from pydantic import BaseModel, Field
+
+# Runs on the robot inside a single long-lived channel. It only reads procfs/sysfs
+# and writes one JSON line per sample, so the per-sample cost is a handful of reads.
+REMOTE_SAMPLER_SCRIPT = r"""
+import json, os, sys, time
+
+pid, interval = int(sys.argv[1]), float(sys.argv[2])
+proc = f"/proc/{pid}"
+TEMP = "/sys/class/thermal/thermal_zone0/temp"
+THROTTLED = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+FREQ = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+
+def read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def ticks(stat):
+    fields = stat[stat.rindex(")") + 2:].split()
+    return int(fields[11]) + int(fields[12])
+
+def keyed(text, keys):
+    out = {}
+    for line in (text or "").splitlines():
+        key, _, value = line.partition(":")
+        if key in keys:
+            out[key] = int(value.split()[0])
+    return out
+
+meta = {"clk_tck": os.sysconf("SC_CLK_TCK"), "ncpu": os.cpu_count(), "pid": pid}
+print(json.dumps({"meta": meta}), flush=True)
+while True:
+    stat = read(f"{proc}/stat")
+    if stat is None:
+        print(json.dumps({"exited": True}), flush=True)
+        break
+    threads = {}
+    try:
+        for tid in os.listdir(f"{proc}/task"):
+            tstat = read(f"{proc}/task/{tid}/stat")
+            if tstat:
+                threads[tid] = [tstat[tstat.index("(") + 1:tstat.rindex(")")], ticks(tstat)]
+    except OSError:
+        pass
+    temp, throttled, freq = read(TEMP), read(THROTTLED), read(FREQ)
+    sample = {
+        "t": time.monotonic(),
+        "ticks": ticks(stat),
+        "status": keyed(read(f"{proc}/status"), ("VmRSS", "Threads", "voluntary_ctxt_switches", "nonvoluntary_ctxt_switches")),
+        "io": keyed(read(f"{proc}/io"), ("read_bytes", "write_bytes")),
+        "threads": threads,
+        "load": [float(x) for x in read("/proc/loadavg").split()[:3]],
+        "temp": int(temp) / 1000 if temp else None,
+        "throttled": int(throttled, 16) if throttled else None,
+        "freq": int(freq) // 1000 if freq else None,
+    }
+    try:
+        print(json.dumps(sample), flush=True)
+    except BrokenPipeError:
+        break
+    time.sleep(interval)
+"""
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# Raspberry Pi firmware throttling bits (vcgencmd get_throttled)
+THROTTLE_FLAGS = {
+    0: "under-voltage",
+    1: "freq capped",
+    2: "throttled",
+    3: "soft temp limit",
+}
+
+
+class SamplerMeta(BaseModel):
+    clk_tck: int
+    ncpu: int
+    pid: int
+
+
+class ProcessSample(BaseModel):
+    t: float
+    ticks: int
+    status: dict[str, int] = Field(default_factory=dict)
+    io: dict[str, int] = Field(default_factory=dict)
+    threads: dict[str, tuple[str, int]] = Field(default_factory=dict)
+    load: list[float] = Field(default_factory=list)
+    temp: float | None = None
+    throttled: int | None = None
+    freq: int | None = None
+
+
+class SampleRates(BaseModel):
+    cpu_percent: float
+    rss_kib: int
+    threads: int
+    ctx_switches_per_sec: float
+    read_bytes_per_sec: float | None
+    write_bytes_per_sec: float | None
+    thread_cpu_percent: dict[str, tuple[str, float]]
+
+
+def parse_sampler_line(line: str) -> SamplerMeta | ProcessSample | None:
+    """Parse one line of sampler output, returning None once the process has exited."""
+    data = json.loads(line)
+    if "meta" in data:
+        return SamplerMeta(**data["meta"])
+    if data.get("exited"):
+        return None
+    return ProcessSample(**data)
+
+
+def compute_rates(meta: SamplerMeta, previous: ProcessSample, current: ProcessSample) -> SampleRates:
+    elapsed = max(current.t - previous.t, 1e-6)
+    tick_scale = 100 / (meta.clk_tck * elapsed)
+
+    thread_cpu = {}
+    for tid, (name, ticks) in current.threads.items():
+        before = previous.threads.get(tid)
+        delta = ticks - before[1] if before else 0
+        thread_cpu[tid] = (name, delta * tick_scale)
+
+    def ctx_total(sample: ProcessSample) -> int:
+        return sample.status.get("voluntary_ctxt_switches", 0) + sample.status.get("nonvoluntary_ctxt_switches", 0)
+
+    def io_rate(key: str) -> float | None:
+        if key not in current.io or key not in previous.io:
+            return None
+        return (current.io[key] - previous.io[key]) / elapsed
+
+    return SampleRates(
+        cpu_percent=(current.ticks - previous.ticks) * tick_scale,
+        rss_kib=current.status.get("VmRSS", 0),
+        threads=current.status.get("Threads", len(current.threads)),
+        ctx_switches_per_sec=(ctx_total(current) - ctx_total(previous)) / elapsed,
+        read_bytes_per_sec=io_rate("read_bytes"),
+        write_bytes_per_sec=io_rate("write_bytes"),
+        thread_cpu_percent=thread_cpu,
+    )
+
+
+def decode_throttled(value: int | None) -> list[str]:
+    if not value:
+        return []
+    return [name for bit, name in THROTTLE_FLAGS.items() if value & (1 << bit)]
+
+
+def sparkline(values, width: int | None = None) -> str:
+    values = list(values)[-width:] if width else list(values)
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = high - low
+    if span == 0:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[int((value - low) / span * (len(SPARK_CHARS) - 1))] for value in values)
+
+
+class History:
+    """Fixed-length series of recent values per metric, used for sparklines."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.series: dict[str, deque] = {}
+
+    def add(self, name: str, value: float | None):
+        if value is not None:
+            self.series.setdefault(name, deque(maxlen=self.length)).append(value)
+
+    def spark(self, name: str) -> str:
+        return sparkline(self.series.get(name, ()))
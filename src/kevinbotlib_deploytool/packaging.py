@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import os
+import stat
+import tarfile
+from collections.abc import Callable
+from pathlib import Path
+
+import pygit2
+
+# Same fixed timestamp hatchling uses for reproducible wheels (2020-02-02)
+DEFAULT_ARCHIVE_MTIME = 1580601600
+
+# Index entry modes of regular files, executables and symlinks; submodules are skipped
+_INDEX_FILE_MODES = (pygit2.enums.FileMode.BLOB, pygit2.enums.FileMode.BLOB_EXECUTABLE, pygit2.enums.FileMode.LINK)
+
+
+def archive_mtime() -> int:
+    """Timestamp recorded for every archive member; honours SOURCE_DATE_EPOCH."""
+    return int(os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_ARCHIVE_MTIME))
+
+
+def exclude_pycache(arcname: str) -> bool:
+    return "__pycache__" in arcname.split("/") or arcname.endswith(".pyc")
+
+
+class _HashingWriter:
+    """File wrapper that hashes everything written through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def collect_members(
+    sources: list[tuple[Path, str]], exclude: Callable[[str], bool] | None = None
+) -> list[tuple[Path, str]]:
+    """Expand directories into (path, arcname) pairs for every file and directory.
+
+    Returns:
+        list[tuple[Path, str]]: Members sorted by archive name
+    """
+    members = {}
+    for path, arcname in sources:
+        # explicitly listed sources are always kept; exclude only filters directory contents
+        members[arcname] = path
+        if path.is_dir() and not path.is_symlink():
+            for root, dirs, files in os.walk(path):
+                relative = Path(root).relative_to(path).as_posix()
+                prefix = arcname if relative == "." else f"{arcname}/{relative}"
+                kept_dirs = []
+                for name in sorted(dirs):
+                    child = f"{prefix}/{name}"
+                    if exclude and exclude(child):
+                        continue
+                    kept_dirs.append(name)
+                    members[child] = Path(root) / name
+                dirs[:] = kept_dirs
+                for name in files:
+                    child = f"{prefix}/{name}"
+                    if not (exclude and exclude(child)):
+                        members[child] = Path(root) / name
+    return sorted(((path, arcname) for arcname, path in members.items()), key=lambda member: member[1])
+
+
+def hash_members(
+    sources: list[tuple[Path, str]], exclude: Callable[[str], bool] | None = exclude_pycache
+) -> dict[str, dict]:
+    """SHA-256 and size of every file that build_archive would add, keyed by archive name."""
+    hashes = {}
+    for path, arcname in collect_members(sources, exclude):
+        if path.is_file():
+            with open(path, "rb") as f:
+                hashes[arcname] = {"sha256": _sha256_of(f), "size": os.fstat(f.fileno()).st_size}
+    return hashes
+
+
+def index_members(
+    repo: pygit2.Repository, project_root: Path, sources: list[tuple[Path, str]], include: list[str] | None = None
+) -> dict[str, tuple[Path, dict]]:
+    """Files of sources that are tracked in the git index, plus untracked files matching include.
+
+    Tracked files that are unchanged in the working tree use their blob OID from the
+    index as content hash, so only modified and included files are read.
+
+    Args:
+        repo (pygit2.Repository): Repository containing the project
+        project_root (Path): Directory the include patterns are relative to
+        sources (list[tuple[Path, str]]): Files and directories to package, as (path, arcname)
+        include (list[str] | None): Glob patterns of extra files, e.g. generated assets
+
+    Returns:
+        dict[str, tuple[Path, dict]]: Path, git blob OID and size of every file, keyed by archive name
+
+    Raises:
+        ValueError: An include pattern matches a file outside project_root
+    """
+    workdir = Path(repo.workdir).resolve()
+    roots = {}
+    for path, arcname in sources:
+        relative = path.resolve().relative_to(workdir).as_posix()
+        roots[relative] = arcname
+    # the index knows which files are clean from their stat data, without reading them
+    status = repo.status(untracked_files="no")
+
+    members = {}
+    for entry in repo.index:
+        if entry.mode not in _INDEX_FILE_MODES:
+            continue
+        arcname = _index_arcname(entry.path, roots)
+        if arcname is None or exclude_pycache(arcname):
+            continue
+        path = workdir / entry.path
+        flags = status.get(entry.path, pygit2.enums.FileStatus.CURRENT)
+        if flags & pygit2.enums.FileStatus.WT_DELETED:
+            continue
+        changed = flags & (pygit2.enums.FileStatus.WT_MODIFIED | pygit2.enums.FileStatus.WT_TYPECHANGE)
+        oid = str(pygit2.hashfile(str(path))) if changed else str(entry.id)
+        members[arcname] = (path, {"oid": oid, "size": path.lstat().st_size})
+
+    root = project_root.resolve()
+    for pattern in include or []:
+        for path in sorted(project_root.glob(pattern)):
+            files = sorted(child for child in path.rglob("*") if child.is_file()) if path.is_dir() else [path]
+            for file in files:
+                # symlinks may still lead out of the project
+                if not file.resolve().is_relative_to(root):
+                    msg = f"package include pattern {pattern!r} matches {file}, which is outside {project_root}"
+                    raise ValueError(msg)
+                arcname = file.relative_to(project_root).as_posix()
+                if arcname not in members and not exclude_pycache(arcname):
+                    members[arcname] = (file, {"oid": str(pygit2.hashfile(str(file))), "size": file.stat().st_size})
+    return dict(sorted(members.items()))
+
+
+def _index_arcname(path: str, roots: dict[str, str]) -> str | None:
+    for root, arcname in roots.items():
+        if path == root:
+            return arcname
+        if path.startswith(root + "/"):
+            return arcname + path[len(root) :]
+    return None
+
+
+def _sha256_of(f) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _normalize(info: tarfile.TarInfo, mtime: int) -> tarfile.TarInfo:
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    info.mtime = mtime
+    if info.isdir() or info.mode & stat.S_IXUSR:
+        info.mode = 0o755
+    else:
+        info.mode = 0o644
+    return info
+
+
+def build_archive(
+    dest: Path, sources: list[tuple[Path, str]], exclude: Callable[[str], bool] | None = exclude_pycache
+) -> str:
+    """Write a reproducible .tar.gz of sources to dest.
+
+    Members are sorted and their owner, mode and mtime normalized, and the gzip
+    header carries no name or timestamp, so identical inputs give identical bytes.
+
+    Returns:
+        str: SHA-256 of the archive, computed while writing it
+    """
+    mtime = archive_mtime()
+    with open(dest, "wb") as raw:
+        writer = _HashingWriter(raw)
+        with (
+            gzip.GzipFile(filename="", mode="wb", fileobj=writer, mtime=0) as gz,
+            tarfile.open(fileobj=gz, mode="w", format=tarfile.PAX_FORMAT) as tar,
+        ):
+            for path, arcname in collect_members(sources, exclude):
+                info = _normalize(tar.gettarinfo(str(path), arcname=arcname), mtime)
+                if info.isfile():
+                    with open(path, "rb") as f:
+                        tar.addfile(info, f)
+                else:
+                    tar.addfile(info)
+    return writer.hash.hexdigest()
@@ -0,0 +1,153 @@
+"""
+Runs the robot code under a profiler. `robot profile` uploads this file to the robot
+and starts the service with it through a systemd drop-in.
+
+Every thread is sampled from a background thread for the requested duration, and the
+main thread can additionally be traced with cProfile. The report is then written as
+JSON while the robot code keeps running; it is also written if the code exits early.
+On Python 3.10 and 3.11 the main thread stays traced after the report is written,
+until the service is restarted without the runner.
+
+This file runs in the robot's environment and may only use the standard library.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+
+REPORT_VERSION = 1
+# Frames of the runner itself are cut from the bottom of the main thread's stacks
+_RUNNER_FILES = {os.path.abspath(__file__), os.path.abspath(runpy.__file__), "<frozen runpy>"}
+
+
+class Sampler(threading.Thread):
+    def __init__(self, output: str, duration: float, interval: float, profiler: cProfile.Profile | None):
+        super().__init__(name="kevinbotlib-profiler", daemon=True)
+        self.output = output
+        self.duration = duration
+        self.interval = interval
+        self.profiler = profiler
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.started = time.monotonic()
+        self._names: dict[object, str | None] = {}
+        self._roots: list[str] = []
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def short_path(self, filename: str) -> str:
+        for root in self._roots:
+            if filename.startswith(root + os.sep):
+                return filename[len(root) + 1 :]
+        return filename
+
+    def frame_name(self, code) -> str | None:
+        """Name of a code object in the collapsed stacks, None for frames of the runner."""
+        if code not in self._names:
+            if code.co_filename in _RUNNER_FILES or os.path.abspath(code.co_filename) in _RUNNER_FILES:
+                self._names[code] = None
+            else:
+                qualname = getattr(code, "co_qualname", code.co_name)
+                name = f"{qualname} ({self.short_path(code.co_filename)}:{code.co_firstlineno})"
+                self._names[code] = name.replace(";", ":")
+        return self._names[code]
+
+    def sample(self):
+        me = threading.get_ident()
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():  # noqa: SLF001 # * the only way to sample other threads
+            if ident == me:
+                continue
+            stack = []
+            current = frame
+            while current is not None:
+                name = self.frame_name(current.f_code)
+                if name is None:
+                    break
+                stack.append(name)
+                current = current.f_back
+            stack.append(f"thread {threads.get(ident, ident)}")
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self):
+        # longest first, so site-packages wins over the prefix it lives in
+        self._roots = sorted({os.path.abspath(path) for path in sys.path if path}, key=len, reverse=True)
+        deadline = self.started + self.duration
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self._finished:
+                    return
+                self.sample()
+            time.sleep(self.interval)
+        self.finish(exited=False)
+
+    def functions(self) -> list[list]:
+        if self.profiler is None:
+            return []
+        # This runs on the sampler thread. Before Python 3.12, disabling a profiler only
+        # affects the calling thread, so the main thread stays traced until `robot profile`
+        # restores the service right after reading the report. The stats are only read
+        # while holding the GIL, so the snapshot is consistent.
+        stats = pstats.Stats(self.profiler).stats  # type: ignore[attr-defined]
+        return [
+            [self.short_path(filename), line, name, primitive_calls, calls, self_time, cumulative_time]
+            for (filename, line, name), (primitive_calls, calls, self_time, cumulative_time, _) in stats.items()
+        ]
+
+    def finish(self, *, exited: bool):
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            report = {
+                "version": REPORT_VERSION,
+                "mode": "cprofile" if self.profiler is not None else "sample",
+                "python": sys.version.split()[0],
+                "interval": self.interval,
+                "duration": time.monotonic() - self.started,
+                "samples": self.samples,
+                "exited": exited,
+                "stacks": dict(self.stacks),
+                "functions": self.functions(),
+            }
+            # the deploy tool polls for the report, so it must never see a partial file
+            with open(self.output + ".tmp", "w") as f:
+                json.dump(report, f)
+            os.replace(self.output + ".tmp", self.output)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", required=True, help="Path of the JSON report")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to profile for")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between samples")
+    parser.add_argument("--cprofile", action="store_true", help="Also trace the main thread with cProfile")
+    parser.add_argument("script", help="Entrypoint of the robot code")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    script = os.path.abspath(args.script)
+    sys.argv = [script, *args.args]
+    sys.path[0] = os.path.dirname(script)
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    sampler = Sampler(args.output, args.duration, args.interval, profiler)
+    sampler.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        sampler.finish(exited=True)
+
+
+if __name__ == "__main__":
+    main()
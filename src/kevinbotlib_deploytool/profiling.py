@@ -0,0 +1,106 @@
+import shlex
+from collections import Counter
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.service import service_entrypoint, service_python
+
+# Uploaded to the robot and run in place of the robot code's entrypoint
+RUNNER_PATH = Path(__file__).with_name("profile_runner.py")
+# Drop-in that swaps the service's ExecStart for the runner while profiling
+OVERRIDE_NAME = "profile.conf"
+# Root frames of the collapsed stacks name the thread, they are not functions
+_THREAD_FRAME = "thread "
+
+
+class FunctionStats(BaseModel):
+    name: str
+    calls: int | None = Field(default=None, description="Only known when traced with cProfile")
+    self_seconds: float
+    total_seconds: float
+
+
+class ProfileReport(BaseModel):
+    """Report written by the profile runner on the robot."""
+
+    version: int
+    mode: str = Field(description="sample or cprofile")
+    python: str
+    interval: float
+    duration: float
+    samples: int
+    exited: bool = Field(description="The robot code exited before the profile duration was over")
+    stacks: dict[str, int] = Field(description="Collapsed stacks, root first, and how often each was sampled")
+    functions: list[tuple[str, int, str, int, int, float, float]] = Field(
+        default_factory=list,
+        description="cProfile stats: file, line, function, primitive calls, calls, tottime, cumtime",
+    )
+
+
+def remote_profile_dir(df: DeployTarget) -> str:
+    return f"/home/{df.user}/{df.name}/profile"
+
+
+def profile_override_path(df: DeployTarget) -> str:
+    return f"/home/{df.user}/.config/systemd/user/{df.name}.service.d/{OVERRIDE_NAME}"
+
+
+def render_profile_override(df: DeployTarget, duration: float, interval: float, *, cprofile: bool) -> str:
+    """systemd drop-in that runs the robot code under the profile runner.
+
+    The service is not restarted on failure while profiling, so a crash leaves the
+    runner's report in place instead of overwriting it.
+    """
+    directory = remote_profile_dir(df)
+    args = [
+        service_python(df),
+        f"{directory}/runner.py",
+        "--output",
+        f"{directory}/report.json",
+        "--duration",
+        str(duration),
+        "--interval",
+        str(interval),
+    ]
+    if cprofile:
+        args.append("--cprofile")
+    args.append(service_entrypoint(df))
+    return f"[Service]\nExecStart=\nExecStart={shlex.join(args)}\nRestart=no\n"
+
+
+def hot_functions(report: ProfileReport, count: int) -> list[FunctionStats]:
+    """Functions with the most self time.
+
+    Exact cProfile timings are used when the main thread was traced; otherwise the
+    times are estimated from the number of samples a function was seen in.
+    """
+    if report.functions:
+        functions = [
+            FunctionStats(name=f"{name} ({file}:{line})", calls=calls, self_seconds=tottime, total_seconds=cumtime)
+            for file, line, name, _, calls, tottime, cumtime in report.functions
+        ]
+    else:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, samples in report.stacks.items():
+            frames = [frame for frame in stack.split(";") if not frame.startswith(_THREAD_FRAME)]
+            if not frames:
+                continue
+            own[frames[-1]] += samples
+            # recursion must not count a function twice in one sample
+            for frame in set(frames):
+                total[frame] += samples
+        functions = [
+            FunctionStats(
+                name=frame, self_seconds=own[frame] * report.interval, total_seconds=samples * report.interval
+            )
+            for frame, samples in total.items()
+        ]
+    return sorted(functions, key=lambda function: function.self_seconds, reverse=True)[:count]
+
+
+def collapsed_stacks(report: ProfileReport) -> str:
+    """Stacks in the collapsed format read by flamegraph.pl, speedscope and inferno."""
+    return "".join(f"{stack} {samples}\n" for stack, samples in sorted(report.stacks.items()))
@@ -0,0 +1,299 @@
+import hashlib
+import shlex
+import time
+from collections.abc import Callable
+from typing import Any
+
+import paramiko
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.deployfile import DeployTarget
+
+# Cache namespace holding the facts of each robot
+FACTS_NAMESPACE = "remote-facts"
+# Seconds a probed fact is trusted for
+DEFAULT_FACTS_TTL = 24 * 60 * 60
+# Facts that deploys and venv operations can change
+ENVIRONMENT_FACTS = ("venv_exists", "python_version")
+# Facts holding a single value, as opposed to one per interpreter
+SCALAR_FACTS = ("arch", "glibc_version", "systemd_version", "venv_exists", "python_version")
+
+
+class RemoteFacts(BaseModel):
+    """What is known about a robot without asking it again."""
+
+    arch: str | None = None
+    glibc_version: str | None = None
+    systemd_version: str | None = None
+    venv_exists: bool | None = None
+    python_version: str | None = Field(default=None, description="Full Python version of the robot's venv")
+    interpreters: dict[str, str] = Field(default_factory=dict, description="`--version` output per interpreter path")
+    venv_modules: dict[str, bool] = Field(default_factory=dict, description="Whether each interpreter can create venvs")
+    fetched_at: dict[str, float] = Field(default_factory=dict, description="When each fact was probed")
+
+
+class ProbeResult(BaseModel):
+    facts: RemoteFacts
+    interpreter_errors: dict[str, str] = Field(
+        default_factory=dict, description="Output of interpreters that failed to run, never cached"
+    )
+    cached: bool = Field(default=False, description="Every fact came from the cache")
+
+
+class FactCheck(BaseModel):
+    """One fact validated against the Deployfile."""
+
+    label: str
+    actual: str | None = None
+    expected: str | None = None
+    level: str = Field(description="ok, warning or error")
+    message: str | None = Field(default=None, description="Explanation for errors")
+
+
+def probe_command(df: DeployTarget, interpreters: tuple[str, ...] = ()) -> str:
+    """Shell command printing every fact as tab separated fields, in one round trip."""
+    env = f"$HOME/{shlex.quote(df.name)}/env"
+    lines = [
+        "printf 'arch\\t%s\\n' \"$(uname -m)\"",
+        "printf 'glibc\\t%s\\n' \"$(ldd --version 2>&1 | head -n 1)\"",
+        "printf 'systemd\\t%s\\n' \"$(systemctl --version 2>/dev/null | head -n 1)\"",
+        f"if [ -d {env} ]; then printf 'venv\\t1\\n'; else printf 'venv\\t0\\n'; fi",
+        f"printf 'venv_python\\t%s\\n' \"$({env}/bin/python --version 2>/dev/null)\"",
+    ]
+    for python in interpreters:
+        quoted = shlex.quote(python)
+        lines += [
+            f"v=$({quoted} --version 2>&1); s=$?",
+            f"printf 'interpreter\\t%s\\t%s\\t%s\\n' {quoted} \"$s\" \"$(printf '%s' \"$v\" | tr '\\n\\t' '  ')\"",
+            f"if {quoted} -m venv --help >/dev/null 2>&1; then m=1; else m=0; fi",
+            f"printf 'venv_module\\t%s\\t%s\\n' {quoted} \"$m\"",
+        ]
+    return f"sh -c {shlex.quote(chr(10).join(lines))}"
+
+
+def _last_word(line: str) -> str | None:
+    words = line.split()
+    return words[-1] if words else None
+
+
+def parse_probe(output: str) -> ProbeResult:
+    facts = RemoteFacts()
+    errors = {}
+    for line in output.splitlines():
+        key, _, value = line.partition("\t")
+        if key == "arch":
+            facts.arch = value.strip() or None
+        elif key == "glibc":
+            facts.glibc_version = _last_word(value)
+        elif key == "systemd":
+            words = value.split()
+            facts.systemd_version = words[1] if len(words) > 1 else None
+        elif key == "venv":
+            facts.venv_exists = value.strip() == "1"
+        elif key == "venv_python":
+            facts.python_version = _last_word(value)
+        elif key == "interpreter":
+            python, status, version = value.split("\t", 2)
+            if status == "0":
+                facts.interpreters[python] = version.strip()
+            else:
+                errors[python] = version.strip() or f"exit status {status}"
+        elif key == "venv_module":
+            python, available = value.split("\t", 1)
+            facts.venv_modules[python] = available.strip() == "1"
+    for python in errors:
+        facts.venv_modules.pop(python, None)
+    return ProbeResult(facts=facts, interpreter_errors=errors)
+
+
+def run_probe(ssh: paramiko.SSHClient, df: DeployTarget, interpreters: tuple[str, ...] = ()) -> ProbeResult:
+    _, stdout, _ = ssh.exec_command(probe_command(df, interpreters))
+    return parse_probe(stdout.read().decode(errors="replace"))
+
+
+def _minor(version: str) -> str:
+    return ".".join(version.split(".")[:2])
+
+
+def validate_target(df: DeployTarget, facts: RemoteFacts) -> list[FactCheck]:
+    """Compare the robot against its Deployfile."""
+    checks = [
+        FactCheck(
+            label="CPU architecture",
+            actual=facts.arch,
+            expected=df.arch,
+            level="ok" if facts.arch == df.arch else "warning",
+        ),
+        FactCheck(
+            label="glibc version",
+            actual=facts.glibc_version,
+            expected=df.glibc_version,
+            level="ok" if facts.glibc_version == df.glibc_version else "warning",
+        ),
+    ]
+    if not facts.venv_exists:
+        checks.append(
+            FactCheck(
+                label="virtual environment", level="error", message="Remote robot virtual environment does not exist"
+            )
+        )
+        return checks
+    actual = _minor(facts.python_version) if facts.python_version else None
+    checks.append(
+        FactCheck(
+            label="Python version",
+            actual=actual,
+            expected=_minor(df.python_version),
+            level="ok" if actual == _minor(df.python_version) else "warning",
+        )
+    )
+    return checks
+
+
+def validate_interpreter(df: DeployTarget, result: ProbeResult, python: str) -> list[FactCheck]:
+    """Check that python can create the robot's venv."""
+    if python in result.interpreter_errors:
+        return [
+            FactCheck(
+                label="Python executable",
+                level="error",
+                message=f"Error location remote Python executable: {result.interpreter_errors[python]}",
+            )
+        ]
+    facts = result.facts
+    version = facts.interpreters.get(python, "")
+    actual = _minor(_last_word(version) or "")
+    checks = [
+        FactCheck(label="Python executable", actual=python, level="ok"),
+        FactCheck(
+            label="Python version",
+            actual=actual,
+            expected=df.python_version or None,
+            level="ok" if not df.python_version or actual == df.python_version else "warning",
+        ),
+    ]
+    if facts.venv_exists:
+        checks.append(
+            FactCheck(
+                label="virtual environment",
+                level="error",
+                message=f"Virtual environment already exists at $HOME/{df.name}/env",
+            )
+        )
+    if not facts.venv_modules.get(python):
+        checks.append(
+            FactCheck(label="venv module", level="error", message=f"The venv module is not available in {python}")
+        )
+    return checks
+
+
+def host_key_fingerprint(ssh: paramiko.SSHClient) -> str:
+    """SHA-256 of the host key of a connected client."""
+    return hashlib.sha256(ssh.get_transport().get_remote_server_key().asbytes()).hexdigest()
+
+
+class RemoteFactsCache:
+    """Remote facts kept in the local cache.
+
+    Entries are keyed by the robot's host key fingerprint rather than its address,
+    so a reflashed robot or a different robot on the same IP is probed again.
+
+    Args:
+        cache (ArtifactCache | None): Cache to store facts in
+        ttl (float): Seconds after which a fact is probed again
+    """
+
+    def __init__(self, cache: ArtifactCache | None = None, ttl: float = DEFAULT_FACTS_TTL):
+        self.cache = cache or ArtifactCache()
+        self.ttl = ttl
+
+    @staticmethod
+    def key(ssh: paramiko.SSHClient, df: DeployTarget) -> str:
+        # the venv facts depend on the user and robot name, not only on the host
+        return f"{host_key_fingerprint(ssh)[:32]}-{df.user}-{df.name}"
+
+    def load(self, ssh: paramiko.SSHClient, df: DeployTarget) -> RemoteFacts:
+        """Facts that have not expired yet."""
+        data = self.cache.read_bytes(FACTS_NAMESPACE, self.key(ssh, df))
+        if data is None:
+            return RemoteFacts()
+        try:
+            facts = RemoteFacts.model_validate_json(data)
+        except ValueError:
+            return RemoteFacts()
+        now = time.time()
+        for name, fetched_at in list(facts.fetched_at.items()):
+            if now - fetched_at > self.ttl:
+                self._forget(facts, name)
+        return facts
+
+    def save(self, ssh: paramiko.SSHClient, df: DeployTarget, facts: RemoteFacts):
+        self.cache.put_bytes(FACTS_NAMESPACE, self.key(ssh, df), facts.model_dump_json().encode())
+
+    def fact(self, ssh: paramiko.SSHClient, df: DeployTarget, name: str, probe: Callable[[], Any]) -> Any:
+        """Cached value of a fact, running probe and caching its result when unknown.
+
+        A probe returning None is not cached, so it runs again next time.
+        """
+        facts = self.load(ssh, df)
+        value = getattr(facts, name)
+        if value is not None:
+            return value
+        value = probe()
+        if value is not None:
+            setattr(facts, name, value)
+            facts.fetched_at[name] = time.time()
+            self.save(ssh, df, facts)
+        return value
+
+    def probe(
+        self, ssh: paramiko.SSHClient, df: DeployTarget, interpreters: tuple[str, ...] = (), *, refresh: bool = False
+    ) -> ProbeResult:
+        """Every fact, probed in one round trip unless all of them are cached.
+
+        Args:
+            ssh (paramiko.SSHClient): Connection to the robot
+            df (DeployTarget): Deployfile of the robot
+            interpreters (tuple[str, ...]): Interpreter paths to also check
+            refresh (bool): Probe even if the cached facts are complete
+        """
+        cached = self.load(ssh, df)
+        if not refresh and self._complete(cached, interpreters):
+            return ProbeResult(facts=cached, cached=True)
+
+        # the probe is authoritative for everything it covers
+        result = run_probe(ssh, df, interpreters)
+        now = time.time()
+        for name in SCALAR_FACTS:
+            setattr(cached, name, getattr(result.facts, name))
+            if getattr(cached, name) is None:
+                cached.fetched_at.pop(name, None)
+            else:
+                cached.fetched_at[name] = now
+        for name in ("interpreters", "venv_modules"):
+            getattr(cached, name).update(getattr(result.facts, name))
+            if getattr(result.facts, name):
+                cached.fetched_at.setdefault(name, now)
+        self.save(ssh, df, cached)
+        return ProbeResult(facts=cached, interpreter_errors=result.interpreter_errors)
+
+    @staticmethod
+    def _complete(facts: RemoteFacts, interpreters: tuple[str, ...]) -> bool:
+        if facts.arch is None or facts.glibc_version is None or facts.venv_exists is None:
+            return False
+        if facts.venv_exists and facts.python_version is None:
+            return False
+        return all(python in facts.interpreters and python in facts.venv_modules for python in interpreters)
+
+    def invalidate(self, ssh: paramiko.SSHClient, df: DeployTarget, names: tuple[str, ...] = ENVIRONMENT_FACTS):
+        """Forget facts so they are probed again."""
+        facts = self.load(ssh, df)
+        for name in names:
+            self._forget(facts, name)
+        self.save(ssh, df, facts)
+
+    @staticmethod
+    def _forget(facts: RemoteFacts, name: str):
+        facts.fetched_at.pop(name, None)
+        setattr(facts, name, RemoteFacts.model_fields[name].get_default(call_default_factory=True))
@@ -0,0 +1,128 @@
+import datetime
+import shlex
+
+from pydantic import BaseModel
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+
+# Paths are relative to the robot user's home directory
+PIP_CACHE_DIR = ".cache/pip"
+
+# Uploaded code archives are kept in ~/<name>/archives/<sha256>.tar.gz
+ARCHIVES_DIR = "archives"
+# Written into the extracted robot code, holds the sha256 of its archive
+ARCHIVE_MARKER = ".archive-sha256"
+
+# Kinds where the newest `keep_releases` entries are never evicted
+_PROTECTED_KINDS = ("release", "archive")
+
+
+class RemoteEntry(BaseModel):
+    path: str
+    kind: str
+    size: int
+    last_used: int
+
+    @classmethod
+    def from_inventory_line(cls, line: str, df: DeployTarget) -> "RemoteEntry":
+        size_kib, last_used, path = line.split("\t", 2)
+        return cls(path=path, kind=entry_kind(path, df), size=int(size_kib) * 1024, last_used=int(last_used))
+
+
+def releases_dir(df: DeployTarget) -> str:
+    return f"{df.name}/releases"
+
+
+def archives_dir(df: DeployTarget) -> str:
+    return f"{df.name}/{ARCHIVES_DIR}"
+
+
+def trash_dir(df: DeployTarget) -> str:
+    return f"{df.name}/.trash"
+
+
+def entry_kind(path: str, df: DeployTarget) -> str:
+    if path.startswith(releases_dir(df) + "/"):
+        return "release"
+    if path.startswith(archives_dir(df) + "/"):
+        return "archive"
+    if path.startswith(PIP_CACHE_DIR + "/"):
+        return "pip-cache"
+    return "other"
+
+
+def inventory_command(df: DeployTarget) -> str:
+    """List every collectable entry as `<KiB>\\t<mtime>\\t<path>` in one round trip."""
+    globs = [f"{shlex.quote(releases_dir(df))}/*", f"{shlex.quote(archives_dir(df))}/*"]
+    if df.gc.pip_cache:
+        globs.append(f"{PIP_CACHE_DIR}/*")
+    return (
+        f"cd $HOME && for p in {' '.join(globs)}; do "
+        '[ -e "$p" ] || continue; '
+        'printf "%s\\t%s\\t%s\\n" "$(du -sk "$p" | cut -f1)" "$(stat -c %Y "$p")" "$p"; '
+        "done"
+    )
+
+
+def parse_inventory(output: str, df: DeployTarget) -> list[RemoteEntry]:
+    return [RemoteEntry.from_inventory_line(line, df) for line in output.splitlines() if line.strip()]
+
+
+def plan_eviction(entries: list[RemoteEntry], budget: int, keep_releases: int = 0) -> list[RemoteEntry]:
+    """Pick least recently used entries to delete until the rest fits in budget.
+
+    The newest `keep_releases` releases and archives are never evicted, even if that
+    leaves the total over budget.
+    """
+    protected = set()
+    for kind in _PROTECTED_KINDS:
+        newest = sorted((e for e in entries if e.kind == kind), key=lambda e: e.last_used, reverse=True)
+        protected.update(e.path for e in newest[:keep_releases])
+
+    total = sum(e.size for e in entries)
+    evicted = []
+    for entry in sorted(entries, key=lambda e: e.last_used):
+        if total <= budget:
+            break
+        if entry.path in protected:
+            continue
+        evicted.append(entry)
+        total -= entry.size
+    return evicted
+
+
+def release_tag() -> str:
+    """UTC timestamp naming a release or trash entry, precise enough that back-to-back deploys differ."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+
+
+def retire_command(df: DeployTarget, paths: list[str], tag: str) -> str:
+    """Move paths into the trash and delete the trash in the background.
+
+    A rename is instant, so callers never wait on unlinking a large tree.
+    """
+    trash = shlex.quote(trash_dir(df))
+    moves = " && ".join(
+        f"mv {shlex.quote(path)} {trash}/{shlex.quote(f'{tag}-{index}')}" for index, path in enumerate(paths)
+    )
+    return f"cd $HOME && mkdir -p {trash} && {moves} && {background_delete_command(df)}"
+
+
+def background_delete_command(df: DeployTarget) -> str:
+    trash = shlex.quote(trash_dir(df))
+    return f"(nohup sh -c 'rm -rf {trash}/*' >/dev/null 2>&1 </dev/null &)"
+
+
+def archive_release_command(df: DeployTarget, tag: str) -> str:
+    """Move the current robot code into releases/ instead of deleting it.
+
+    Fails if a release named tag already exists, as `mv` would move the code inside it.
+    """
+    releases = shlex.quote(releases_dir(df))
+    robot = shlex.quote(f"{df.name}/robot")
+    release = f"{releases}/{shlex.quote(tag)}"
+    return (
+        f"cd $HOME && mkdir -p {releases} && if [ -e {robot} ]; then "
+        f"if [ -e {release} ]; then echo {shlex.quote(f'Release {tag} already exists')} >&2; exit 1; fi; "
+        f"mv {robot} {release}; fi"
+    )
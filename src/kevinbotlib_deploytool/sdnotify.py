@@ -0,0 +1,88 @@
+"""
+Minimal systemd notification helper for robot code.
+
+Used with a Deployfile `[service]` `watchdog_sec` setting: call `ready()` once the
+robot is up, then `Watchdog.pet()` from the main loop.
+"""
+
+import os
+import socket
+import time
+
+_socket: socket.socket | None = None
+
+
+def notify(state: str) -> bool:
+    """Send a raw state string to systemd.
+
+    Args:
+        state (str): Newline separated assignments, such as "READY=1"
+
+    Returns:
+        bool: Whether the message was sent (False when not running under systemd)
+    """
+    global _socket  # noqa: PLW0603
+
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address or not hasattr(socket, "AF_UNIX"):
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        _socket.sendto(state.encode(), address)
+    except OSError:
+        return False
+    return True
+
+
+def ready() -> bool:
+    """Tell systemd the robot finished starting up."""
+    return notify("READY=1")
+
+
+def stopping() -> bool:
+    """Tell systemd the robot is shutting down."""
+    return notify("STOPPING=1")
+
+
+def status(message: str) -> bool:
+    """Set the free-form status line shown by `systemctl status`."""
+    return notify(f"STATUS={message}")
+
+
+def watchdog_interval() -> float | None:
+    """Watchdog timeout configured for this process in seconds, or None if disabled."""
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and int(pid) != os.getpid()):
+        return None
+    return int(usec) / 1e6
+
+
+class Watchdog:
+    """Rate-limited watchdog keep-alive.
+
+    `pet()` only sends a datagram every `fraction` of the watchdog timeout, so it is
+    cheap enough to call on every iteration of the control loop.
+    """
+
+    def __init__(self, fraction: float = 0.5):
+        interval = watchdog_interval()
+        self.period = interval * fraction if interval else None
+        self._last = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.period is not None
+
+    def pet(self) -> bool:
+        if self.period is None:
+            return False
+        now = time.monotonic()
+        if now - self._last < self.period:
+            return False
+        self._last = now
+        return notify("WATCHDOG=1")
@@ -1,18 +1,253 @@
+import json
+import re
+
+import jinja2
+from pydantic import BaseModel
+
+from kevinbotlib_deploytool.deployfile import DeployTarget, ServiceConfig
+
 # Jinja2 template for systemd service that runs in user mode --user
+# Exit codes 64 and 65 are the robot's intentional shutdown codes
 ROBOT_SYSTEMD_USER_SERVICE_TEMPLATE = """
 [Unit]
 Description=KevinbotLib Robot Service
 After=network.target
+{% for key, value in unit_directives %}
+{{ key }}={{ value }}
+{% endfor %}
 
 [Service]
-Type=simple
+Type={{ type }}
 WorkingDirectory={{ working_directory }}
-ExecStart=/bin/bash -c "{{ exec }}; ret=$?; if [ $ret -eq 0 ] || [ $ret -eq 64 ] || [ $ret -eq 65 ]; then exit 0; else exit $ret; fi"
+ExecStart={{ exec }}
+SuccessExitStatus=64 65
 Restart=on-failure
-RestartSec=5
+RestartSec={{ restart_sec }}
 KillSignal=SIGUSR1
 Environment='DEPLOY=true'
+{% for key, value in directives %}
+{{ key }}={{ value }}
+{% endfor %}
 
 [Install]
 WantedBy=default.target
 """
+
+
+def format_timespan(seconds: float) -> str:
+    """Format seconds as a systemd time span, keeping sub-second precision."""
+    if float(seconds).is_integer():
+        return str(int(seconds))
+    return f"{round(seconds * 1000)}ms"
+
+
+def unit_directives(config: ServiceConfig) -> list[tuple[str, str]]:
+    directives = []
+    if config.start_limit_interval_sec is not None:
+        directives.append(("StartLimitIntervalSec", format_timespan(config.start_limit_interval_sec)))
+    if config.start_limit_burst is not None:
+        directives.append(("StartLimitBurst", str(config.start_limit_burst)))
+    return directives
+
+
+def service_directives(config: ServiceConfig) -> list[tuple[str, str]]:
+    """Translate the Deployfile [service] section into systemd directives."""
+    directives = []
+    if config.watchdog_sec is not None:
+        directives.append(("WatchdogSec", format_timespan(config.watchdog_sec)))
+        directives.append(("NotifyAccess", "main"))
+    if config.nice is not None:
+        directives.append(("Nice", str(config.nice)))
+    if config.cpu_scheduling_policy is not None:
+        directives.append(("CPUSchedulingPolicy", config.cpu_scheduling_policy))
+    if config.cpu_scheduling_priority is not None:
+        directives.append(("CPUSchedulingPriority", str(config.cpu_scheduling_priority)))
+    if config.cpu_affinity is not None:
+        affinity = config.cpu_affinity
+        directives.append(("CPUAffinity", affinity if isinstance(affinity, str) else " ".join(map(str, affinity))))
+    if config.io_scheduling_class is not None:
+        directives.append(("IOSchedulingClass", config.io_scheduling_class))
+    if config.io_scheduling_priority is not None:
+        directives.append(("IOSchedulingPriority", str(config.io_scheduling_priority)))
+    if config.memory_max is not None:
+        directives.append(("MemoryMax", config.memory_max))
+    if config.oom_score_adjust is not None:
+        directives.append(("OOMScoreAdjust", str(config.oom_score_adjust)))
+    return directives
+
+
+def service_python(df: DeployTarget) -> str:
+    return f"/home/{df.user}/{df.name}/env/bin/python3"
+
+
+def service_entrypoint(df: DeployTarget) -> str:
+    return f"/home/{df.user}/{df.name}/robot/src/{df.name.replace('-', '_')}/__main__.py"
+
+
+def render_service_file(df: DeployTarget) -> str:
+    template = jinja2.Template(ROBOT_SYSTEMD_USER_SERVICE_TEMPLATE, trim_blocks=True)
+    return template.render(
+        working_directory=f"/home/{df.user}/{df.name}/robot",
+        exec=f"{service_python(df)} {service_entrypoint(df)}",
+        type="notify" if df.service.watchdog_sec is not None else "simple",
+        restart_sec=format_timespan(df.service.restart_sec),
+        unit_directives=unit_directives(df.service),
+        directives=service_directives(df.service),
+    )
+
+
+# Properties fetched in a single `systemctl show` call
+SERVICE_STATUS_PROPERTIES = (
+    "LoadState",
+    "ActiveState",
+    "SubState",
+    "MainPID",
+    "ExecMainStartTimestamp",
+    "ExecMainStartTimestampMonotonic",
+    "InactiveExitTimestampMonotonic",
+    "ActiveEnterTimestampMonotonic",
+    "NRestarts",
+    "MemoryCurrent",
+    "CPUUsageNSec",
+)
+
+# systemd reports unset 64-bit counters as UINT64_MAX
+_SYSTEMD_UNSET = 2**64 - 1
+
+
+class ServiceStatus(BaseModel):
+    load_state: str
+    active_state: str
+    sub_state: str
+    main_pid: int = 0
+    exec_main_start_timestamp: str | None = None
+    exec_main_start_timestamp_monotonic: int = 0
+    inactive_exit_timestamp_monotonic: int = 0
+    active_enter_timestamp_monotonic: int = 0
+    n_restarts: int = 0
+    memory_current: int | None = None
+    cpu_usage_nsec: int | None = None
+
+    @property
+    def installed(self) -> bool:
+        return self.load_state != "not-found"
+
+    @classmethod
+    def from_show_output(cls, output: str) -> "ServiceStatus":
+        props = parse_systemctl_show(output)
+        return cls(
+            load_state=props.get("LoadState", "unknown"),
+            active_state=props.get("ActiveState", "unknown"),
+            sub_state=props.get("SubState", "unknown"),
+            main_pid=_parse_counter(props.get("MainPID")) or 0,
+            exec_main_start_timestamp=props.get("ExecMainStartTimestamp") or None,
+            exec_main_start_timestamp_monotonic=_parse_counter(props.get("ExecMainStartTimestampMonotonic")) or 0,
+            inactive_exit_timestamp_monotonic=_parse_counter(props.get("InactiveExitTimestampMonotonic")) or 0,
+            active_enter_timestamp_monotonic=_parse_counter(props.get("ActiveEnterTimestampMonotonic")) or 0,
+            n_restarts=_parse_counter(props.get("NRestarts")) or 0,
+            memory_current=_parse_counter(props.get("MemoryCurrent")),
+            cpu_usage_nsec=_parse_counter(props.get("CPUUsageNSec")),
+        )
+
+    @property
+    def activation_seconds(self) -> float | None:
+        """Time systemd took from starting the unit until it reported it active.
+
+        For a `Type=simple` unit systemd reports it active as soon as the process is
+        forked, so this is close to zero and says nothing about robot startup.
+        """
+        if not self.active_enter_timestamp_monotonic or not self.inactive_exit_timestamp_monotonic:
+            return None
+        return (self.active_enter_timestamp_monotonic - self.inactive_exit_timestamp_monotonic) / 1e6
+
+
+class ReadinessTracker:
+    """Decides when a freshly started service counts as up.
+
+    The unit has to be active, with the same main process, for the whole grace
+    period, so a robot that crashes right after starting is not reported as ready.
+    """
+
+    def __init__(self, grace: float):
+        self.grace = grace
+        self._active_since: float | None = None
+        self._pid = 0
+
+    def update(self, status: ServiceStatus, now: float) -> str:
+        """Feed a new status sample.
+
+        Returns:
+            str: "ready", "failed" or "waiting"
+        """
+        if status.active_state == "failed":
+            return "failed"
+        if status.active_state != "active" or not status.main_pid:
+            self._active_since = None
+            return "waiting"
+        if self._active_since is None or status.main_pid != self._pid:
+            self._active_since = now
+            self._pid = status.main_pid
+        if now - self._active_since >= self.grace:
+            return "ready"
+        return "waiting"
+
+
+UPTIME_COMMAND = "cat /proc/uptime"
+
+
+def parse_uptime(output: str) -> int | None:
+    """Parse `/proc/uptime` into microseconds since boot.
+
+    This is the clock systemd's `*TimestampMonotonic` properties use, except that it
+    keeps counting while the system is suspended.
+    """
+    try:
+        return round(float(output.split()[0]) * 1e6)
+    except (IndexError, ValueError):
+        return None
+
+
+def journal_command(service_name: str, lines: int = 500) -> str:
+    return f"journalctl --user -u {service_name}.service -o json --no-pager -n {lines}"
+
+
+def find_ready_line(journal_output: str, pattern: str, since_monotonic: int) -> int | None:
+    """Find the first journal entry matching pattern logged after since_monotonic.
+
+    Returns:
+        int | None: Monotonic timestamp of the entry in microseconds
+    """
+    regex = re.compile(pattern)
+    for line in journal_output.splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        timestamp = int(entry.get("__MONOTONIC_TIMESTAMP", 0))
+        message = entry.get("MESSAGE")
+        if timestamp >= since_monotonic and isinstance(message, str) and regex.search(message):
+            return timestamp
+    return None
+
+
+def systemctl_show_command(service_name: str, properties: tuple[str, ...] = SERVICE_STATUS_PROPERTIES) -> str:
+    return f"systemctl --user show {service_name}.service --property={','.join(properties)}"
+
+
+def parse_systemctl_show(output: str) -> dict[str, str]:
+    """Parse the `Key=Value` lines printed by `systemctl show`."""
+    props = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            props[key.strip()] = value.strip()
+    return props
+
+
+def _parse_counter(value: str | None) -> int | None:
+    if value is None or not value.isdigit():
+        return None
+    number = int(value)
+    if number == _SYSTEMD_UNSET:
+        return None
+    return number
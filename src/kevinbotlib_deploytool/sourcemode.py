@@ -0,0 +1,75 @@
+import hashlib
+import json
+import shlex
+
+DEPLOY_MODES = ("auto", "source", "wheel")
+
+
+def dependency_fingerprint(pyproject: dict, custom_wheel_hashes: list[str], python_version: str) -> str:
+    """Hash of everything that decides which packages pip installs into the robot venv."""
+    project = pyproject.get("project", {})
+    components = {
+        "dependencies": sorted(project.get("dependencies", [])),
+        "optional_dependencies": project.get("optional-dependencies", {}),
+        "requires_python": project.get("requires-python"),
+        "custom_wheels": custom_wheel_hashes,
+        "python_version": python_version,
+    }
+    return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+
+def resolve_deploy_mode(mode: str, deployed_manifest: dict | None, deps_fingerprint: str) -> str:
+    """Pick "source" for `auto` when the robot already has exactly these dependencies installed."""
+    if mode != "auto":
+        return mode
+    if deployed_manifest and deployed_manifest.get("deps") == deps_fingerprint:
+        return "source"
+    return "wheel"
+
+
+def record_source_deploy(manifest: dict, deployed_manifest: dict | None) -> bool:
+    """Make the manifest of a source deploy describe the dependencies left in the venv.
+
+    Source deploys install nothing, so the venv keeps the dependencies of the last wheel
+    deploy. When the project needs others, the manifest keeps the installed dependency
+    fingerprint (none if nothing was ever installed) and drops the build fingerprint, so
+    the next deploy is neither skipped nor done in source mode.
+
+    Returns:
+        bool: The dependencies of the project are not installed on the robot
+    """
+    installed = (deployed_manifest or {}).get("deps")
+    if installed == manifest["deps"]:
+        return False
+    manifest.pop("fingerprint", None)
+    if installed is None:
+        manifest.pop("deps")
+    else:
+        manifest["deps"] = installed
+    return True
+
+
+def source_pth_name(package: str) -> str:
+    return f"_{package}_robot_src.pth"
+
+
+def install_source_command(python: str, package: str, src_dir: str) -> str:
+    """Put src_dir in front of site-packages with a .pth file in the venv.
+
+    The .pth line is an import statement, so it runs at startup and the robot sources
+    shadow the previously installed wheel, whose metadata stays available.
+    """
+    pth_line = f"import sys; sys.path.insert(0, {src_dir!r})\n"
+    script = (
+        "import pathlib, sysconfig; "
+        f"pathlib.Path(sysconfig.get_path('purelib'), {source_pth_name(package)!r}).write_text({pth_line!r})"
+    )
+    return f"{python} -c {shlex.quote(script)}"
+
+
+def remove_source_command(python: str, package: str) -> str:
+    script = (
+        "import pathlib, sysconfig; "
+        f"pathlib.Path(sysconfig.get_path('purelib'), {source_pth_name(package)!r}).unlink(missing_ok=True)"
+    )
+    return f"{python} -c {shlex.quote(script)}"
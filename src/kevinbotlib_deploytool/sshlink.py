@@ -0,0 +1,226 @@
+import itertools
+import json
+import os
+import time
+from collections.abc import Callable
+
+import paramiko
+from platformdirs import user_data_dir
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.sizes import parse_size
+
+# paramiko's own defaults
+DEFAULT_WINDOW_SIZE = 2 * 1024**2
+DEFAULT_MAX_PACKET_SIZE = 32 * 1024
+
+# Candidates tried by `ssh bench-link`, in the order they are tried
+CIPHER_CANDIDATES = (
+    "aes128-gcm@openssh.com",
+    "aes256-gcm@openssh.com",
+    "aes128-ctr",
+    "aes256-ctr",
+    "aes128-cbc",
+    "aes256-cbc",
+)
+MAC_CANDIDATES = (
+    "hmac-sha2-256-etm@openssh.com",
+    "hmac-sha2-256",
+    "hmac-sha2-512-etm@openssh.com",
+    "hmac-sha2-512",
+    "hmac-sha1",
+    "hmac-md5",
+)
+WINDOW_SIZES = (DEFAULT_WINDOW_SIZE, 8 * 1024**2, 32 * 1024**2)
+MAX_PACKET_SIZES = (DEFAULT_MAX_PACKET_SIZE, 64 * 1024, 128 * 1024)
+
+# AEAD ciphers authenticate the data themselves, so the negotiated MAC is unused
+AEAD_CIPHERS = ("aes128-gcm@openssh.com", "aes256-gcm@openssh.com")
+
+
+def _prefer(preferred: list[str] | None, available: tuple[str, ...]) -> tuple[str, ...]:
+    """Move the preferred algorithms to the front, keeping the rest as a fallback."""
+    if not preferred:
+        return available
+    first = [name for name in preferred if name in available]
+    return (*first, *(name for name in available if name not in first))
+
+
+class LinkSettings(BaseModel):
+    """SSH transport settings used for every connection to a robot."""
+
+    ciphers: list[str] | None = None
+    macs: list[str] | None = None
+    compression: bool = False
+    window_size: int = DEFAULT_WINDOW_SIZE
+    max_packet_size: int = DEFAULT_MAX_PACKET_SIZE
+
+    def transport_factory(self, sock, **kwargs) -> paramiko.Transport:
+        transport = paramiko.Transport(
+            sock, default_window_size=self.window_size, default_max_packet_size=self.max_packet_size, **kwargs
+        )
+        options = transport.get_security_options()
+        options.ciphers = _prefer(self.ciphers, options.ciphers)
+        options.digests = _prefer(self.macs, options.digests)
+        return transport
+
+    def connect_kwargs(self) -> dict:
+        """Extra keyword arguments for `paramiko.SSHClient.connect`."""
+        return {"compress": self.compression, "transport_factory": self.transport_factory}
+
+    def describe(self) -> str:
+        cipher = self.ciphers[0] if self.ciphers else "default cipher"
+        mac = self.macs[0] if self.macs else "default MAC"
+        return (
+            f"{cipher}, {mac}, compression {'on' if self.compression else 'off'}, "
+            f"window {self.window_size // 1024} KiB, packet {self.max_packet_size // 1024} KiB"
+        )
+
+
+class LinkProfile(BaseModel):
+    settings: LinkSettings
+    throughput: float = Field(description="Measured upload throughput in bytes per second")
+    measured_at: float
+
+
+class LinkProfileStore:
+    """Fastest link settings found by `ssh bench-link`, stored per host and port."""
+
+    def __init__(self, app_name="KevinbotLibDeployTool", path: str | None = None):
+        self.path = path or os.path.join(user_data_dir(app_name, "meowmeowahr"), "link_profiles.json")
+
+    @staticmethod
+    def _key(host: str, port: int) -> str:
+        return f"{host}:{port}"
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, profiles: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(profiles, f, indent=4)
+
+    def get(self, host: str, port: int) -> LinkProfile | None:
+        data = self._load().get(self._key(host, port))
+        return LinkProfile.model_validate(data) if data else None
+
+    def set(self, host: str, port: int, profile: LinkProfile):
+        profiles = self._load()
+        profiles[self._key(host, port)] = profile.model_dump()
+        self._save(profiles)
+
+    def remove(self, host: str, port: int) -> bool:
+        profiles = self._load()
+        if profiles.pop(self._key(host, port), None) is None:
+            return False
+        self._save(profiles)
+        return True
+
+
+def resolve_link_settings(df: DeployTarget, store: LinkProfileStore | None = None) -> LinkSettings:
+    """Stored bench-link profile for the robot, overridden by the Deployfile [ssh] section."""
+    settings = LinkSettings()
+    if df.ssh.use_link_profile:
+        profile = (store or LinkProfileStore()).get(df.host, df.port)
+        if profile:
+            settings = profile.settings
+
+    overrides = {}
+    if df.ssh.ciphers is not None:
+        overrides["ciphers"] = df.ssh.ciphers
+    if df.ssh.macs is not None:
+        overrides["macs"] = df.ssh.macs
+    if df.ssh.compression is not None:
+        overrides["compression"] = df.ssh.compression
+    if df.ssh.window_size is not None:
+        overrides["window_size"] = parse_size(df.ssh.window_size)
+    if df.ssh.max_packet_size is not None:
+        overrides["max_packet_size"] = parse_size(df.ssh.max_packet_size)
+    return settings.model_copy(update=overrides)
+
+
+def measure_upload(ssh: paramiko.SSHClient, payload: bytes, chunk_size: int = 32768) -> float:
+    """Upload throughput in bytes per second, sending payload into `cat > /dev/null` on the remote."""
+    channel = ssh.get_transport().open_session()
+    try:
+        channel.exec_command("cat > /dev/null")
+        view = memoryview(payload)
+        start = time.perf_counter()
+        for offset in range(0, len(payload), chunk_size):
+            channel.sendall(view[offset : offset + chunk_size])
+        channel.shutdown_write()
+        channel.recv_exit_status()
+        elapsed = time.perf_counter() - start
+    finally:
+        channel.close()
+    return len(payload) / max(elapsed, 1e-9)
+
+
+def benchmark_link(
+    connect: Callable[[LinkSettings], paramiko.SSHClient],
+    payload: bytes,
+    on_result: Callable[[LinkSettings, float | None], None] | None = None,
+) -> tuple[LinkSettings, float | None]:
+    """Search for the fastest link settings one dimension at a time.
+
+    Tries each cipher, then each MAC for the fastest cipher (skipped for AEAD
+    ciphers), then compression, then window and packet sizes. Settings the server
+    does not accept, or that negotiate a different algorithm, are skipped.
+
+    Args:
+        connect (Callable[[LinkSettings], paramiko.SSHClient]): Opens a connection using the given settings
+        payload (bytes): Data uploaded for each trial
+        on_result (Callable[[LinkSettings, float | None], None] | None): Called after every trial
+
+    Returns:
+        tuple[LinkSettings, float | None]: Fastest settings and their throughput in bytes per second
+    """
+    best = LinkSettings()
+    best_rate = None
+
+    def trial(settings: LinkSettings) -> float | None:
+        try:
+            ssh = connect(settings)
+        except (paramiko.SSHException, OSError):
+            rate = None
+        else:
+            try:
+                transport = ssh.get_transport()
+                # the server fell back to another algorithm, so this trial would measure the wrong thing
+                if (settings.ciphers and transport.local_cipher != settings.ciphers[0]) or (
+                    settings.macs and transport.local_mac != settings.macs[0]
+                ):
+                    rate = None
+                else:
+                    rate = measure_upload(ssh, payload)
+            finally:
+                ssh.close()
+        if on_result:
+            on_result(settings, rate)
+        return rate
+
+    def run_stage(candidates: list[dict]):
+        nonlocal best, best_rate
+        for update in candidates:
+            settings = best.model_copy(update=update)
+            rate = trial(settings)
+            if rate is not None and (best_rate is None or rate > best_rate):
+                best, best_rate = settings, rate
+
+    run_stage([{"ciphers": [cipher]} for cipher in CIPHER_CANDIDATES])
+    if not best.ciphers or best.ciphers[0] not in AEAD_CIPHERS:
+        run_stage([{"macs": [mac]} for mac in MAC_CANDIDATES])
+    run_stage([{"compression": compression} for compression in (False, True)])
+    run_stage(
+        [
+            {"window_size": window_size, "max_packet_size": packet_size}
+            for window_size, packet_size in itertools.product(WINDOW_SIZES, MAX_PACKET_SIZES)
+        ]
+    )
+    return best, best_rate
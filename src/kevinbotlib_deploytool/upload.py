@@ -0,0 +1,404 @@
+import contextlib
+import hashlib
+import json
+import os
+import queue
+import shlex
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import paramiko
+from pydantic import BaseModel, Field
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+
+# Size of each SFTP write request. paramiko defaults to 32 KiB; OpenSSH accepts up to 256 KiB messages.
+DEFAULT_REQUEST_SIZE = 128 * 1024
+# Unit of work handed to the upload streams
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_STREAMS = 4
+# Seconds between SSH keepalive packets, so a dead link is noticed instead of hanging
+KEEPALIVE_INTERVAL = 5
+# Cache namespace holding the progress of interrupted uploads
+CHECKPOINT_NAMESPACE = "uploads"
+
+# Errors that mean the connection dropped, rather than that the upload can never work
+_LINK_ERRORS = (EOFError, OSError, paramiko.SSHException)
+
+_REMOTE_BLOCK_HASH_SCRIPT = """
+import hashlib, sys
+path, block_size = sys.argv[1], int(sys.argv[2])
+with open(path, "rb") as f:
+    for index in map(int, sys.argv[3:]):
+        f.seek(index * block_size)
+        print(index, hashlib.sha256(f.read(block_size)).hexdigest())
+"""
+
+
+class UploadStats(BaseModel):
+    size: int
+    seconds: float
+    streams: int
+    resumed: int = Field(default=0, description="Bytes that were already on the remote")
+    retries: int = 0
+    repaired: int = Field(default=0, description="Bytes sent again after failing verification")
+
+    @property
+    def rate(self) -> float:
+        """Achieved throughput in bytes per second, not counting resumed data."""
+        return (self.size - self.resumed) / max(self.seconds, 1e-9)
+
+
+def sftp_makedirs(sftp, path):
+    parts = Path(path).parts
+    current = ""
+    for part in parts:
+        current = f"{current}/{part}" if current else part
+        try:
+            sftp.stat(current)
+        except OSError:
+            sftp.mkdir(current)
+
+
+def plan_blocks(size: int, block_size: int) -> list[tuple[int, int]]:
+    """Split a file into (offset, length) blocks."""
+    return [(offset, min(block_size, size - offset)) for offset in range(0, size, block_size)]
+
+
+def _open_remote(sftp: paramiko.SFTPClient, path: str, mode: str, request_size: int) -> paramiko.SFTPFile:
+    remote = sftp.open(path, mode)
+    # writes are acknowledged in the background instead of one round trip per request
+    remote.set_pipelined(True)
+    remote.MAX_REQUEST_SIZE = request_size
+    return remote
+
+
+def upload_file(
+    ssh: paramiko.SSHClient,
+    local_path: str | os.PathLike,
+    remote_path: str,
+    *,
+    streams: int = DEFAULT_STREAMS,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    request_size: int = DEFAULT_REQUEST_SIZE,
+    progress: Callable[[int], None] | None = None,
+    blocks: list[int] | None = None,
+    on_block: Callable[[int], None] | None = None,
+    digests: dict[int, str] | None = None,
+) -> UploadStats:
+    """Upload a file with pipelined writes over several concurrent SFTP sessions.
+
+    Each stream opens its own SFTP channel and writes whole blocks at their offsets,
+    so neither the round trip time nor a single channel's window limits throughput.
+    Files smaller than two blocks are sent over a single stream.
+
+    Args:
+        ssh (paramiko.SSHClient): Connected client
+        local_path (str | os.PathLike): File to upload
+        remote_path (str): Destination, created if missing and resized to the local size
+        streams (int): Maximum number of concurrent SFTP sessions
+        block_size (int): Bytes written per unit of work
+        request_size (int): Bytes per SFTP write request
+        progress (Callable[[int], None] | None): Called with the number of bytes sent after every write
+        blocks (list[int] | None): Indices of the blocks to send, all of them by default
+        on_block (Callable[[int], None] | None): Called with the index of every block once it is fully sent
+        digests (dict[int, str] | None): Filled with the SHA-256 of every block sent, hashed as it is read
+
+    Returns:
+        UploadStats: Size, duration and stream count of the transfer
+    """
+    size = os.path.getsize(local_path)
+    all_blocks = plan_blocks(size, block_size)
+    indices = range(len(all_blocks)) if blocks is None else blocks
+    streams = max(1, min(streams, len(indices) // 2 or 1))
+
+    work = queue.Queue()
+    for index in indices:
+        work.put(index)
+    callback_lock = threading.Lock()
+
+    def report(sent: int):
+        if progress:
+            with callback_lock:
+                progress(sent)
+
+    def block_done(index: int, digest: str):
+        with callback_lock:
+            if digests is not None:
+                digests[index] = digest
+            if on_block:
+                on_block(index)
+
+    def run_stream(sftp: paramiko.SFTPClient):
+        with (
+            open(local_path, "rb") as src,
+            _open_remote(sftp, remote_path, "r+b", request_size) as dst,
+        ):
+            while True:
+                try:
+                    index = work.get_nowait()
+                except queue.Empty:
+                    return
+                offset, length = all_blocks[index]
+                src.seek(offset)
+                dst.seek(offset)
+                remaining = length
+                digest = hashlib.sha256()
+                while remaining:
+                    chunk = src.read(min(request_size, remaining))
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+                    report(len(chunk))
+                block_done(index, digest.hexdigest())
+
+    start = time.perf_counter()
+    primary = ssh.open_sftp()
+    sessions = [primary]
+    try:
+        # create the file at full size up front so every stream can write into it,
+        # keeping anything already there so an interrupted upload can be resumed
+        with primary.open(remote_path, "ab") as f:
+            f.truncate(size)
+        sessions += [ssh.open_sftp() for _ in range(streams - 1)]
+        with ThreadPoolExecutor(max_workers=streams) as executor:
+            for future in [executor.submit(run_stream, sftp) for sftp in sessions]:
+                future.result()
+    finally:
+        for sftp in sessions:
+            sftp.close()
+    return UploadStats(size=size, seconds=time.perf_counter() - start, streams=streams)
+
+
+class UploadCheckpoint(BaseModel):
+    """Blocks of an upload that were fully sent before the link dropped."""
+
+    size: int
+    block_size: int
+    done: list[int] = Field(default_factory=list)
+
+
+def block_hashes(path: str | os.PathLike, block_size: int, indices) -> dict[int, str]:
+    hashes = {}
+    with open(path, "rb") as f:
+        for index in indices:
+            f.seek(index * block_size)
+            hashes[index] = hashlib.sha256(f.read(block_size)).hexdigest()
+    return hashes
+
+
+def remote_block_hashes_command(python: str, remote_path: str, block_size: int, indices) -> str:
+    args = " ".join(str(index) for index in indices)
+    return f"{python} -c {shlex.quote(_REMOTE_BLOCK_HASH_SCRIPT)} {shlex.quote(remote_path)} {block_size} {args}"
+
+
+def parse_block_hashes(output: str) -> dict[int, str]:
+    hashes = {}
+    for line in output.splitlines():
+        index, _, digest = line.partition(" ")
+        if index.isdigit() and digest:
+            hashes[int(index)] = digest.strip()
+    return hashes
+
+
+def verify_remote_blocks(
+    ssh: paramiko.SSHClient, python: str, remote_path: str, block_size: int, expected: dict[int, str]
+) -> list[int]:
+    """Indices of the blocks whose remote content has the expected hash."""
+    indices = sorted(expected)
+    if not indices:
+        return []
+    _, stdout, _ = ssh.exec_command(remote_block_hashes_command(python, remote_path, block_size, indices))
+    remote = parse_block_hashes(stdout.read().decode())
+    if stdout.channel.recv_exit_status() != 0:
+        return []
+    return [index for index in indices if remote.get(index) == expected[index]]
+
+
+def remote_sha256(ssh: paramiko.SSHClient, remote_path: str) -> str | None:
+    _, stdout, _ = ssh.exec_command(f"sha256sum {shlex.quote(remote_path)}")
+    output = stdout.read().decode().split()
+    if stdout.channel.recv_exit_status() != 0 or not output:
+        return None
+    return output[0]
+
+
+class UploadVerificationError(Exception):
+    """The uploaded file still did not match its hash after re-sending the damaged blocks."""
+
+
+def resumable_upload(
+    connect: Callable[[], paramiko.SSHClient],
+    local_path: str | os.PathLike,
+    remote_path: str,
+    *,
+    ssh: paramiko.SSHClient | None = None,
+    checkpoints: ArtifactCache | None = None,
+    checkpoint_key: str | None = None,
+    python: str = "python3",
+    sha256: str | None = None,
+    retries: int = 5,
+    backoff: float = 1.0,
+    max_backoff: float = 30.0,
+    streams: int = DEFAULT_STREAMS,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    progress: Callable[[int], None] | None = None,
+    on_retry: Callable[[int, float, Exception], None] | None = None,
+) -> tuple[paramiko.SSHClient, UploadStats]:
+    """Upload a file, resuming after dropped connections.
+
+    Every fully sent block is recorded in a local checkpoint. Before sending, the
+    checkpointed blocks are hashed on the remote and compared with the local file, and
+    only blocks that are missing or differ are sent. When the link drops, the client
+    reconnects with exponential backoff and carries on from the checkpoint, which also
+    survives across deploys.
+
+    When sha256 is given, the finished file is checked with one `sha256sum` on the
+    remote. On a mismatch, every block is compared with the hash taken while it was
+    sent, and only the damaged blocks are sent again.
+
+    Args:
+        connect (Callable[[], paramiko.SSHClient]): Opens a new connection
+        local_path (str | os.PathLike): File to upload
+        remote_path (str): Destination; should be named after the file's content hash
+        ssh (paramiko.SSHClient | None): Existing connection to use first
+        checkpoints (ArtifactCache | None): Where checkpoints are stored
+        checkpoint_key (str | None): Checkpoint name, the remote path by default
+        python (str): Remote interpreter used to hash blocks
+        sha256 (str | None): Expected SHA-256 of the whole file
+        retries (int): Reconnect attempts before giving up
+        backoff (float): Delay before the first reconnect, doubled on every attempt
+        max_backoff (float): Longest delay between reconnects
+        streams (int): Maximum number of concurrent SFTP sessions
+        block_size (int): Bytes per block
+        progress (Callable[[int], None] | None): Called with the total bytes on the remote so far
+        on_retry (Callable[[int, float, Exception], None] | None): Called with the attempt, delay and error
+
+    Returns:
+        tuple[paramiko.SSHClient, UploadStats]: Connection in use after the upload, and transfer statistics
+    """
+    checkpoints = checkpoints or ArtifactCache()
+    checkpoint_key = checkpoint_key or remote_path
+    size = os.path.getsize(local_path)
+    blocks = plan_blocks(size, block_size)
+
+    checkpoint = _load_checkpoint(checkpoints, checkpoint_key)
+    if checkpoint is None or checkpoint.size != size or checkpoint.block_size != block_size:
+        checkpoint = UploadCheckpoint(size=size, block_size=block_size)
+
+    lock = threading.Lock()
+    digests = {}
+    completed = 0
+    resumed = None
+    repaired = 0
+    attempt = 0
+    start = time.perf_counter()
+
+    def advance(sent: int):
+        nonlocal completed
+        completed += sent
+        if progress:
+            progress(completed)
+
+    def mark_done(index: int):
+        with lock:
+            checkpoint.done.append(index)
+            checkpoints.put_bytes(CHECKPOINT_NAMESPACE, checkpoint_key, checkpoint.model_dump_json().encode())
+
+    while True:
+        try:
+            if ssh is None:
+                ssh = connect()
+            expected = block_hashes(local_path, block_size, set(checkpoint.done))
+            confirmed = verify_remote_blocks(ssh, python, remote_path, block_size, expected)
+            digests.update(expected)
+            checkpoint.done = confirmed
+            completed = sum(blocks[index][1] for index in confirmed)
+            if resumed is None:
+                resumed = completed
+            advance(0)
+
+            stats = upload_file(
+                ssh,
+                local_path,
+                remote_path,
+                streams=streams,
+                block_size=block_size,
+                progress=advance,
+                blocks=[index for index in range(len(blocks)) if index not in set(confirmed)],
+                on_block=mark_done,
+                digests=digests,
+            )
+            if sha256 is not None:
+                repaired += _repair_upload(ssh, local_path, remote_path, sha256, python, block_size, digests, streams)
+        except (FileNotFoundError, PermissionError):
+            raise
+        except _LINK_ERRORS as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+            if on_retry:
+                on_retry(attempt, delay, e)
+            if ssh is not None:
+                with contextlib.suppress(Exception):
+                    ssh.close()
+                ssh = None
+            time.sleep(delay)
+            continue
+
+        checkpoints.remove(CHECKPOINT_NAMESPACE, checkpoint_key)
+        return ssh, UploadStats(
+            size=size,
+            seconds=time.perf_counter() - start,
+            streams=stats.streams,
+            resumed=resumed,
+            retries=attempt,
+            repaired=repaired,
+        )
+
+
+def _repair_upload(
+    ssh: paramiko.SSHClient,
+    local_path: str | os.PathLike,
+    remote_path: str,
+    sha256: str,
+    python: str,
+    block_size: int,
+    digests: dict[int, str],
+    streams: int,
+    rounds: int = 3,
+) -> int:
+    """Check the whole remote file and re-send damaged blocks until it matches.
+
+    Returns:
+        int: Bytes sent again
+    """
+    blocks = plan_blocks(os.path.getsize(local_path), block_size)
+    repaired = 0
+    for _ in range(rounds):
+        if remote_sha256(ssh, remote_path) == sha256:
+            return repaired
+        intact = set(verify_remote_blocks(ssh, python, remote_path, block_size, digests))
+        damaged = [index for index in range(len(blocks)) if index not in intact] or list(range(len(blocks)))
+        upload_file(
+            ssh, local_path, remote_path, streams=streams, block_size=block_size, blocks=damaged, digests=digests
+        )
+        repaired += sum(blocks[index][1] for index in damaged)
+    if remote_sha256(ssh, remote_path) == sha256:
+        return repaired
+    msg = f"{remote_path} does not match SHA-256 {sha256} after re-sending damaged blocks"
+    raise UploadVerificationError(msg)
+
+
+def _load_checkpoint(checkpoints: ArtifactCache, key: str) -> UploadCheckpoint | None:
+    data = checkpoints.read_bytes(CHECKPOINT_NAMESPACE, key)
+    if data is None:
+        return None
+    try:
+        return UploadCheckpoint.model_validate(json.loads(data))
+    except ValueError:
+        return None
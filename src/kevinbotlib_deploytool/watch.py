@@ -0,0 +1,97 @@
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from kevinbotlib_deploytool.packaging import exclude_pycache
+
+# Project directories pushed by `deploy --watch`
+WATCHED_DIRS = ("src", "assets", "deploy")
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def snapshot(
+    root: Path, dirs: tuple[str, ...] = WATCHED_DIRS, exclude: Callable[[str], bool] = exclude_pycache
+) -> Snapshot:
+    """Modification time and size of every file below dirs, keyed by POSIX path relative to root."""
+    files = {}
+    for name in dirs:
+        top = root / name
+        if not top.is_dir():
+            continue
+        for current, subdirs, filenames in os.walk(top):
+            relative = Path(current).relative_to(root).as_posix()
+            subdirs[:] = [d for d in subdirs if not exclude(f"{relative}/{d}")]
+            for filename in filenames:
+                path = f"{relative}/{filename}"
+                if exclude(path):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(current, filename))
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> tuple[list[str], list[str]]:
+    """Files that were added or modified, and files that were deleted."""
+    changed = sorted(path for path, state in new.items() if old.get(path) != state)
+    deleted = sorted(path for path in old if path not in new)
+    return changed, deleted
+
+
+class ChangeWatcher:
+    """Polls the project for changes to files that `deploy --watch` pushes.
+
+    Polling keeps this free of platform specific file notification APIs; scanning a
+    robot project takes a few milliseconds.
+    """
+
+    def __init__(self, root: Path, dirs: tuple[str, ...] = WATCHED_DIRS, interval: float = 0.1, debounce: float = 0.15):
+        self.root = root
+        self.dirs = dirs
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = snapshot(root, dirs)
+
+    def poll(self) -> tuple[list[str], list[str]]:
+        """Changes since the last call, without waiting."""
+        current = snapshot(self.root, self.dirs)
+        changes = diff_snapshots(self._snapshot, current)
+        self._snapshot = current
+        return changes
+
+    def wait(self) -> tuple[list[str], list[str]]:
+        """Block until files change, then until they stay unchanged for the debounce period.
+
+        Returns:
+            tuple[list[str], list[str]]: Changed and deleted files
+        """
+        changed, deleted = set(), set()
+        quiet_since = None
+        while True:
+            new_changed, new_deleted = self.poll()
+            if new_changed or new_deleted:
+                changed = (changed | set(new_changed)) - set(new_deleted)
+                deleted = (deleted | set(new_deleted)) - set(new_changed)
+                quiet_since = time.monotonic()
+            elif quiet_since is not None and time.monotonic() - quiet_since >= self.debounce:
+                return sorted(changed), sorted(deleted)
+            time.sleep(self.interval)
+
+
+def remote_destinations(path: str, remote_code_dir: str, package: str, package_dir: str | None) -> list[str]:
+    """Remote locations a project file is pushed to.
+
+    Files are mirrored into the extracted robot code, and package sources under
+    `src/<package>/` are also written into the installed copy in the venv, which is
+    what the service actually imports.
+    """
+    destinations = [f"{remote_code_dir}/{path}"]
+    prefix = f"src/{package}/"
+    # in source mode the package is imported straight from the extracted code
+    if package_dir and package_dir != f"{remote_code_dir}/src/{package}" and path.startswith(prefix):
+        destinations.append(f"{package_dir}/{path.removeprefix(prefix)}")
+    return destinations
@@ -0,0 +1,110 @@
+"""In-memory stand-ins for the paramiko objects the deploy tool talks to."""
+
+import io
+
+
+class FakeChannel:
+    def __init__(self, code=0):
+        self.code = code
+
+    def recv_exit_status(self):
+        return self.code
+
+    def exit_status_ready(self):
+        return True
+
+
+class FakeStream(io.BytesIO):
+    def __init__(self, data=b"", code=0):
+        super().__init__(data)
+        self.channel = FakeChannel(code)
+
+
+class FakeTransport:
+    def __init__(self, host_key=None):
+        self.host_key = host_key
+
+    def is_active(self):
+        return True
+
+    def get_remote_server_key(self):
+        return self.host_key
+
+
+class FakeWriter(io.StringIO):
+    def __init__(self, files, path):
+        super().__init__()
+        self.files = files
+        self.path = path
+
+    def __exit__(self, *args):
+        self.files[self.path] = self.getvalue()
+        return super().__exit__(*args)
+
+
+class FakeSFTP:
+    """Remote files kept in a dict of path to contents (str, or bytes when read in binary)."""
+
+    def __init__(self, files):
+        self.files = files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def open(self, path, mode="r"):
+        if "w" in mode:
+            return FakeWriter(self.files, path)
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        data = self.files[path]
+        return io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+
+    def stat(self, path):
+        if path not in self.files and not any(name.startswith(path + "/") for name in self.files):
+            raise FileNotFoundError(path)
+
+    def mkdir(self, path):
+        self.files.setdefault(path + "/", "")
+
+    def put(self, local, path):
+        with open(local) as f:
+            self.files[path] = f.read()
+
+    def remove(self, path):
+        if self.files.pop(path, None) is None:
+            raise FileNotFoundError(path)
+
+    def close(self):
+        pass
+
+
+class FakeSSH:
+    """Answers commands by their first matching prefix with (stdout, exit code).
+
+    Unmatched commands succeed without output; failing ones write "boom" to stderr.
+    """
+
+    def __init__(self, responses=None, files=None, *, host_key=None):
+        self.responses = responses or {}
+        self.files = {} if files is None else files
+        self.transport = FakeTransport(host_key)
+        self.commands = []
+
+    def get_transport(self):
+        return self.transport
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        for prefix, (output, code) in self.responses.items():
+            if command.startswith(prefix):
+                return None, FakeStream(output, code), FakeStream(b"boom" if code else b"")
+        return None, FakeStream(), FakeStream()
+
+    def open_sftp(self):
+        return FakeSFTP(self.files)
+
+    def close(self):
+        pass
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import shutil
+import socket
+import sys
+
+import paramiko
+import pygit2
+import pytest
+
+from kevinbotlib_deploytool.api import (
+    AsyncDeployer,
+    AsyncServiceManager,
+    Deployer,
+    DeployOptions,
+    DeployToolError,
+    RemoteCommandError,
+    Robot,
+    RobotConnectionError,
+    ServiceFailedError,
+    ServiceManager,
+    ServiceProfiler,
+    VenvManager,
+    collect_garbage,
+    read_deployed_manifest,
+)
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.manifest import remote_manifest_path
+from tests.conftest import FakeSSH
+
+RUNNING = b"LoadState=loaded\nActiveState=active\nSubState=running\nMainPID=42\n"
+FAILED = b"LoadState=loaded\nActiveState=failed\nSubState=failed\nMainPID=0\nNRestarts=3\n"
+
+
+def make_robot(responses, files=None):
+    df = DeployTarget(name="bot", user="robot", host="10.0.0.2")
+    return Robot(df, ssh=FakeSSH(responses, files))
+
+
+def test_service_status_and_errors():
+    robot = make_robot({"systemctl --user show": (RUNNING, 0)})
+    status = ServiceManager(robot).status()
+    assert status.active_state == "active"
+    assert status.main_pid == 42
+
+    robot = make_robot({"systemctl --user show": (b"", 1)})
+    with pytest.raises(RemoteCommandError) as info:
+        ServiceManager(robot).status()
+    assert info.value.stderr == "boom"
+
+
+def test_service_status_on_a_dropped_connection():
+    robot = make_robot({})
+
+    def dropped(_command):
+        msg = "SSH session not active"
+        raise paramiko.SSHException(msg)
+
+    robot.ssh.exec_command = dropped
+    with pytest.raises(RobotConnectionError, match=r"10\.0\.0\.2"):
+        ServiceManager(robot).status()
+
+
+def test_wait_ready_reports_failure():
+    robot = make_robot({"systemctl --user show": (FAILED, 0)})
+    with pytest.raises(ServiceFailedError) as info:
+        ServiceManager(robot).wait_ready(timeout=1, grace=0, poll_interval=0)
+    assert info.value.status.n_restarts == 3
+
+
+def test_wait_ready_measures_startup_on_the_robot_clock():
+    started = RUNNING + b"ExecMainStartTimestampMonotonic=10000000\n"
+    journal = json.dumps({"__MONOTONIC_TIMESTAMP": "11250000", "MESSAGE": "Robot ready"}).encode()
+    robot = make_robot(
+        {"systemctl --user show": (started, 0), "cat /proc/uptime": (b"12.50 40.00\n", 0), "journalctl": (journal, 0)}
+    )
+    report = ServiceManager(robot).wait_ready(timeout=1, grace=0, ready_pattern="ready$", poll_interval=0)
+    assert report.startup_seconds == 2.5
+    assert report.ready_after == 1.25
+
+
+def test_wait_ready_rejects_invalid_pattern():
+    robot = make_robot({"systemctl --user show": (RUNNING, 0)})
+    with pytest.raises(DeployToolError, match="Invalid ready pattern"):
+        ServiceManager(robot).wait_ready(timeout=1, grace=0, ready_pattern="(", poll_interval=0)
+    assert robot.ssh.commands == []
+
+
+def test_venv_manager():
+    probe = b"venv\t0\ninterpreter\t/usr/bin/python3\t0\tPython 3.11.2\nvenv_module\t/usr/bin/python3\t1\n"
+    robot = make_robot({"test -d": (b"missing\n", 0), "sh -c": (probe, 0)})
+    venv = VenvManager(robot)
+    assert not venv.delete()
+    assert venv.create() == "3.11"
+    assert any(command.endswith("-m venv $HOME/bot/env") for command in robot.ssh.commands)
+
+
+def test_venv_delete_forgets_the_deployed_build():
+    path = remote_manifest_path(DeployTarget(name="bot", user="robot", host="10.0.0.2"))
+    deployed = {"fingerprint": "abc", "deps": "def", "wheels": {"bot.whl": "123"}, "files": {"a.py": "456"}}
+    robot = make_robot({"test -d": (b"exists\n", 0)}, {path: json.dumps(deployed)})
+    assert VenvManager(robot).delete()
+    # the next deploy is not skipped and reinstalls the dependencies into the new venv
+    assert json.loads(robot.ssh.files[path]) == {"files": {"a.py": "456"}}
+
+
+def test_venv_manager_rejects_broken_interpreter():
+    probe = b"venv\t0\ninterpreter\t/usr/bin/python3\t127\tnot found\n"
+    robot = make_robot({"sh -c": (probe, 0)})
+    with pytest.raises(DeployToolError, match="not found"):
+        VenvManager(robot).create()
+    assert not any("-m venv $HOME" in command for command in robot.ssh.commands)
+
+
+def profile_briefly(profiler):
+    # the order `robot profile` uses
+    try:
+        profiler.start(1)
+    finally:
+        profiler.restore()
+
+
+def test_profiler_restores_the_service_after_a_failed_restart():
+    robot = make_robot({"test -f": (b"exists\n", 0), "systemctl --user daemon-reload &&": (b"", 1)})
+    profiler = ServiceProfiler(robot)
+    with pytest.raises(RemoteCommandError):
+        profile_briefly(profiler)
+    assert robot.ssh.commands[-1].startswith(f"rm -f {profiler.override_path} && ")
+    assert "Restart=no" in robot.ssh.files[profiler.override_path]
+
+
+def test_profiler_restore_without_start_does_nothing():
+    robot = make_robot({"test -f": (b"missing\n", 0)})
+    profiler = ServiceProfiler(robot)
+    with pytest.raises(DeployToolError, match="not installed"):
+        profile_briefly(profiler)
+    assert not any(command.startswith("rm -f") for command in robot.ssh.commands)
+
+
+def test_collect_garbage_dry_run():
+    inventory = b"2048\t100\tbot/releases/20240101T000000\n2048\t200\tbot/releases/20240102T000000\n"
+    robot = make_robot({"cd $HOME": (inventory, 0)})
+    report = collect_garbage(robot, 3 * 1024 * 1024, dry_run=True)
+    assert report.total == 4 * 1024 * 1024
+    assert [entry.path for entry in report.evicted] == ["bot/releases/20240101T000000"]
+    assert not any("trash" in command for command in robot.ssh.commands)
+
+
+def test_async_service_manager():
+    robot = make_robot({"systemctl --user show": (RUNNING, 0)})
+
+    async def main():
+        return await AsyncServiceManager(robot).status()
+
+    assert asyncio.run(main()).sub_state == "running"
+
+
+def make_project(path):
+    repo = pygit2.init_repository(str(path))
+    (path / "Deployfile.toml").write_text('[target]\nname = "bot"\nuser = "robot"\nhost = "10.0.0.2"\n')
+    (path / "pyproject.toml").write_text('[project]\nname = "bot"\ndependencies = ["kevinbotlib"]\n')
+    (path / "src" / "bot").mkdir(parents=True)
+    (path / "src" / "bot" / "__main__.py").write_text("print('hi')\n")
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("Test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "init", repo.index.write_tree(), [])
+
+
+def test_connection_failures_are_deploy_tool_errors():
+    with socket.socket() as listener:
+        # bound but not listening, so connecting is refused
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        robot = Robot(DeployTarget(name="bot", user="robot", host="127.0.0.1", port=port), pkey=object())
+        with pytest.raises(RobotConnectionError, match=f"robot@127.0.0.1:{port}"):
+            robot.connect()
+
+
+def test_build_manifest_outside_git_is_a_deploy_tool_error(tmp_path):
+    make_project(tmp_path)
+    shutil.rmtree(tmp_path / ".git")
+    robot = Robot.from_directory(tmp_path)
+    with pytest.raises(DeployToolError, match="git repository"):
+        Deployer(robot, tmp_path).build_manifest("off")
+
+
+def test_validate(tmp_path):
+    make_project(tmp_path)
+    robot = Robot.from_directory(tmp_path)
+    Deployer(robot, tmp_path).validate()
+
+    with pytest.raises(DeployToolError, match="Custom wheel not found"):
+        Deployer(robot, tmp_path, DeployOptions(custom_wheels=[tmp_path / "missing.whl"])).validate()
+
+    with pytest.raises(DeployToolError, match="Invalid ready pattern"):
+        Deployer(robot, tmp_path, DeployOptions(ready_pattern="[ready")).validate()
+
+    (tmp_path / "src" / "bot" / "__main__.py").unlink()
+    with pytest.raises(DeployToolError, match="must contain"):
+        Deployer(robot, tmp_path).validate()
+
+
+def test_up_to_date_deploy_does_nothing(tmp_path):
+    make_project(tmp_path)
+    options = DeployOptions(bytecode="off")
+    robot = Robot.from_directory(tmp_path)
+    manifest = Deployer(robot, tmp_path, options).build_manifest("off")
+    robot.ssh = FakeSSH({}, {remote_manifest_path(robot.df): json.dumps(manifest)})
+
+    events = []
+
+    async def main():
+        return await AsyncDeployer(robot, tmp_path, options, on_event=events.append).deploy()
+
+    result = asyncio.run(main())
+    assert result.up_to_date
+    assert result.manifest["git"]["branch"] in ("master", "main")
+    assert [(event.stage, event.kind) for event in events] == [("connect", "start"), ("connect", "done")]
+    assert robot.ssh.commands == []
+
+
+def test_local_manifest_reuses_the_deployed_build_options(tmp_path):
+    make_project(tmp_path)
+    # outside the project, so deleting it leaves the dirty state alone
+    wheel = tmp_path.parent / "extra-1.0-py3-none-any.whl"
+    wheel.write_bytes(b"wheel")
+    robot = Robot.from_directory(tmp_path)
+    options = DeployOptions(bytecode="local", bytecode_optimize=2, custom_wheels=[wheel])
+    deployed = Deployer(robot, tmp_path, options).build_manifest("local")
+    assert deployed["build"]["bytecode_optimize"] == 2
+    wheel.unlink()
+
+    # a deployer with default options rebuilds the same fingerprint from the recorded options
+    deployer = Deployer(robot, tmp_path)
+    assert deployer.build_manifest("off")["fingerprint"] != deployed["fingerprint"]
+    assert deployer.build_manifest_like(json.loads(json.dumps(deployed)))["fingerprint"] == deployed["fingerprint"]
+
+
+def test_plan_diffs_files_against_the_robot(tmp_path):
+    make_project(tmp_path)
+    options = DeployOptions(bytecode="off")
+    robot = Robot.from_directory(tmp_path)
+    manifest = Deployer(robot, tmp_path, options).build_manifest("off")
+    assert set(manifest["files"]) == {"pyproject.toml", "src/bot/__main__.py"}
+    manifest["files"]["src/bot/old.py"] = {"sha256": "0" * 64, "size": 0}
+
+    (tmp_path / "src" / "bot" / "__main__.py").write_text("print('changed')\n")
+    (tmp_path / "src" / "bot" / "new.py").write_text("")
+    robot.ssh = FakeSSH({}, {remote_manifest_path(robot.df): json.dumps(manifest)})
+
+    plan = Deployer(robot, tmp_path, options).plan()
+    assert not plan.up_to_date
+    assert plan.mode == "source"
+    assert not plan.deps_changed
+    assert (plan.added, plan.changed, plan.removed) == (["src/bot/new.py"], ["src/bot/__main__.py"], ["src/bot/old.py"])
+    assert plan.upload_bytes > 0
+    assert not plan.wheels
+    assert robot.ssh.commands == []
+    # without a service the deploy only warns, it starts nothing
+    assert not plan.restart
+    assert not any(step.startswith(("Stop", "Start")) for step in plan.steps)
+    assert "no bot.service is installed" in plan.steps[1]
+
+    robot.ssh.files[ServiceManager(robot).unit_path] = ""
+    plan = Deployer(robot, tmp_path, options).plan()
+    assert plan.restart
+    assert "Stop bot.service" in plan.steps
+    assert plan.steps[-2].startswith("Start bot.service")
+
+    plan = Deployer(robot, tmp_path, DeployOptions(bytecode="off", mode="wheel")).plan()
+    assert plan.upload_estimated
+    assert plan.wheels == ["bot"]
+    assert plan.steps[0] == "Build the robot wheel"
+
+
+def test_index_packaging(tmp_path):
+    make_project(tmp_path)
+    with (tmp_path / "Deployfile.toml").open("a") as f:
+        f.write('[package]\nsource = "index"\ninclude = ["assets/*.bin"]\n')
+    (tmp_path / "src" / "bot" / "notes.txt~").write_text("backup")
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "model.bin").write_bytes(b"weights")
+    deployer = Deployer(Robot.from_directory(tmp_path), tmp_path)
+
+    manifest = deployer.build_manifest("off")
+    assert sorted(manifest["files"]) == ["assets/model.bin", "pyproject.toml", "src/bot/__main__.py"]
+    assert {arcname for _, arcname in deployer.archive_sources(tmp_path, "off", None)} == set(manifest["files"])
+
+    # untracked files that are not packaged do not change the build
+    (tmp_path / "src" / "bot" / ".__main__.py.swp").write_bytes(b"swap")
+    (tmp_path / "recording.bag").write_bytes(b"large")
+    unpackaged = deployer.build_manifest("off")
+    assert unpackaged["fingerprint"] == manifest["fingerprint"]
+    assert unpackaged["git"] == manifest["git"]
+
+    (tmp_path / "assets" / "model.bin").write_bytes(b"new weights")
+    assert deployer.build_manifest("off")["fingerprint"] != manifest["fingerprint"]
+
+    # local bytecode only covers packaged modules, even if a scratch module does not compile
+    (tmp_path / "src" / "bot" / "scratch.py").write_text("def broken(:\n")
+    compiled = [arcname for _, arcname in deployer.archive_sources(tmp_path / "build", "local", None)]
+    assert [arcname for arcname in compiled if arcname.endswith(".pyc")] == [
+        f"src/bot/__pycache__/__main__.{sys.implementation.cache_tag}.pyc"
+    ]
+
+
+def test_read_deployed_manifest(tmp_path):
+    make_project(tmp_path)
+    robot = Robot.from_directory(tmp_path)
+    robot.ssh = FakeSSH({}, {remote_manifest_path(robot.df): json.dumps({"robot": "bot"})})
+    assert read_deployed_manifest(robot) == {"robot": "bot"}
+    assert robot.ssh.commands == []
@@ -0,0 +1,41 @@
+import sys
+import tempfile
+from pathlib import Path
+
+from kevinbotlib_deploytool.bytecode import (
+    compile_tree_locally,
+    local_interpreter_matches,
+    remote_compile_command,
+    resolve_bytecode_mode,
+)
+
+LOCAL_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def test_resolve_bytecode_mode():
+    assert resolve_bytecode_mode("remote", LOCAL_VERSION) == "remote"
+    assert resolve_bytecode_mode("off", LOCAL_VERSION) == "off"
+    assert resolve_bytecode_mode("auto", "2.7") == "remote"
+    if local_interpreter_matches(LOCAL_VERSION):
+        assert resolve_bytecode_mode("auto", LOCAL_VERSION + ".4") == "local"
+
+
+def test_compile_tree_locally():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "src"
+        (source / "robot" / "__pycache__").mkdir(parents=True)
+        (source / "robot" / "__main__.py").write_text("print('hi')\n")
+        (source / "robot" / "__pycache__" / "stale.py").write_text("")
+
+        compiled = compile_tree_locally(source, Path(tmpdir) / "out", "src", "/home/robot/robot/src")
+
+        assert len(compiled) == 1
+        pyc_path, arcname = compiled[0]
+        assert pyc_path.exists()
+        assert arcname == f"src/robot/__pycache__/__main__.{sys.implementation.cache_tag}.pyc"
+        # checked-hash pycs set bit 0b11 in the flags word of the header
+        assert int.from_bytes(pyc_path.read_bytes()[4:8], "little") == 0b11
+
+
+def test_remote_compile_command():
+    assert remote_compile_command("python3", ["a", "b"], 1) == "python3 -m compileall -q -j0 -o 1 a b"
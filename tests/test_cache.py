@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import pytest
+from click.testing import CliRunner
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.cli.cache import prune_command
+
+
+@pytest.fixture
+def cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield ArtifactCache(root=tmpdir, budgets={"small": 100})
+
+
+def test_put_and_get(cache):
+    assert cache.get("manifests", "robot") is None
+    path = cache.put_bytes("manifests", "robot", b"{}")
+    assert cache.get("manifests", "robot") == path
+    assert cache.read_bytes("manifests", "robot") == b"{}"
+    assert cache.remove("manifests", "robot")
+    assert not cache.remove("manifests", "robot")
+
+
+def test_put_file(cache):
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(b"wheel")
+    try:
+        path = cache.put_file("wheels", "robot-1.0-py3-none-any.whl", f.name)
+    finally:
+        os.remove(f.name)
+    assert os.path.basename(path) == "robot-1.0-py3-none-any.whl"
+    assert cache.read_bytes("wheels", "robot-1.0-py3-none-any.whl") == b"wheel"
+
+
+def test_unsafe_keys_are_hashed(cache):
+    path = cache.put_bytes("facts", "robot@host:22/../x", b"data")
+    assert os.path.dirname(path) == os.path.join(cache.root, "facts")
+    assert cache.read_bytes("facts", "robot@host:22/../x") == b"data"
+
+
+def test_lru_eviction(cache):
+    cache.put_bytes("small", "a", b"x" * 40)
+    cache.put_bytes("small", "b", b"x" * 40)
+    os.utime(cache.path("small", "a"), (1, 1))
+    os.utime(cache.path("small", "b"), (2, 2))
+    cache.get("small", "a")  # a is now the most recently used
+
+    cache.put_bytes("small", "c", b"x" * 40)
+    assert cache.get("small", "b") is None
+    assert cache.get("small", "a") is not None
+    assert cache.get("small", "c") is not None
+
+
+def test_oversized_entry_is_kept(cache):
+    path = cache.put_bytes("small", "big", b"x" * 200)
+    assert os.path.exists(path)
+
+
+def test_stats_and_prune(cache):
+    cache.put_bytes("small", "a", b"x" * 10)
+    cache.put_bytes("other", "b", b"x" * 20)
+    stats = cache.stats()
+    assert stats["small"] == {"entries": 1, "size": 10, "budget": 100}
+    assert stats["other"]["size"] == 20
+
+    assert len(cache.prune(budget=0)) == 2
+    assert cache.stats()["small"]["entries"] == 0
+
+
+@pytest.mark.parametrize("namespace", ["..", "../..", "a/../..", ".", "..."])
+def test_namespace_traversal_is_refused(tmp_path, namespace):
+    outside = tmp_path / "outside"
+    outside.write_bytes(b"keep")
+    cache = ArtifactCache(root=str(tmp_path / "cache"))
+    cache.put_bytes("small", "a", b"x")
+
+    with pytest.raises(ValueError, match="Invalid cache namespace"):
+        cache.prune(namespace, 0)
+    with pytest.raises(ValueError, match="Invalid cache namespace"):
+        cache.put_bytes(namespace, "key", b"x")
+    assert outside.read_bytes() == b"keep"
+    assert cache.get("small", "a") is not None
+
+
+def test_prune_command_rejects_traversal(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    outside = tmp_path / "outside"
+    outside.write_bytes(b"keep")
+
+    result = CliRunner().invoke(prune_command, ["-n", "../..", "--all"])
+    assert result.exit_code == 2
+    assert "Invalid cache namespace" in result.output
+    assert outside.read_bytes() == b"keep"
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import threading
+
+import pygit2
+import pytest
+
+from kevinbotlib_deploytool.api import Deployer, DeployOptions, DeployToolError, Robot
+from kevinbotlib_deploytool.daemon import DAEMON_SUPPORTED, DaemonClient, DaemonError, DeployDaemon
+from kevinbotlib_deploytool.manifest import remote_manifest_path
+from tests.conftest import FakeSSH
+
+pytestmark = pytest.mark.skipif(not DAEMON_SUPPORTED, reason="needs Unix domain sockets")
+
+DEPLOYFILE = """
+[target]
+name = "bot"
+user = "robot"
+host = "10.0.0.2"
+"""
+
+RUNNING = b"LoadState=loaded\nActiveState=active\nSubState=running\nMainPID=42\n"
+
+
+class FakePool:
+    def __init__(self):
+        self.ssh = FakeSSH({"": (RUNNING, 0)})
+        self.opened = []
+
+    def connected(self, _df):
+        return bool(self.opened)
+
+    def get(self, df):
+        self.opened.append(df.host)
+        return self.ssh
+
+    def private_key(self, _name):
+        return None
+
+    def adopt(self, _df, client):
+        assert client is self.ssh
+
+    def hosts(self):
+        return [f"robot@{host}:22" for host in set(self.opened)]
+
+    def close_all(self):
+        pass
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    # AF_UNIX paths are limited to ~100 bytes, so keep the socket out of deep pytest dirs
+    with tempfile.TemporaryDirectory(dir="/tmp") as runtime:
+        daemon = DeployDaemon(socket_path=f"{runtime}/d.sock", pool=FakePool())
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        for _ in range(200):
+            client = DaemonClient.connect(daemon.socket_path)
+            if client is not None:
+                client.close()
+                break
+            threading.Event().wait(0.01)
+        (tmp_path / "Deployfile.toml").write_text(DEPLOYFILE)
+        yield daemon
+        daemon.shutdown()
+        thread.join(5)
+
+
+def test_ping_and_status(running_daemon, tmp_path):
+    with DaemonClient.connect(running_daemon.socket_path) as client:
+        assert client.call("ping")["connections"] == []
+        assert client.call("connected", directory=str(tmp_path)) is False
+
+        status = client.call("service.status", directory=str(tmp_path))
+        assert status["active_state"] == "active"
+        assert client.call("connected", directory=str(tmp_path)) is True
+        assert client.call("ping")["connections"] == ["robot@10.0.0.2:22"]
+
+
+def test_errors_are_reported(running_daemon, tmp_path):
+    with DaemonClient.connect(running_daemon.socket_path) as client:
+        with pytest.raises(DaemonError) as info:
+            client.call("missing")
+        assert info.value.kind == "UnknownMethod"
+
+        with pytest.raises(DaemonError) as info:
+            client.call("service.status", directory=str(tmp_path / "nowhere"))
+        assert info.value.kind == "FileNotFoundError"
+
+        # the connection survives errors
+        assert client.call("ping")["pid"]
+
+
+def test_deployfile_cached_until_changed(tmp_path):
+    daemon = DeployDaemon(socket_path=str(tmp_path / "d.sock"), pool=FakePool())
+    (tmp_path / "Deployfile.toml").write_text(DEPLOYFILE)
+    first = daemon.deployfile(str(tmp_path))
+    assert daemon.deployfile(str(tmp_path)) is first
+
+    (tmp_path / "Deployfile.toml").write_text(DEPLOYFILE.replace("10.0.0.2", "10.0.0.3"))
+    os.utime(tmp_path / "Deployfile.toml", ns=(1, 1))
+    assert daemon.deployfile(str(tmp_path)).host == "10.0.0.3"
+
+
+def test_client_without_daemon(tmp_path):
+    assert DaemonClient.connect(str(tmp_path / "absent.sock")) is None
+
+
+def make_project(path):
+    repo = pygit2.init_repository(str(path))
+    (path / "Deployfile.toml").write_text(DEPLOYFILE)
+    (path / "pyproject.toml").write_text('[project]\nname = "bot"\n')
+    (path / "src" / "bot").mkdir(parents=True)
+    (path / "src" / "bot" / "__main__.py").write_text("print('hi')\n")
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("Test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "init", repo.index.write_tree(), [])
+
+
+def test_deploy_streams_events(running_daemon, tmp_path):
+    make_project(tmp_path)
+    options = DeployOptions(bytecode="off")
+    robot = Robot.from_directory(tmp_path)
+    manifest = Deployer(robot, tmp_path, options).build_manifest("off")
+    running_daemon.pool.ssh.files[remote_manifest_path(robot.df)] = json.dumps(manifest)
+
+    events = []
+    with DaemonClient.connect(running_daemon.socket_path) as client:
+        result = client.deploy(str(tmp_path), options, events.append)
+    assert result.up_to_date
+    assert [(event.stage, event.kind) for event in events] == [("connect", "start"), ("connect", "done")]
+    assert running_daemon.pool.opened == ["10.0.0.2"]
+
+
+def test_deploy_errors_are_deploy_tool_errors(running_daemon, tmp_path):
+    make_project(tmp_path)
+    (tmp_path / "src" / "bot" / "__main__.py").unlink()
+    with DaemonClient.connect(running_daemon.socket_path) as client, pytest.raises(DeployToolError) as info:
+        client.deploy(str(tmp_path), DeployOptions())
+    assert "must contain" in str(info.value)
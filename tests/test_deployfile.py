@@ -1,7 +1,17 @@
 import tempfile
 from pathlib import Path
 
-from kevinbotlib_deploytool.deployfile import DeployTarget, read_deployfile, write_deployfile
+import pytest
+from pydantic import ValidationError
+
+from kevinbotlib_deploytool.deployfile import (
+    DeployTarget,
+    GCConfig,
+    PackageConfig,
+    ServiceConfig,
+    read_deployfile,
+    write_deployfile,
+)
 
 
 def test_write_and_read_deployfile():
@@ -69,3 +79,50 @@ def test_to_dict():
     data = target.to_dict()
     assert "target" in data
     assert data["target"]["host"] == "robot.local"
+
+
+def test_service_section_round_trip():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "Deployfile.toml"
+
+        target = DeployTarget(
+            name="test",
+            host="robot.local",
+            user="example",
+            service=ServiceConfig(cpu_scheduling_policy="fifo", cpu_scheduling_priority=60, cpu_affinity=[3]),
+        )
+        write_deployfile(target, path)
+        assert "[service]" in path.read_text()
+        assert read_deployfile(path) == target
+
+
+def test_service_section_omitted_when_empty():
+    target = DeployTarget(name="test", host="robot.local", user="example")
+    assert "service" not in target.to_dict()
+
+
+def test_service_section_validation():
+    with pytest.raises(ValidationError):
+        ServiceConfig(cpu_scheduling_priority=50)
+    with pytest.raises(ValidationError):
+        ServiceConfig(nice=-40)
+    with pytest.raises(ValidationError):
+        ServiceConfig(memory_max="lots")
+    assert ServiceConfig(memory_max="75%").memory_max == "75%"
+
+
+def test_gc_section():
+    target = DeployTarget.from_dict(
+        {"target": {"name": "test", "host": "robot.local", "user": "example"}, "gc": {"budget": "1G"}}
+    )
+    assert target.gc.budget_bytes == 1024**3
+    assert target.to_dict()["gc"] == {"budget": "1G"}
+    with pytest.raises(ValidationError):
+        GCConfig(budget="huge")
+
+
+@pytest.mark.parametrize("pattern", ["../shared/*", "assets/../../x", "/etc/*", "C:\\data\\*", "..\\x"])
+def test_package_include_must_stay_in_the_project(pattern):
+    with pytest.raises(ValidationError, match="inside the project"):
+        PackageConfig(include=[pattern])
+    assert PackageConfig(include=["assets/**", "deploy/*.json"]).include == ["assets/**", "deploy/*.json"]
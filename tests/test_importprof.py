@@ -0,0 +1,89 @@
+import pytest
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.importprof import (
+    ImportProfile,
+    ImportProfileStore,
+    compare_profiles,
+    fastest_run,
+    flatten_imports,
+    importtime_command,
+    parse_importtime,
+    top_imports,
+)
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        80 |        200 | io
+import time:       300 |        300 |       numpy._utils
+import time:      1000 |       1300 |     numpy.core
+import time:       500 |       1800 |   numpy
+import time:        50 |         50 |   bot.config
+import time:       200 |       2050 | bot
+"""
+
+
+def test_importtime_command_quotes_import():
+    assert importtime_command("python3", "bot") == "python3 -X importtime -c 'import bot' 2>&1 >/dev/null"
+
+
+def test_parse_importtime_builds_tree():
+    roots = parse_importtime("Hello from the robot\n" + OUTPUT)
+    assert [root.name for root in roots] == ["io", "bot"]
+    io, bot = roots
+    assert [child.name for child in io.children] == ["_io"]
+    assert [child.name for child in bot.children] == ["numpy", "bot.config"]
+    numpy = bot.children[0]
+    assert numpy.self_us == 500
+    assert numpy.cumulative_us == 1800
+    assert numpy.children[0].children[0].name == "numpy._utils"
+
+
+def test_flatten_and_top():
+    modules = flatten_imports(parse_importtime(OUTPUT))
+    assert len(modules) == 7
+    assert modules["numpy.core"] == (1000, 1300)
+    assert top_imports(modules, 2) == ["bot", "numpy"]
+    assert top_imports(modules, 2, by_self=True) == ["numpy.core", "numpy"]
+
+
+def test_fastest_run():
+    slow = parse_importtime(OUTPUT.replace("2050", "9000"))
+    fast = parse_importtime(OUTPUT)
+    assert fastest_run([slow, fast]) is fast
+
+
+def test_compare_profiles():
+    before = {"bot": (100, 20000), "numpy": (500, 10000), "tiny": (10, 100)}
+    after = {"bot": (100, 40000), "numpy": (500, 10500), "tiny": (10, 3000), "cv2": (9000, 9000)}
+    regressions = compare_profiles(before, after, threshold=0.2, min_delta_us=5000)
+    assert [r.name for r in regressions] == ["bot", "cv2"]
+    assert regressions[0].delta_us == 20000
+    assert regressions[1].before_us == 0
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ImportProfileStore(ArtifactCache(root=str(tmp_path)))
+
+
+def profile(fingerprint: str, timestamp: float) -> ImportProfile:
+    roots = parse_importtime(OUTPUT)
+    return ImportProfile(
+        package="bot", fingerprint=fingerprint, timestamp=timestamp, modules=flatten_imports(roots), roots=roots
+    )
+
+
+def test_store_previous_skips_same_deploy(store):
+    assert store.previous("10.0.0.2", 22, "bot", "a") is None
+    store.record("10.0.0.2", 22, profile("a", 1))
+    store.record("10.0.0.2", 22, profile("b", 2))
+    store.record("10.0.0.2", 22, profile("b", 3))
+
+    history = store.history("10.0.0.2", 22, "bot")
+    assert [(entry.fingerprint, entry.timestamp) for entry in history] == [("a", 1), ("b", 3)]
+    assert history[0].modules["numpy"] == (500, 1800)
+    assert store.previous("10.0.0.2", 22, "bot", "b").fingerprint == "a"
+    assert store.previous("10.0.0.2", 22, "bot", "c").fingerprint == "b"
+    assert store.history("10.0.0.3", 22, "bot") == []
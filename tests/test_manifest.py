@@ -0,0 +1,70 @@
+import json
+
+import pygit2
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.manifest import (
+    build_fingerprint,
+    diff_files,
+    dirty_state_hash,
+    file_sha256,
+    read_remote_manifest,
+)
+from tests.conftest import FakeSFTP
+
+
+def make_repo(path):
+    repo = pygit2.init_repository(str(path))
+    (path / "Deployfile.toml").write_text("[target]\n")
+    (path / "main.py").write_text("print('hi')\n")
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("Test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "init", repo.index.write_tree(), [])
+    return repo
+
+
+def test_fingerprint_tracks_working_tree(tmp_path):
+    repo = make_repo(tmp_path)
+    deployfile = tmp_path / "Deployfile.toml"
+    assert dirty_state_hash(repo) is None
+    clean = build_fingerprint(repo, deployfile, [])
+    assert build_fingerprint(repo, deployfile, []) == clean
+
+    (tmp_path / "main.py").write_text("print('changed')\n")
+    dirty = build_fingerprint(repo, deployfile, [])
+    assert dirty != clean
+    assert build_fingerprint(repo, deployfile, []) == dirty
+
+    (tmp_path / "main.py").write_text("print('changed again')\n")
+    assert build_fingerprint(repo, deployfile, []) != dirty
+
+    (tmp_path / "main.py").write_text("print('hi')\n")
+    assert build_fingerprint(repo, deployfile, []) == clean
+    assert build_fingerprint(repo, deployfile, [], {"bytecode": "off"}) != clean
+
+
+def test_fingerprint_includes_custom_wheels(tmp_path):
+    repo = make_repo(tmp_path)
+    wheel = tmp_path.parent / "extra-1.0-py3-none-any.whl"
+    wheel.write_bytes(b"one")
+    first = build_fingerprint(repo, tmp_path / "Deployfile.toml", [file_sha256(wheel)])
+    wheel.write_bytes(b"two")
+    assert build_fingerprint(repo, tmp_path / "Deployfile.toml", [file_sha256(wheel)]) != first
+
+
+def test_read_remote_manifest():
+    target = DeployTarget(name="bot", host="robot.local", user="robot")
+    path = "/home/robot/bot/robot/deploy/manifest.json"
+    assert read_remote_manifest(FakeSFTP({}), target) is None
+    assert read_remote_manifest(FakeSFTP({path: b"not json"}), target) is None
+    assert read_remote_manifest(FakeSFTP({path: json.dumps({"fingerprint": "abc"}).encode()}), target) == {
+        "fingerprint": "abc"
+    }
+
+
+def test_diff_files():
+    old = {"a.py": "1", "b.py": "2", "c.py": "3"}
+    new = {"a.py": {"sha256": "1", "size": 5}, "b.py": {"sha256": "changed", "size": 5}, "d.py": {"sha256": "4"}}
+    assert diff_files(old, new) == (["d.py"], ["b.py"], ["c.py"])
+    assert diff_files({}, new) == (["a.py", "b.py", "d.py"], [], [])
@@ -0,0 +1,57 @@
+import json
+
+from kevinbotlib_deploytool.monitor import (
+    ProcessSample,
+    SamplerMeta,
+    compute_rates,
+    decode_throttled,
+    parse_sampler_line,
+    sparkline,
+)
+
+
+def test_sparkline():
+    assert sparkline([]) == ""
+    assert sparkline([5, 5, 5]) == "▁▁▁"
+    assert sparkline([0, 7]) == "▁█"
+    assert len(sparkline(range(100), width=10)) == 10
+
+
+def test_parse_sampler_line():
+    meta = parse_sampler_line(json.dumps({"meta": {"clk_tck": 100, "ncpu": 4, "pid": 42}}))
+    assert meta == SamplerMeta(clk_tck=100, ncpu=4, pid=42)
+    assert parse_sampler_line(json.dumps({"exited": True})) is None
+    sample = parse_sampler_line(json.dumps({"t": 1.0, "ticks": 5, "threads": {"42": ["robot", 5]}}))
+    assert isinstance(sample, ProcessSample)
+    assert sample.threads["42"] == ("robot", 5)
+
+
+def test_compute_rates():
+    meta = SamplerMeta(clk_tck=100, ncpu=4, pid=42)
+    previous = ProcessSample(
+        t=10.0,
+        ticks=100,
+        status={"VmRSS": 1000, "Threads": 2, "voluntary_ctxt_switches": 10, "nonvoluntary_ctxt_switches": 0},
+        io={"read_bytes": 0, "write_bytes": 0},
+        threads={"42": ("robot", 80), "43": ("worker", 20)},
+    )
+    current = ProcessSample(
+        t=10.5,
+        ticks=125,
+        status={"VmRSS": 2000, "Threads": 3, "voluntary_ctxt_switches": 60, "nonvoluntary_ctxt_switches": 5},
+        io={"read_bytes": 1024, "write_bytes": 0},
+        threads={"42": ("robot", 100), "43": ("worker", 25), "44": ("new", 3)},
+    )
+    rates = compute_rates(meta, previous, current)
+    assert rates.cpu_percent == 50.0
+    assert rates.rss_kib == 2000
+    assert rates.threads == 3
+    assert rates.ctx_switches_per_sec == 110.0
+    assert rates.read_bytes_per_sec == 2048.0
+    assert rates.thread_cpu_percent["42"] == ("robot", 40.0)
+    assert rates.thread_cpu_percent["44"] == ("new", 0.0)
+
+
+def test_decode_throttled():
+    assert decode_throttled(None) == []
+    assert decode_throttled(0x50005) == ["under-voltage", "throttled"]
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tarfile
+
+import pygit2
+import pytest
+
+from kevinbotlib_deploytool.packaging import DEFAULT_ARCHIVE_MTIME, build_archive, hash_members, index_members
+
+
+def make_tree(root):
+    (root / "src" / "bot" / "__pycache__").mkdir(parents=True)
+    (root / "src" / "bot" / "__init__.py").write_text("")
+    (root / "src" / "bot" / "main.py").write_text("print('hi')\n")
+    (root / "src" / "bot" / "__pycache__" / "main.cpython-311.pyc").write_bytes(b"\0")
+    (root / "run.sh").write_text("#!/bin/sh\n")
+    os.chmod(root / "run.sh", 0o700)
+    (root / "pyproject.toml").write_text("[project]\n")
+
+
+def test_build_archive_reproducible(tmp_path, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    tree = tmp_path / "tree"
+    make_tree(tree)
+    sources = [(tree / "src", "src"), (tree / "pyproject.toml", "pyproject.toml"), (tree / "run.sh", "run.sh")]
+
+    first = build_archive(tmp_path / "a.tar.gz", sources)
+    os.utime(tree / "src" / "bot" / "main.py", (0, 0))
+    second = build_archive(tmp_path / "b.tar.gz", list(reversed(sources)))
+
+    assert first == second
+    assert (tmp_path / "a.tar.gz").read_bytes() == (tmp_path / "b.tar.gz").read_bytes()
+    assert first == hashlib.sha256((tmp_path / "a.tar.gz").read_bytes()).hexdigest()
+
+
+def test_build_archive_members(tmp_path):
+    tree = tmp_path / "tree"
+    make_tree(tree)
+    build_archive(tmp_path / "a.tar.gz", [(tree / "src", "src"), (tree / "run.sh", "run.sh")])
+
+    with tarfile.open(tmp_path / "a.tar.gz") as tar:
+        members = tar.getmembers()
+    names = [m.name for m in members]
+    assert names == sorted(names)
+    assert "src/bot/main.py" in names
+    assert not any("__pycache__" in name for name in names)
+    for member in members:
+        assert member.uid == member.gid == 0
+        assert member.mtime == DEFAULT_ARCHIVE_MTIME
+    modes = {m.name: m.mode for m in members}
+    assert modes["run.sh"] == 0o755
+    assert modes["src/bot/main.py"] == 0o644
+
+
+def test_hash_members(tmp_path):
+    make_tree(tmp_path)
+    hashes = hash_members([(tmp_path / "src", "src"), (tmp_path / "pyproject.toml", "pyproject.toml")])
+    assert set(hashes) == {"src/bot/__init__.py", "src/bot/main.py", "pyproject.toml"}
+    assert hashes["src/bot/main.py"] == {"sha256": hashlib.sha256(b"print('hi')\n").hexdigest(), "size": 12}
+
+
+def test_index_members(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    (tmp_path / "src" / "bot" / "old.py").write_text("gone\n")
+    (tmp_path / ".gitignore").write_text("__pycache__/\nassets/generated/\n")
+    repo = pygit2.init_repository(str(tmp_path))
+    repo.index.add_all()
+    repo.index.write()
+    signature = pygit2.Signature("Test", "test@example.com")
+    repo.create_commit("HEAD", signature, signature, "init", repo.index.write_tree(), [])
+
+    (tmp_path / "src" / "bot" / "main.py").write_text("print('changed')\n")
+    (tmp_path / "src" / "bot" / "old.py").unlink()
+    (tmp_path / "src" / "bot" / ".main.py.swp").write_bytes(b"swap")
+    (tmp_path / "assets" / "generated").mkdir(parents=True)
+    (tmp_path / "assets" / "generated" / "map.bin").write_bytes(b"map")
+
+    hashed = []
+    real_hashfile = pygit2.hashfile
+    monkeypatch.setattr(pygit2, "hashfile", lambda path: hashed.append(path) or real_hashfile(path))
+
+    members = index_members(
+        repo, tmp_path, [(tmp_path / "src", "src"), (tmp_path / "pyproject.toml", "pyproject.toml")], ["assets/**"]
+    )
+    assert list(members) == ["assets/generated/map.bin", "pyproject.toml", "src/bot/__init__.py", "src/bot/main.py"]
+    assert members["src/bot/__init__.py"][1]["oid"] == str(repo.index["src/bot/__init__.py"].id)
+    assert members["src/bot/main.py"][1] == {"oid": str(real_hashfile(str(tmp_path / "src/bot/main.py"))), "size": 17}
+    assert members["assets/generated/map.bin"][0] == tmp_path / "assets" / "generated" / "map.bin"
+    # clean files are never read
+    assert sorted(hashed) == sorted(str(tmp_path / name) for name in ("src/bot/main.py", "assets/generated/map.bin"))
+
+
+def test_index_members_rejects_includes_outside_the_project(tmp_path):
+    project = tmp_path / "project"
+    make_tree(project)
+    (tmp_path / "secret.key").write_text("key")
+    (project / "assets").mkdir()
+    (project / "assets" / "link.key").symlink_to(tmp_path / "secret.key")
+    repo = pygit2.init_repository(str(project))
+
+    for pattern in ("../*.key", "assets/*.key"):
+        with pytest.raises(ValueError, match="outside"):
+            index_members(repo, project, [(project / "src", "src")], [pattern])
@@ -0,0 +1,107 @@
+import subprocess
+import sys
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.profiling import (
+    RUNNER_PATH,
+    ProfileReport,
+    collapsed_stacks,
+    hot_functions,
+    render_profile_override,
+)
+
+SCRIPT = """
+import time
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def main():
+    spin({seconds})
+
+
+main()
+"""
+
+
+def make_target():
+    return DeployTarget(
+        name="test-bot", python_version="3.10", glibc_version="2.36", arch="x64", user="robot", host="h"
+    )
+
+
+def run_runner(tmp_path, seconds, duration, *extra):
+    script = tmp_path / "__main__.py"
+    script.write_text(SCRIPT.format(seconds=seconds))
+    output = tmp_path / "report.json"
+    subprocess.run(
+        [
+            sys.executable,
+            str(RUNNER_PATH),
+            "--output",
+            str(output),
+            "--duration",
+            str(duration),
+            "--interval",
+            "0.005",
+            *extra,
+            str(script),
+        ],
+        check=True,
+        timeout=30,
+    )
+    return ProfileReport.model_validate_json(output.read_text())
+
+
+def test_runner_samples_running_code(tmp_path):
+    report = run_runner(tmp_path, seconds=1.0, duration=0.3)
+    assert report.mode == "sample"
+    assert not report.exited
+    assert report.samples > 10
+    assert not report.functions
+    stacks = collapsed_stacks(report)
+    line = next(line for line in stacks.splitlines() if "spin" in line)
+    assert line.startswith("thread MainThread;<module> (__main__.py:1);main (__main__.py:")
+    assert hot_functions(report, 1)[0].name.startswith("spin (__main__.py:")
+
+
+def test_runner_reports_early_exit_with_cprofile(tmp_path):
+    report = run_runner(tmp_path, 0.1, 10, "--cprofile")
+    assert report.mode == "cprofile"
+    assert report.exited
+    spin = next(function for function in hot_functions(report, 50) if function.name.startswith("spin"))
+    assert spin.calls == 1
+    assert spin.total_seconds >= 0.09
+
+
+def test_hot_functions_from_samples():
+    report = ProfileReport(
+        version=1,
+        mode="sample",
+        python="3.10.12",
+        interval=0.01,
+        duration=1,
+        samples=4,
+        exited=False,
+        stacks={"thread MainThread;main;loop;loop": 3, "thread MainThread;main": 1, "thread idle": 2},
+    )
+    loop, main = hot_functions(report, 10)
+    assert (loop.name, loop.self_seconds, loop.total_seconds) == ("loop", 0.03, 0.03)
+    assert (main.name, main.self_seconds, main.total_seconds) == ("main", 0.01, 0.04)
+    assert collapsed_stacks(report).splitlines()[0] == "thread MainThread;main 1"
+
+
+def test_render_profile_override():
+    override = render_profile_override(make_target(), 10, 0.01, cprofile=True)
+    assert override.splitlines() == [
+        "[Service]",
+        "ExecStart=",
+        "ExecStart=/home/robot/test-bot/env/bin/python3 /home/robot/test-bot/profile/runner.py "
+        "--output /home/robot/test-bot/profile/report.json --duration 10 --interval 0.01 --cprofile "
+        "/home/robot/test-bot/robot/src/test_bot/__main__.py",
+        "Restart=no",
+    ]
@@ -0,0 +1,153 @@
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+import paramiko
+import pytest
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.remote_facts import (
+    RemoteFacts,
+    RemoteFactsCache,
+    host_key_fingerprint,
+    parse_probe,
+    probe_command,
+    validate_interpreter,
+    validate_target,
+)
+from tests.conftest import FakeSSH
+
+HOST_KEY = paramiko.RSAKey.generate(1024)
+OTHER_HOST_KEY = paramiko.RSAKey.generate(1024)
+
+
+@pytest.fixture
+def facts(tmp_path):
+    return RemoteFactsCache(ArtifactCache(root=str(tmp_path)))
+
+
+@pytest.fixture
+def df():
+    return DeployTarget(name="bot", user="robot", host="10.0.0.2")
+
+
+def probe(value):
+    calls = []
+
+    def run():
+        calls.append(value)
+        return value
+
+    return run, calls
+
+
+def test_fact_is_probed_once(facts, df):
+    uname, calls = probe("aarch64")
+    assert facts.fact(FakeSSH(host_key=HOST_KEY), df, "arch", uname) == "aarch64"
+    assert facts.fact(FakeSSH(host_key=HOST_KEY), df, "arch", uname) == "aarch64"
+    assert len(calls) == 1
+
+
+def test_facts_are_keyed_by_host_key(facts, df):
+    uname, calls = probe("aarch64")
+    facts.fact(FakeSSH(host_key=HOST_KEY), df, "arch", uname)
+    facts.fact(FakeSSH(host_key=OTHER_HOST_KEY), df, "arch", uname)
+    assert len(calls) == 2
+    assert host_key_fingerprint(FakeSSH(host_key=HOST_KEY)) != host_key_fingerprint(FakeSSH(host_key=OTHER_HOST_KEY))
+
+
+def test_unknown_results_are_not_cached(facts, df):
+    systemctl, calls = probe(None)
+    assert facts.fact(FakeSSH(host_key=HOST_KEY), df, "systemd_version", systemctl) is None
+    facts.fact(FakeSSH(host_key=HOST_KEY), df, "systemd_version", systemctl)
+    assert len(calls) == 2
+
+
+def test_facts_expire(facts, df, monkeypatch):
+    facts.fact(FakeSSH(host_key=HOST_KEY), df, "arch", probe("aarch64")[0])
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    assert facts.load(FakeSSH(host_key=HOST_KEY), df).arch is None
+
+
+def test_invalidate_only_forgets_environment_facts(facts, df):
+    ssh = FakeSSH(host_key=HOST_KEY)
+    facts.fact(ssh, df, "arch", probe("aarch64")[0])
+    facts.fact(ssh, df, "venv_exists", probe(False)[0])
+    facts.fact(ssh, df, "glibc_version", probe("2.36")[0])
+    assert facts.load(ssh, df).venv_exists is False
+
+    facts.invalidate(ssh, df)
+    loaded = facts.load(ssh, df)
+    assert loaded.venv_exists is None
+    assert loaded.arch == "aarch64"
+    assert loaded.glibc_version == "2.36"
+
+
+PROBE_OUTPUT = (
+    "arch\taarch64\n"
+    "glibc\tldd (Debian GLIBC 2.36-9+deb12u4) 2.36\n"
+    "systemd\tsystemd 252 (252.22-1~deb12u1)\n"
+    "venv\t1\n"
+    "venv_python\tPython 3.10.12\n"
+    "interpreter\t/usr/bin/python3\t0\tPython 3.11.2\n"
+    "venv_module\t/usr/bin/python3\t1\n"
+    "interpreter\t/opt/python\t127\tsh: 1: /opt/python: not found\n"
+    "venv_module\t/opt/python\t0\n"
+)
+
+
+def test_parse_probe():
+    result = parse_probe(PROBE_OUTPUT)
+    facts = result.facts
+    assert (facts.arch, facts.glibc_version, facts.systemd_version) == ("aarch64", "2.36", "252")
+    assert facts.venv_exists
+    assert facts.python_version == "3.10.12"
+    assert facts.interpreters == {"/usr/bin/python3": "Python 3.11.2"}
+    assert facts.venv_modules == {"/usr/bin/python3": True}
+    assert result.interpreter_errors == {"/opt/python": "sh: 1: /opt/python: not found"}
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+def test_probe_command_runs_locally(df):
+    args = shlex.split(probe_command(df, (sys.executable,)))
+    assert args[:2] == ["sh", "-c"]
+    output = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    result = parse_probe(output)
+    assert result.facts.interpreters[sys.executable].startswith("Python 3.")
+    assert result.facts.venv_modules[sys.executable]
+
+
+def test_validate_target(df):
+    df.arch, df.glibc_version, df.python_version = "aarch64", "2.35", "3.10"
+    checks = validate_target(df, parse_probe(PROBE_OUTPUT).facts)
+    assert [(check.label, check.level) for check in checks] == [
+        ("CPU architecture", "ok"),
+        ("glibc version", "warning"),
+        ("Python version", "ok"),
+    ]
+    checks = validate_target(df, RemoteFacts(arch="aarch64", glibc_version="2.35", venv_exists=False))
+    assert checks[-1].level == "error"
+
+
+def test_validate_interpreter(df):
+    df.python_version = "3.10"
+    result = parse_probe(PROBE_OUTPUT)
+    levels = {check.label: check.level for check in validate_interpreter(df, result, "/usr/bin/python3")}
+    assert levels == {"Python executable": "ok", "Python version": "warning", "virtual environment": "error"}
+    assert validate_interpreter(df, result, "/opt/python")[0].message.endswith("not found")
+
+
+def test_probe_is_cached(facts, df):
+    ssh = FakeSSH({"": (PROBE_OUTPUT.encode(), 0)}, host_key=HOST_KEY)
+    assert not facts.probe(ssh, df).cached
+    assert facts.probe(ssh, df).cached
+    assert len(ssh.commands) == 1
+    assert facts.probe(ssh, df, ("/usr/bin/python3",)).cached
+    # failed interpreters are not cached
+    assert facts.probe(ssh, df, ("/opt/python",)).interpreter_errors
+    assert not facts.probe(ssh, df, ("/opt/python",)).cached
+    assert not facts.probe(ssh, df, refresh=True).cached
+    assert len(ssh.commands) == 4
@@ -0,0 +1,81 @@
+import re
+
+import pytest
+
+from kevinbotlib_deploytool.deployfile import DeployTarget
+from kevinbotlib_deploytool.remote_gc import (
+    RemoteEntry,
+    archive_release_command,
+    parse_inventory,
+    plan_eviction,
+    release_tag,
+    retire_command,
+)
+from kevinbotlib_deploytool.sizes import format_size, parse_size
+
+TARGET = DeployTarget(name="bot", host="robot.local", user="robot")
+
+
+def entry(path: str, kind: str, size: int, last_used: int) -> RemoteEntry:
+    return RemoteEntry(path=path, kind=kind, size=size, last_used=last_used)
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("1K") == 1024
+    assert parse_size("1.5GiB") == int(1.5 * 1024**3)
+    assert parse_size("256m") == 256 * 1024**2
+    assert parse_size(10) == 10
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size("lots")
+
+
+def test_format_size():
+    assert format_size(100) == "100 B"
+    assert format_size(1536) == "1.5 KiB"
+    assert format_size(3 * 1024**3) == "3.0 GiB"
+
+
+def test_parse_inventory():
+    entries = parse_inventory("10\t100\tbot/releases/a\n\n4\t50\t.cache/pip/http\n", TARGET)
+    assert entries == [
+        entry("bot/releases/a", "release", 10 * 1024, 100),
+        entry(".cache/pip/http", "pip-cache", 4 * 1024, 50),
+    ]
+
+
+def test_plan_eviction_lru():
+    entries = [
+        entry("bot/releases/new", "release", 40, 300),
+        entry("bot/releases/old", "release", 40, 100),
+        entry(".cache/pip/http", "pip-cache", 40, 200),
+    ]
+    assert plan_eviction(entries, budget=200) == []
+    assert [e.path for e in plan_eviction(entries, budget=80)] == ["bot/releases/old"]
+    assert [e.path for e in plan_eviction(entries, budget=0, keep_releases=1)] == [
+        "bot/releases/old",
+        ".cache/pip/http",
+    ]
+
+
+def test_retire_command_backgrounds_delete():
+    command = retire_command(TARGET, ["bot/releases/old"], "tag")
+    assert "mv bot/releases/old bot/.trash/tag-0" in command
+    assert command.endswith("&)")
+
+
+def test_plan_eviction_keeps_newest_archive():
+    entries = [
+        entry("bot/archives/new.tar.gz", "archive", 40, 300),
+        entry("bot/archives/old.tar.gz", "archive", 40, 100),
+        entry("bot/releases/a", "release", 40, 200),
+    ]
+    assert parse_inventory("1\t300\tbot/archives/new.tar.gz\n", TARGET)[0].kind == "archive"
+    assert [e.path for e in plan_eviction(entries, budget=0, keep_releases=1)] == ["bot/archives/old.tar.gz"]
+
+
+def test_release_tags_are_unique_and_never_nest():
+    assert re.fullmatch(r"\d{8}T\d{6}\.\d{6}", release_tag())
+    command = archive_release_command(TARGET, "20250101T000000.000001")
+    assert "if [ -e bot/releases/20250101T000000.000001 ]; then" in command
+    assert command.index("exit 1") < command.index("mv bot/robot bot/releases/20250101T000000.000001")
@@ -0,0 +1,50 @@
+import os
+import socket
+import tempfile
+
+import pytest
+
+from kevinbotlib_deploytool import sdnotify
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires unix sockets")
+
+
+@pytest.fixture
+def notify_socket(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "notify")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        server.bind(path)
+        server.settimeout(1)
+        monkeypatch.setenv("NOTIFY_SOCKET", path)
+        yield server
+        server.close()
+
+
+def test_notify_without_systemd(monkeypatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    assert not sdnotify.ready()
+
+
+def test_ready(notify_socket):
+    assert sdnotify.ready()
+    assert notify_socket.recv(64) == b"READY=1"
+
+
+def test_watchdog_rate_limit(notify_socket, monkeypatch):
+    monkeypatch.setenv("WATCHDOG_USEC", "10000000")
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getpid()))
+    assert sdnotify.watchdog_interval() == 10.0
+
+    watchdog = sdnotify.Watchdog()
+    assert watchdog.enabled
+    assert watchdog.pet()
+    assert not watchdog.pet()
+    assert notify_socket.recv(64) == b"WATCHDOG=1"
+
+
+def test_watchdog_other_pid(monkeypatch):
+    monkeypatch.setenv("WATCHDOG_USEC", "10000000")
+    monkeypatch.setenv("WATCHDOG_PID", "1")
+    assert sdnotify.watchdog_interval() is None
+    assert not sdnotify.Watchdog().pet()
@@ -0,0 +1,120 @@
+import json
+
+from kevinbotlib_deploytool.deployfile import DeployTarget, ServiceConfig
+from kevinbotlib_deploytool.service import (
+    ReadinessTracker,
+    ServiceStatus,
+    find_ready_line,
+    parse_systemctl_show,
+    render_service_file,
+    systemctl_show_command,
+)
+
+SHOW_OUTPUT = """LoadState=loaded
+ActiveState=active
+SubState=running
+MainPID=1234
+ExecMainStartTimestamp=Mon 2025-04-07 12:00:00 UTC
+ExecMainStartTimestampMonotonic=52000000
+InactiveExitTimestampMonotonic=51900000
+ActiveEnterTimestampMonotonic=52150000
+NRestarts=2
+MemoryCurrent=41943040
+CPUUsageNSec=18446744073709551615
+"""
+
+
+def test_parse_systemctl_show():
+    props = parse_systemctl_show("A=1\nB=x=y\n\ngarbage\n")
+    assert props == {"A": "1", "B": "x=y"}
+
+
+def test_status_from_show_output():
+    status = ServiceStatus.from_show_output(SHOW_OUTPUT)
+    assert status.installed
+    assert status.active_state == "active"
+    assert status.sub_state == "running"
+    assert status.main_pid == 1234
+    assert status.exec_main_start_timestamp == "Mon 2025-04-07 12:00:00 UTC"
+    assert status.exec_main_start_timestamp_monotonic == 52000000
+    assert status.n_restarts == 2
+    assert status.memory_current == 41943040
+    assert status.cpu_usage_nsec is None
+    assert status.activation_seconds == 0.25
+
+
+def test_status_not_found():
+    status = ServiceStatus.from_show_output(
+        "LoadState=not-found\nActiveState=inactive\nSubState=dead\nMainPID=0\nMemoryCurrent=[not set]\n"
+    )
+    assert not status.installed
+    assert status.main_pid == 0
+    assert status.memory_current is None
+    assert status.exec_main_start_timestamp is None
+
+
+def test_systemctl_show_command():
+    command = systemctl_show_command("robot", ("ActiveState", "MainPID"))
+    assert command == "systemctl --user show robot.service --property=ActiveState,MainPID"
+
+
+def test_readiness_tracker():
+    tracker = ReadinessTracker(grace=1.0)
+    activating = ServiceStatus(load_state="loaded", active_state="activating", sub_state="start")
+    running = ServiceStatus(load_state="loaded", active_state="active", sub_state="running", main_pid=10)
+    restarted = running.model_copy(update={"main_pid": 11})
+    failed = ServiceStatus(load_state="loaded", active_state="failed", sub_state="failed")
+
+    assert tracker.update(activating, 0.0) == "waiting"
+    assert tracker.update(running, 0.5) == "waiting"
+    assert tracker.update(running, 1.0) == "waiting"
+    # a new main process restarts the grace period
+    assert tracker.update(restarted, 1.6) == "waiting"
+    assert tracker.update(restarted, 2.6) == "ready"
+    assert tracker.update(failed, 3.0) == "failed"
+
+
+def test_find_ready_line():
+    journal = "\n".join(
+        [
+            json.dumps({"__MONOTONIC_TIMESTAMP": "100", "MESSAGE": "Robot ready"}),
+            "not json",
+            json.dumps({"__MONOTONIC_TIMESTAMP": "200", "MESSAGE": [1, 2, 3]}),
+            json.dumps({"__MONOTONIC_TIMESTAMP": "300", "MESSAGE": "Starting"}),
+            json.dumps({"__MONOTONIC_TIMESTAMP": "400", "MESSAGE": "Robot ready!"}),
+        ]
+    )
+    assert find_ready_line(journal, r"Robot ready", since_monotonic=150) == 400
+    assert find_ready_line(journal, r"never", since_monotonic=0) is None
+
+
+def test_render_service_file():
+    target = DeployTarget(
+        name="my-robot",
+        host="robot.local",
+        user="robot",
+        service=ServiceConfig(nice=-10, cpu_affinity=[2, 3], io_scheduling_class="realtime", oom_score_adjust=-900),
+    )
+    unit = render_service_file(target)
+    assert (
+        "ExecStart=/home/robot/my-robot/env/bin/python3 /home/robot/my-robot/robot/src/my_robot/__main__.py\n" in unit
+    )
+    assert "/bin/bash" not in unit
+    assert "SuccessExitStatus=64 65\n" in unit
+    assert "Nice=-10\nCPUAffinity=2 3\nIOSchedulingClass=realtime\nOOMScoreAdjust=-900\n" in unit
+    assert "CPUSchedulingPolicy" not in unit
+
+
+def test_render_watchdog_service_file():
+    target = DeployTarget(
+        name="robot",
+        host="robot.local",
+        user="robot",
+        service=ServiceConfig(watchdog_sec=0.5, restart_sec=0.2, start_limit_burst=20),
+    )
+    unit = render_service_file(target)
+    assert "Type=notify\n" in unit
+    assert "WatchdogSec=500ms\nNotifyAccess=main\n" in unit
+    assert "RestartSec=200ms\n" in unit
+    assert "After=network.target\nStartLimitBurst=20\n" in unit
+    assert "Type=simple\n" in render_service_file(target.model_copy(update={"service": ServiceConfig()}))
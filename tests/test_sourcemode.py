@@ -0,0 +1,67 @@
+import shlex
+import subprocess
+import sys
+
+from kevinbotlib_deploytool.sourcemode import (
+    dependency_fingerprint,
+    install_source_command,
+    record_source_deploy,
+    remove_source_command,
+    resolve_deploy_mode,
+    source_pth_name,
+)
+
+PYPROJECT = {"project": {"name": "bot", "dependencies": ["kevinbotlib>=1.0", "numpy"], "requires-python": ">=3.10"}}
+
+
+def test_dependency_fingerprint():
+    base = dependency_fingerprint(PYPROJECT, [], "3.11")
+    reordered = {"project": {**PYPROJECT["project"], "dependencies": ["numpy", "kevinbotlib>=1.0"]}}
+    assert dependency_fingerprint(reordered, [], "3.11") == base
+    # the version and other metadata do not matter
+    assert dependency_fingerprint({"project": {**PYPROJECT["project"], "version": "2.0"}}, [], "3.11") == base
+    assert dependency_fingerprint(PYPROJECT, ["abc"], "3.11") != base
+    assert dependency_fingerprint(PYPROJECT, [], "3.12") != base
+
+
+def test_resolve_deploy_mode():
+    assert resolve_deploy_mode("auto", None, "deps") == "wheel"
+    assert resolve_deploy_mode("auto", {"deps": "old"}, "deps") == "wheel"
+    assert resolve_deploy_mode("auto", {"deps": "deps"}, "deps") == "source"
+    assert resolve_deploy_mode("wheel", {"deps": "deps"}, "deps") == "wheel"
+    assert resolve_deploy_mode("source", None, "deps") == "source"
+
+
+def test_source_deploy_with_changed_deps_is_not_recorded_as_installed():
+    manifest = {"fingerprint": "build", "deps": "new"}
+    assert record_source_deploy(manifest, {"fingerprint": "old build", "deps": "old"})
+    assert manifest == {"deps": "old"}
+    # the next auto deploy installs the new dependencies
+    assert resolve_deploy_mode("auto", manifest, "new") == "wheel"
+
+    manifest = {"fingerprint": "build", "deps": "new"}
+    assert record_source_deploy(manifest, None)
+    assert manifest == {}
+    assert resolve_deploy_mode("auto", manifest, "new") == "wheel"
+
+    manifest = {"fingerprint": "build", "deps": "same"}
+    assert not record_source_deploy(manifest, {"deps": "same"})
+    assert manifest == {"fingerprint": "build", "deps": "same"}
+
+
+def test_source_pth_commands(tmp_path):
+    purelib = tmp_path / "site-packages"
+    purelib.mkdir()
+    # run the commands against a fake purelib directory
+    prefix = f"import sysconfig; sysconfig.get_path = lambda name: {str(purelib)!r}; "
+
+    def run(command):
+        script = shlex.split(command)[2]
+        subprocess.run([sys.executable, "-c", prefix + script], check=True)
+
+    run(install_source_command("python3", "bot", "/home/robot/bot/robot/src"))
+    pth = purelib / source_pth_name("bot")
+    assert pth.read_text() == "import sys; sys.path.insert(0, '/home/robot/bot/robot/src')\n"
+    run(remove_source_command("python3", "bot"))
+    assert not pth.exists()
+    run(remove_source_command("python3", "bot"))
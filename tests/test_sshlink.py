@@ -0,0 +1,111 @@
+import socket
+
+import paramiko
+import pytest
+
+from kevinbotlib_deploytool.deployfile import DeployTarget, SSHConfig
+from kevinbotlib_deploytool.sshlink import (
+    LinkProfile,
+    LinkProfileStore,
+    LinkSettings,
+    benchmark_link,
+    resolve_link_settings,
+)
+
+TARGET = DeployTarget(name="bot", host="robot.local", user="robot")
+
+
+def test_transport_factory_prefers_settings():
+    settings = LinkSettings(ciphers=["aes256-ctr", "not-a-cipher"], macs=["hmac-sha1"], window_size=8 * 1024**2)
+    left, right = socket.socketpair()
+    try:
+        transport = settings.transport_factory(left)
+        options = transport.get_security_options()
+        assert options.ciphers[0] == "aes256-ctr"
+        assert "aes128-ctr" in options.ciphers
+        assert "not-a-cipher" not in options.ciphers
+        assert options.digests[0] == "hmac-sha1"
+        assert transport.default_window_size == 8 * 1024**2
+    finally:
+        left.close()
+        right.close()
+
+
+def test_profile_store_round_trip(tmp_path):
+    store = LinkProfileStore(path=str(tmp_path / "profiles.json"))
+    assert store.get("robot.local", 22) is None
+    profile = LinkProfile(settings=LinkSettings(ciphers=["aes128-ctr"]), throughput=1e6, measured_at=0)
+    store.set("robot.local", 22, profile)
+    assert store.get("robot.local", 22) == profile
+    assert store.get("robot.local", 2222) is None
+    assert store.remove("robot.local", 22)
+    assert not store.remove("robot.local", 22)
+
+
+def test_resolve_link_settings(tmp_path):
+    store = LinkProfileStore(path=str(tmp_path / "profiles.json"))
+    store.set(
+        "robot.local",
+        22,
+        LinkProfile(settings=LinkSettings(ciphers=["aes128-ctr"], compression=True), throughput=1e6, measured_at=0),
+    )
+    assert resolve_link_settings(TARGET, store).ciphers == ["aes128-ctr"]
+
+    target = TARGET.model_copy(update={"ssh": SSHConfig(compression=False, window_size="16M")})
+    settings = resolve_link_settings(target, store)
+    assert settings.ciphers == ["aes128-ctr"]
+    assert not settings.compression
+    assert settings.window_size == 16 * 1024**2
+
+    target = TARGET.model_copy(update={"ssh": SSHConfig(use_link_profile=False)})
+    assert resolve_link_settings(target, store) == LinkSettings()
+
+
+def test_ssh_section_validation():
+    with pytest.raises(ValueError, match="Invalid size"):
+        SSHConfig(window_size="big")
+
+
+class FakeTransport:
+    def __init__(self, settings):
+        self.local_cipher = settings.ciphers[0] if settings.ciphers else "aes128-ctr"
+        self.local_mac = settings.macs[0] if settings.macs else "hmac-sha2-256"
+
+
+class FakeClient:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_transport(self):
+        return FakeTransport(self.settings)
+
+    def close(self):
+        pass
+
+
+def test_benchmark_link(monkeypatch):
+    def connect(settings):
+        if settings.ciphers == ["aes256-cbc"]:
+            msg = "no matching cipher"
+            raise paramiko.SSHException(msg)
+        return FakeClient(settings)
+
+    def fake_measure(ssh, _payload):
+        settings = ssh.settings
+        rate = {"aes128-ctr": 5.0, "aes256-ctr": 3.0}.get(settings.ciphers[0], 1.0)
+        if settings.macs == ["hmac-sha1"]:
+            rate += 1
+        if settings.window_size > 2 * 1024**2:
+            rate += 0.5
+        return rate
+
+    monkeypatch.setattr("kevinbotlib_deploytool.sshlink.measure_upload", fake_measure)
+    results = []
+    best, rate = benchmark_link(connect, b"x", lambda settings, rate: results.append((settings, rate)))
+
+    assert best.ciphers == ["aes128-ctr"]
+    assert best.macs == ["hmac-sha1"]
+    assert not best.compression
+    assert best.window_size > 2 * 1024**2
+    assert rate == 6.5
+    assert (LinkSettings(ciphers=["aes256-cbc"]), None) in results
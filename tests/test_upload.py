@@ -0,0 +1,261 @@
+import hashlib
+import os
+import shlex
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from kevinbotlib_deploytool.cache import ArtifactCache
+from kevinbotlib_deploytool.upload import (
+    CHECKPOINT_NAMESPACE,
+    UploadVerificationError,
+    parse_block_hashes,
+    plan_blocks,
+    remote_block_hashes_command,
+    resumable_upload,
+    upload_file,
+)
+from tests.conftest import FakeSSH, FakeStream
+
+
+class FakeRemoteFile:
+    def __init__(self, client, path, mode):
+        self.client = client
+        self.file = open(path, mode)  # noqa: SIM115
+        self.pipelined = False
+
+    def write(self, data):
+        with self.client.lock:
+            if self.client.fail_after is not None:
+                if self.client.fail_after <= 0:
+                    msg = "link dropped"
+                    raise EOFError(msg)
+                self.client.fail_after -= 1
+            if self.client.corrupt_writes:
+                self.client.corrupt_writes -= 1
+                data = bytes([data[0] ^ 0xFF]) + bytes(data[1:])
+        return self.file.write(data)
+
+    def set_pipelined(self, pipelined):
+        self.pipelined = pipelined
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.file.close()
+
+
+class LocalSFTP:
+    """Writes remote files straight to local paths, failing or corrupting writes on request."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def open(self, path, mode):
+        handle = FakeRemoteFile(self.client, path, mode)
+        self.client.opened.append(handle)
+        return handle
+
+    def close(self):
+        self.client.closed += 1
+
+
+def run_remote(command):
+    """Run a remote command locally without a shell, with this interpreter standing in for the robot's."""
+    args = shlex.split(command)
+    if args[0] == "sha256sum":
+        # answered here, so the tests do not depend on coreutils being installed
+        with open(args[1], "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        return subprocess.CompletedProcess(args, 0, f"{digest}  {args[1]}\n".encode(), b"")
+    if args[0] == "python3":
+        args[0] = sys.executable
+    return subprocess.run(args, capture_output=True, check=False)
+
+
+class LocalSSH(FakeSSH):
+    """Runs remote commands on this machine."""
+
+    def __init__(self, fail_after=None, corrupt_writes=0):
+        super().__init__()
+        self.sessions = 0
+        self.closed = 0
+        self.opened = []
+        self.fail_after = fail_after
+        self.corrupt_writes = corrupt_writes
+        self.lock = threading.Lock()
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        result = run_remote(command)
+        return None, FakeStream(result.stdout, result.returncode), FakeStream(result.stderr)
+
+    def open_sftp(self):
+        with self.lock:
+            self.sessions += 1
+        return LocalSFTP(self)
+
+
+def test_plan_blocks():
+    assert plan_blocks(10, 4) == [(0, 4), (4, 4), (8, 2)]
+    assert plan_blocks(0, 4) == []
+
+
+def test_upload_file_parallel(tmp_path):
+    data = os.urandom(1024 * 1024 + 123)
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(data)
+    ssh = LocalSSH()
+    sent = []
+
+    stats = upload_file(
+        ssh, source, str(tmp_path / "remote"), streams=3, block_size=64 * 1024, request_size=8192, progress=sent.append
+    )
+
+    assert (tmp_path / "remote").read_bytes() == data
+    assert stats.size == len(data)
+    assert stats.streams == 3
+    assert ssh.sessions == ssh.closed == 3
+    assert sum(sent) == len(data)
+    assert max(sent) == 8192
+    assert all(handle.pipelined for handle in ssh.opened if "r+" in handle.file.mode)
+
+
+def test_upload_small_file_single_stream(tmp_path):
+    source = tmp_path / "small"
+    source.write_bytes(b"hello")
+    ssh = LocalSSH()
+    stats = upload_file(ssh, source, str(tmp_path / "remote"), streams=4)
+    assert (tmp_path / "remote").read_bytes() == b"hello"
+    assert stats.streams == 1
+    assert ssh.sessions == 1
+
+
+def test_block_hash_command_round_trip(tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"a" * 10 + b"b" * 5)
+    result = run_remote(remote_block_hashes_command("python3", str(path), 10, [1, 0]))
+    hashes = parse_block_hashes(result.stdout.decode())
+    assert set(hashes) == {0, 1}
+
+
+def test_resumable_upload_reconnects(tmp_path):
+    data = os.urandom(256 * 1024)
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(data)
+    remote = str(tmp_path / "remote.part")
+    cache = ArtifactCache(root=str(tmp_path / "cache"))
+    first = LocalSSH(fail_after=5)
+    connections = []
+    retries = []
+
+    def connect():
+        connections.append(LocalSSH())
+        return connections[-1]
+
+    ssh, stats = resumable_upload(
+        connect,
+        source,
+        remote,
+        ssh=first,
+        checkpoints=cache,
+        streams=1,
+        block_size=16 * 1024,
+        backoff=0,
+        on_retry=lambda attempt, _delay, error: retries.append((attempt, type(error))),
+    )
+
+    assert (tmp_path / "remote.part").read_bytes() == data
+    assert ssh is connections[-1]
+    assert retries == [(1, EOFError)]
+    assert stats.retries == 1
+    # the blocks confirmed before the drop were verified on the remote instead of being sent again
+    assert any(command.startswith("python3 -c") for command in ssh.commands)
+    assert cache.read_bytes(CHECKPOINT_NAMESPACE, remote) is None
+
+
+def test_resumable_upload_gives_up(tmp_path):
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(os.urandom(64 * 1024))
+
+    with pytest.raises(EOFError):
+        resumable_upload(
+            lambda: LocalSSH(fail_after=0),
+            source,
+            str(tmp_path / "remote.part"),
+            checkpoints=ArtifactCache(root=str(tmp_path / "cache")),
+            retries=2,
+            backoff=0,
+        )
+
+
+def test_resume_from_checkpoint(tmp_path):
+    data = os.urandom(64 * 1024)
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(data)
+    remote = tmp_path / "remote.part"
+    # first half already on the remote, but the second block was corrupted
+    partial = bytearray(data[: 32 * 1024])
+    partial[20000] ^= 0xFF
+    remote.write_bytes(bytes(partial))
+    cache = ArtifactCache(root=str(tmp_path / "cache"))
+    cache.put_bytes(CHECKPOINT_NAMESPACE, str(remote), b'{"size": 65536, "block_size": 16384, "done": [0, 1]}')
+
+    completed = []
+    _, stats = resumable_upload(
+        LocalSSH,
+        source,
+        str(remote),
+        ssh=LocalSSH(),
+        checkpoints=cache,
+        block_size=16 * 1024,
+        progress=completed.append,
+    )
+
+    assert remote.read_bytes() == data
+    assert stats.resumed == 16 * 1024
+    assert completed[0] == 16 * 1024
+    assert completed[-1] == len(data)
+
+
+def test_resumable_upload_repairs_damaged_blocks(tmp_path):
+    data = os.urandom(64 * 1024)
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(data)
+    ssh = LocalSSH(corrupt_writes=1)
+
+    _, stats = resumable_upload(
+        LocalSSH,
+        source,
+        str(tmp_path / "remote.part"),
+        ssh=ssh,
+        checkpoints=ArtifactCache(root=str(tmp_path / "cache")),
+        sha256=hashlib.sha256(data).hexdigest(),
+        streams=1,
+        block_size=16 * 1024,
+    )
+
+    assert (tmp_path / "remote.part").read_bytes() == data
+    assert stats.repaired == 16 * 1024
+    assert any(command.startswith("sha256sum") for command in ssh.commands)
+
+
+def test_resumable_upload_verification_fails(tmp_path):
+    source = tmp_path / "archive.tar.gz"
+    source.write_bytes(b"data")
+
+    with pytest.raises(UploadVerificationError):
+        resumable_upload(
+            LocalSSH,
+            source,
+            str(tmp_path / "remote.part"),
+            ssh=LocalSSH(corrupt_writes=100),
+            checkpoints=ArtifactCache(root=str(tmp_path / "cache")),
+            sha256=hashlib.sha256(b"data").hexdigest(),
+        )
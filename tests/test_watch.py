@@ -0,0 +1,69 @@
+import os
+
+from kevinbotlib_deploytool.watch import ChangeWatcher, diff_snapshots, remote_destinations, snapshot
+
+
+def make_project(root):
+    (root / "src" / "bot" / "__pycache__").mkdir(parents=True)
+    (root / "src" / "bot" / "main.py").write_text("x = 1\n")
+    (root / "src" / "bot" / "__pycache__" / "main.cpython-311.pyc").write_bytes(b"\0")
+    (root / "assets").mkdir()
+    (root / "assets" / "map.json").write_text("{}")
+    (root / "README.md").write_text("not watched")
+
+
+def test_snapshot_and_diff(tmp_path):
+    make_project(tmp_path)
+    before = snapshot(tmp_path)
+    assert set(before) == {"src/bot/main.py", "assets/map.json"}
+
+    (tmp_path / "src" / "bot" / "main.py").write_text("x = 22\n")
+    (tmp_path / "src" / "bot" / "new.py").write_text("")
+    os.remove(tmp_path / "assets" / "map.json")
+
+    changed, deleted = diff_snapshots(before, snapshot(tmp_path))
+    assert changed == ["src/bot/main.py", "src/bot/new.py"]
+    assert deleted == ["assets/map.json"]
+
+
+class ScriptedWatcher(ChangeWatcher):
+    """Applies one scripted edit before each poll, so edits land between polls deterministically."""
+
+    def __init__(self, root, edits, **kwargs):
+        super().__init__(root, **kwargs)
+        self.edits = list(edits)
+
+    def poll(self):
+        if self.edits:
+            self.edits.pop(0)()
+        return super().poll()
+
+
+def test_watcher_debounces(tmp_path):
+    make_project(tmp_path)
+    src = tmp_path / "src" / "bot"
+    edits = [
+        lambda: None,
+        lambda: (src / "main.py").write_text("x = 22\n"),
+        lambda: None,
+        lambda: (src / "other.py").write_text(""),
+    ]
+    # the edits are a few microseconds apart, far inside the debounce period
+    watcher = ScriptedWatcher(tmp_path, edits, interval=0, debounce=0.5)
+
+    changed, deleted = watcher.wait()
+    assert watcher.edits == []
+    assert changed == ["src/bot/main.py", "src/bot/other.py"]
+    assert deleted == []
+
+
+def test_remote_destinations():
+    code = "/home/robot/bot/robot"
+    site = "/home/robot/bot/env/lib/python3.11/site-packages/bot"
+    assert remote_destinations("src/bot/util/a.py", code, "bot", site) == [
+        f"{code}/src/bot/util/a.py",
+        f"{site}/util/a.py",
+    ]
+    assert remote_destinations("assets/map.json", code, "bot", site) == [f"{code}/assets/map.json"]
+    assert remote_destinations("src/bot/a.py", code, "bot", None) == [f"{code}/src/bot/a.py"]
+    assert remote_destinations("src/bot/a.py", code, "bot", f"{code}/src/bot") == [f"{code}/src/bot/a.py"]